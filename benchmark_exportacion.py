@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark de exportación: CSV vs Parquet
+Compara tamaño de archivo y tiempo de carga en pandas con datos sintéticos
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from drug_news_agent.csv_exporter import CentroRegionalCSVExporter
+from drug_news_agent.geocoder import Coordinates, GeocodingResult
+from drug_news_agent.intelligent_search_agent import ProcessedNews
+from drug_news_agent.location_extractor import LocationInfo
+from drug_news_agent.relevance_classifier import NewsArticle, RelevanceScore
+
+PAISES = [
+    ("Colombia", "CO", "Bogotá", 4.68, -74.05),
+    ("México", "MX", "Tijuana", 32.5, -117.0),
+    ("Argentina", "AR", "Buenos Aires", -34.61, -58.38),
+    ("Perú", "PE", "Lima", -12.05, -77.04),
+    ("Cuba", "CU", "La Habana", 23.11, -82.37),
+    ("Panamá", "PA", "Colón", 9.36, -79.9),
+]
+DROGAS = ["cocaína", "marihuana", "fentanilo", "metanfetamina", "mdma", "ketamina"]
+FUERZAS = ["Policía Nacional", "Carabineros", "DEA", "Antinarcóticos", "PNP"]
+
+
+def generar_noticias(total: int, seed: int = 42):
+    """Genera noticias procesadas sintéticas (una a una)"""
+    rng = random.Random(seed)
+    for i in range(total):
+        pais, codigo, ciudad, lat, lng = rng.choice(PAISES)
+        drogas = rng.sample(DROGAS, rng.randint(0, 3))
+        score = rng.uniform(20, 100)
+        yield ProcessedNews(
+            article_id=f"A{i:07d}",
+            cui=f"CUI{i:06x}",
+            article=NewsArticle(
+                title=f"Incautan {rng.randint(1, 5000)} kilos de {drogas[0] if drogas else 'droga'} en {ciudad}",
+                description=f"La {rng.choice(FUERZAS)} realizó un operativo en {ciudad}, {pais}",
+                content="",
+                url=f"https://noticias.example/{pais.lower()}/{i}",
+                date="04/08/2025",
+                source=f"www.medio{rng.randint(1, 40)}.com"
+            ),
+            relevance=RelevanceScore(
+                level="Alta" if score >= 70 else "Media" if score >= 40 else "Baja",
+                score=score,
+                reasons=["Operativo antinarcóticos", f"País objetivo: {pais}"],
+                drug_mentions=drogas,
+                location_matches=[pais]
+            ),
+            location_info=LocationInfo(
+                country=pais,
+                city=ciudad,
+                full_address=f"{ciudad}, {pais}",
+                country_code=codigo,
+                confidence_score=0.9
+            ),
+            geocoding_result=GeocodingResult(
+                coordinates=Coordinates(
+                    latitude=lat + rng.uniform(-0.5, 0.5),
+                    longitude=lng + rng.uniform(-0.5, 0.5),
+                    formatted_address=f"{ciudad}, {pais}"
+                ),
+                success=True,
+                api_calls_used=1
+            )
+        )
+
+
+def cronometrar(funcion, repeticiones: int = 3):
+    """Devuelve el mejor tiempo de varias ejecuciones"""
+    mejor = float("inf")
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def cargar_csv_tipado(ruta: str) -> pd.DataFrame:
+    """Carga el CSV y reconstruye los tipos que el Parquet ya trae"""
+    df = pd.read_csv(ruta, dtype=str, keep_default_na=False)
+    for columna in ("Geo_Pais", "Geo_Prov", "Geo_Distrito"):
+        coordenadas = df[columna].str.strip('"').str.split(",", n=1, expand=True)
+        df[f"{columna}_Lat"] = pd.to_numeric(coordenadas[0], errors="coerce")
+        df[f"{columna}_Lon"] = pd.to_numeric(coordenadas[1], errors="coerce")
+    for columna in ("Fecha_Publicacion_Articulo", "Fecha"):
+        df[columna] = pd.to_datetime(df[columna], format="%d/%m/%Y", errors="coerce")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV vs Parquet")
+    parser.add_argument("--articulos", type=int, default=100000, help="Número de noticias sintéticas")
+    parser.add_argument("--compresion", default="zstd", help="Códec Parquet")
+    args = parser.parse_args()
+
+    print("📊 BENCHMARK DE EXPORTACIÓN: CSV vs PARQUET")
+    print("=" * 45)
+    print(f"🔢 Noticias sintéticas: {args.articulos:,}")
+
+    exporter = CentroRegionalCSVExporter()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.makedirs(os.path.join(directorio, "csv"))
+        os.makedirs(os.path.join(directorio, "parquet"))
+
+        print("\n1️⃣ Exportando...")
+        t_csv, ruta_csv = cronometrar(
+            lambda: exporter.export_stream(generar_noticias(args.articulos), os.path.join(directorio, "csv")), 1)
+        t_parquet, ruta_parquet = cronometrar(
+            lambda: exporter.export_to_parquet(generar_noticias(args.articulos), os.path.join(directorio, "parquet"),
+                                               compression=args.compresion), 1)
+
+        print("\n2️⃣ Cargando en pandas...")
+        t_leer_csv, df_csv = cronometrar(lambda: pd.read_csv(ruta_csv))
+        t_leer_csv_tipado, _ = cronometrar(lambda: cargar_csv_tipado(ruta_csv))
+        t_leer_parquet, df_parquet = cronometrar(lambda: pd.read_parquet(ruta_parquet))
+
+        tam_csv = os.path.getsize(ruta_csv)
+        tam_parquet = os.path.getsize(ruta_parquet)
+
+        print("\n📈 RESULTADOS:")
+        print("-" * 45)
+        print(f"{'':28}{'CSV':>8}{'Parquet':>9}")
+        print(f"{'Filas':28}{len(df_csv):>8,}{len(df_parquet):>9,}")
+        print(f"{'Tamaño (MB)':28}{tam_csv / 2**20:>8.2f}{tam_parquet / 2**20:>9.2f}")
+        print(f"{'Exportación (s)':28}{t_csv:>8.2f}{t_parquet:>9.2f}")
+        print(f"{'Carga sin tipos (s)':28}{t_leer_csv:>8.3f}{'-':>9}")
+        print(f"{'Carga con tipos (s)':28}{t_leer_csv_tipado:>8.3f}{t_leer_parquet:>9.3f}")
+        print(f"{'Memoria DataFrame (MB)':28}"
+              f"{df_csv.memory_usage(deep=True).sum() / 2**20:>8.1f}"
+              f"{df_parquet.memory_usage(deep=True).sum() / 2**20:>9.1f}")
+        print(f"\n⚡ Parquet ocupa {tam_csv / tam_parquet:.1f}x menos y carga "
+              f"{t_leer_csv_tipado / t_leer_parquet:.1f}x más rápido que el CSV tipado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from typing import Dict, List, Tuple
+
+from qwen_agent.llm.schema import FUNCTION, Message
+from qwen_agent.log import logger
+
+from demos.utils.tokens import count_tokens, truncate_tokens
+
+OMITTED_NOTE = '\n[... {num_tokens} tokens of this earlier tool response were omitted to fit the context budget ...]'
+
+
+class ContextManager:
+    """Keeps the prompt of a long agent session under a token budget.
+
+    Tool responses older than the newest `keep_recent_tool_responses` are compacted, oldest first,
+    until the prompt fits in `max_input_tokens`. The session history is never modified: compacted
+    messages are copies, so the transcript returned to the user stays complete.
+    """
+
+    def __init__(self,
+                 max_input_tokens: int,
+                 keep_recent_tool_responses: int = 3,
+                 compacted_tool_response_tokens: int = 256):
+        self.max_input_tokens = max_input_tokens
+        self.keep_recent_tool_responses = keep_recent_tool_responses
+        self.compacted_tool_response_tokens = compacted_tool_response_tokens
+        self.stats: List[Dict] = []
+        # Both caches are keyed by message id and keep the content they were computed for,
+        # so a message is only tokenized (and compacted) once per session.
+        self._token_counts: Dict[int, Tuple[str, int]] = {}
+        self._compacted: Dict[int, Tuple[Message, Message, int]] = {}
+
+    def compact(self, messages: List[Message]) -> List[Message]:
+        counts = [self._count_tokens(msg) for msg in messages]
+        tokens_before = sum(counts)
+        total = tokens_before
+        num_compacted = 0
+
+        if total > self.max_input_tokens:
+            tool_indices = [i for i, msg in enumerate(messages) if msg.role == FUNCTION]
+            if self.keep_recent_tool_responses > 0:
+                tool_indices = tool_indices[:-self.keep_recent_tool_responses]
+            messages = list(messages)
+            for i in tool_indices:
+                if total <= self.max_input_tokens:
+                    break
+                compacted_msg, compacted_tokens = self._compact_tool_response(messages[i])
+                if compacted_tokens >= counts[i]:
+                    continue
+                messages[i] = compacted_msg
+                total -= counts[i] - compacted_tokens
+                num_compacted += 1
+            if total > self.max_input_tokens:
+                logger.warning(f'Prompt still has {total} tokens after compaction, '
+                               f'over the budget of {self.max_input_tokens} tokens')
+
+        self.stats.append({
+            'turn': len(self.stats) + 1,
+            'tokens_before': tokens_before,
+            'tokens_sent': total,
+            'tokens_saved': tokens_before - total,
+            'compacted_tool_responses': num_compacted,
+        })
+        if num_compacted:
+            logger.info(f'Context compaction: {tokens_before} -> {total} tokens '
+                        f'({tokens_before - total} saved, {num_compacted} tool responses compacted)')
+        return messages
+
+    @property
+    def total_tokens_saved(self) -> int:
+        return sum(stat['tokens_saved'] for stat in self.stats)
+
+    def _count_tokens(self, msg: Message) -> int:
+        cached = self._token_counts.get(id(msg))
+        if cached and cached[0] is msg.content:
+            return cached[1]
+        num_tokens = count_tokens(self._get_text(msg))
+        self._token_counts[id(msg)] = (msg.content, num_tokens)
+        return num_tokens
+
+    def _compact_tool_response(self, msg: Message) -> Tuple[Message, int]:
+        cached = self._compacted.get(id(msg))
+        if cached and cached[0] is msg:
+            return cached[1], cached[2]
+
+        text = self._get_text(msg)
+        sections = []
+        for section in text.split('\n=======\n'):
+            # Visit results already end with a model-written summary: keep it and drop the page evidence
+            if 'Summary: \n' in section:
+                header = section.split('\n', 1)[0]
+                section = header + '\nSummary: \n' + section.split('Summary: \n', 1)[1].strip()
+            sections.append(section)
+        compacted = truncate_tokens('\n=======\n'.join(sections), self.compacted_tool_response_tokens)
+        num_omitted = self._count_tokens(msg) - count_tokens(compacted)
+        if num_omitted > 0:
+            compacted += OMITTED_NOTE.format(num_tokens=num_omitted)
+
+        compacted_msg = msg.model_copy(update={'content': compacted})
+        compacted_tokens = count_tokens(compacted)
+        self._compacted[id(msg)] = (msg, compacted_msg, compacted_tokens)
+        return compacted_msg, compacted_tokens
+
+    @staticmethod
+    def _get_text(msg: Message) -> str:
+        if isinstance(msg.content, str):
+            return msg.content
+        return '\n'.join(item.text for item in msg.content if item.text)
@@ -1,12 +1,28 @@
-import copy
-from typing import Dict, Iterator, List, Literal, Union, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Literal, Tuple, Union, Optional
 
 from qwen_agent.agents import Assistant
 from qwen_agent.llm import BaseChatModel
-from qwen_agent.llm.schema import  USER, FUNCTION, Message, DEFAULT_SYSTEM_MESSAGE,SYSTEM,ROLE
+from qwen_agent.llm.schema import  USER, FUNCTION, ContentItem, Message, DEFAULT_SYSTEM_MESSAGE,SYSTEM,ROLE
 from qwen_agent.tools import BaseTool
 from qwen_agent.log import logger
 
+from demos.agents.context_manager import ContextManager
+from demos.tools.private.cache_utils import tool_result_cache
+
+# Seconds a tool result stays reusable; tools not listed here are never cached
+DEFAULT_TOOL_CACHE_TTL = {'search': 600, 'visit': 1800}
+# Failures are transient, so results containing these markers are not cached
+TOOL_ERROR_MARKERS = (
+    '[Search] Invalid request format',
+    '[Visit] Invalid request format',
+    'Google search Timeout',
+    'No results found',
+    'could not be accessed',
+    'An error occurred when calling tool',
+)
+
 class SearchAgent(Assistant):
 
     def __init__(self,
@@ -32,33 +48,110 @@ class SearchAgent(Assistant):
         self.custom_user_prompt = custom_user_prompt
         self.make_system_prompt = make_system_prompt
         self.addtional_agent = addtional_agent
+        # Optional per-tool concurrency caps, e.g. {'visit': 2}, shared by every run of this agent
+        self.tool_semaphores = {
+            name: threading.BoundedSemaphore(limit)
+            for name, limit in self.extra.get('tool_concurrency', {}).items()
+        }
+        self.tool_cache_ttl = {**DEFAULT_TOOL_CACHE_TTL, **self.extra.get('tool_cache_ttl', {})}
 
     def insert_in_custom_user_prompt(self, messages: List[Message]) -> List[Message]:
-        for message in messages:
+        for i, message in enumerate(messages):
             if message.role == USER:
-                message.content[0].text = self.custom_user_prompt + message.content[0].text
+                # The message may be shared with the caller's history, so replace it instead of editing it
+                if isinstance(message.content, str):
+                    content = self.custom_user_prompt + message.content
+                else:
+                    content = [ContentItem(text=self.custom_user_prompt + message.content[0].text)] + message.content[1:]
+                messages[i] = message.model_copy(update={'content': content})
                 break
         return messages
+
+    def _prepend_knowledge_prompt(self,
+                                  messages: List[Message],
+                                  lang: Literal['en', 'zh'] = 'en',
+                                  knowledge: str = '',
+                                  **kwargs) -> List[Message]:
+        # Without knowledge or RAG files the parent would only deep-copy the whole history to prepend nothing
+        if not knowledge and not self.mem.get_rag_files(messages):
+            return list(messages)
+        return super()._prepend_knowledge_prompt(messages=messages, lang=lang, knowledge=knowledge, **kwargs)
+
+    def _call_tool(self, tool_name: str, tool_args: Union[str, dict] = '{}', **kwargs) -> Union[str, List[ContentItem]]:
+        # Results are shared by every agent in the process, so repeated searches and visits across
+        # WebUI sessions return immediately. Pass use_tool_cache=False to run() to bypass it.
+        use_tool_cache = kwargs.pop('use_tool_cache', self.extra.get('tool_cache', True))
+        ttl = self.tool_cache_ttl.get(tool_name, 0) if use_tool_cache else 0
+        if ttl <= 0:
+            return super()._call_tool(tool_name, tool_args, **kwargs)
+
+        key = tool_result_cache.make_key(tool_name, tool_args)
+        tool_result = tool_result_cache.get(key)
+        if tool_result is not None:
+            logger.info(f'{self.name} tool cache hit: {tool_name}, tool_args: {tool_args}')
+            return tool_result
+        tool_result = super()._call_tool(tool_name, tool_args, **kwargs)
+        if isinstance(tool_result, str) and tool_result and not any(m in tool_result for m in TOOL_ERROR_MARKERS):
+            tool_result_cache.set(key, tool_result, ttl)
+        return tool_result
+
+    def _call_tool_limited(self, tool_name: str, tool_args: Union[str, dict] = '{}', **kwargs) -> str:
+        semaphore = self.tool_semaphores.get(tool_name)
+        if semaphore is None:
+            return self._call_tool(tool_name, tool_args, **kwargs)
+        with semaphore:
+            return self._call_tool(tool_name, tool_args, **kwargs)
+
+    def _call_tools(self, tool_calls: List[Tuple[str, Union[str, dict]]], messages: List[Message],
+                    **kwargs) -> Iterator[Message]:
+        """Run the tool calls of one LLM turn, yielding the function messages in the model's order."""
+        if not self.extra.get('parallel_tool_calls', False) or len(tool_calls) < 2:
+            for tool_name, tool_args in tool_calls:
+                tool_result = self._call_tool_limited(tool_name, tool_args, messages=messages, **kwargs)
+                yield Message(role=FUNCTION, name=tool_name, content=tool_result)
+            return
+
+        # The calls are independent network requests, so the turn only waits for the slowest one
+        max_workers = min(self.extra.get('max_tool_workers', 4), len(tool_calls))
+        history = list(messages)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._call_tool_limited, tool_name, tool_args, messages=history, **kwargs)
+                for tool_name, tool_args in tool_calls
+            ]
+            for (tool_name, _), future in zip(tool_calls, futures):
+                yield Message(role=FUNCTION, name=tool_name, content=future.result())
+
     def _run(self,
              messages: List[Message],
              lang: Literal['en', 'zh'] = 'zh',
              knowledge: str = '',
              **kwargs) -> Iterator[List[Message]]:
         messages = self._prepend_knowledge_prompt(messages=messages, lang=lang, knowledge=knowledge, **kwargs)
-        messages = copy.deepcopy(messages)
+        # Structural sharing: the list is new, but messages are only copied when they are modified
+        messages = list(messages)
         self.insert_in_custom_user_prompt(messages=messages)
         if self.make_system_prompt:
             if not messages or messages[0][ROLE] != SYSTEM:
                 messages.insert(0, Message(role=SYSTEM, content=self.make_system_prompt()))
-        for msg in messages:
-            if isinstance(msg.content, list):
-                assert len(msg.content) == 1
-                msg.content = msg.content[0].text
+        for i, msg in enumerate(messages):
+            content = msg.content
+            if isinstance(content, list):
+                assert len(content) == 1
+                content = content[0].text
             if msg.role == USER:
-                msg.content = msg.content.strip()
+                content = content.strip()
+            if content is not msg.content:
+                messages[i] = msg.model_copy(update={'content': content})
 
         reasoning = self.extra.get('reasoning', True)
         num_llm_calls_available = self.extra.get('max_llm_calls', 20)
+        context_manager = None
+        if self.extra.get('max_input_tokens'):
+            context_manager = ContextManager(
+                max_input_tokens=self.extra['max_input_tokens'],
+                keep_recent_tool_responses=self.extra.get('keep_recent_tool_responses', 3),
+            )
         response = []
         while True and num_llm_calls_available > 0:
             num_llm_calls_available -= 1
@@ -66,7 +159,8 @@ class SearchAgent(Assistant):
             extra_generate_cfg = {'lang': lang}
             if kwargs.get('seed') is not None:
                 extra_generate_cfg['seed'] = kwargs['seed']
-            output_stream = self._call_llm(messages=messages,
+            llm_messages = context_manager.compact(messages) if context_manager else messages
+            output_stream = self._call_llm(messages=llm_messages,
                                            functions=[func.function for func in self.function_map.values()],
                                            extra_generate_cfg=extra_generate_cfg)
             output: List[Message] = []
@@ -79,34 +173,29 @@ class SearchAgent(Assistant):
             if output:
                 response.extend(output)
                 messages.extend(output)
-                used_any_tool = False
+                tool_calls = []
                 for out in output:
                     use_tool, tool_name, tool_args, _ = self._detect_tool(out)
                     logger.info(f"{self.name} use_tool: {use_tool}, tool_name: {tool_name}, tool_args: {tool_args}")
                     if use_tool:
-                        tool_result = self._call_tool(tool_name, tool_args, messages=messages, **kwargs)
-                        fn_msg = Message(
-                            role=FUNCTION,
-                            name=tool_name,
-                            content=tool_result,
-                        )
-                        messages.append(fn_msg)
-                        response.append(fn_msg)
-                        yield response
-                        used_any_tool = True
-                if not used_any_tool:
+                        tool_calls.append((tool_name, tool_args))
+                for fn_msg in self._call_tools(tool_calls, messages=messages, **kwargs):
+                    messages.append(fn_msg)
+                    response.append(fn_msg)
+                    yield response
+                if not tool_calls:
                     logger.info(f'{self.name} not used any tool, skip out')
                     break
         yield response
 
         if self.addtional_agent:
-            new_messages = copy.deepcopy(messages)
-            new_messages.pop()
-            new_response = copy.deepcopy(response)
-            new_response.pop()
+            # Share the history with the additional agent; only the system message is replaced
+            new_messages = messages[:-1]
+            new_response = response[:-1]
             if new_messages[0][ROLE] == SYSTEM:
                 # Add the system instruction to the agent
-                new_messages[0].content = self.addtional_agent.make_system_prompt()
+                new_messages[0] = new_messages[0].model_copy(
+                    update={'content': self.addtional_agent.make_system_prompt()})
             print(new_messages)
             for rsp in self.addtional_agent._run(messages=new_messages, **kwargs):
                 yield new_response + rsp
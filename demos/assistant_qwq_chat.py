@@ -55,6 +55,11 @@ def init_dev_search_agent_service(name: str = 'SEARCH', port: int = 8002, desc:
         extra={
             'reasoning': reasoning,
             'max_llm_calls': max_llm_calls,
+            'parallel_tool_calls': True,
+            'max_tool_workers': 4,
+            'tool_concurrency': {'search': 8, 'visit': 4},
+            'max_input_tokens': 24000,
+            'keep_recent_tool_responses': 3,
         },
         addtional_agent = addtional_agent,
         make_system_prompt = make_system_prompt,
@@ -133,6 +138,8 @@ def app_gui():
         server_port=7860,
         concurrency_limit=20,
         enable_mention=False,
+        max_sessions_per_user=2,
+        max_queue_size=100,
     )
 
 
@@ -0,0 +1,166 @@
+import asyncio
+import itertools
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, List, Tuple
+
+from qwen_agent.log import logger
+
+QUEUED = 'queued'
+CHUNK = 'chunk'
+REJECTED = 'rejected'
+
+
+class _Ticket:
+
+    def __init__(self, ticket_id: int, user_id: str):
+        self.id = ticket_id
+        self.user_id = user_id
+        self.admitted = False
+
+
+class AgentSessionExecutor:
+    """Run blocking agent sessions on a dedicated thread pool with global and per-user limits.
+
+    The caller consumes `stream()` from an async handler, so a queued or running session does not hold a
+    web-server worker thread. Waiting sessions are admitted in FIFO order (skipping users that are already at
+    their own limit), report their queue position while they wait, and are cancelled when the consumer goes
+    away: a cancelled session stops pulling from the agent generator, so no further LLM or tool calls are made.
+    """
+
+    def __init__(self,
+                 max_workers: int = 20,
+                 max_sessions_per_user: int = 2,
+                 max_queue_size: int = 100,
+                 poll_interval: float = 0.5):
+        self.max_workers = max_workers
+        self.max_sessions_per_user = max_sessions_per_user
+        self.max_queue_size = max_queue_size
+        self.poll_interval = poll_interval
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='agent-session')
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._waiting: List[_Ticket] = []
+        self._running = 0
+        self._running_per_user = Counter()
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {'running': self._running, 'waiting': len(self._waiting)}
+
+    async def stream(self, user_id: str, run_fn: Callable[[], Iterator[Any]]) -> AsyncIterator[Tuple[str, Any]]:
+        """Run `run_fn()` once admitted and stream its items.
+
+        Yields:
+            (QUEUED, position) while waiting (position 0 means next in line),
+            (REJECTED, None) if the queue is full, then (CHUNK, item) for the agent output. Items are coalesced:
+            when the consumer is slower than the agent only the newest item is delivered, which is enough because
+            each agent response contains the full reply so far.
+        """
+        ticket = self._enqueue(user_id)
+        if ticket is None:
+            yield REJECTED, None
+            return
+
+        cancel = threading.Event()
+        try:
+            last_position = None
+            while not self._try_admit(ticket):
+                position = self._position(ticket)
+                if position != last_position:
+                    last_position = position
+                    yield QUEUED, position
+                await asyncio.sleep(self.poll_interval)
+
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+            self._pool.submit(self._run_session, ticket, run_fn, cancel, loop, queue)
+
+            while True:
+                kind, item = await queue.get()
+                # Coalesce the backlog to the newest chunk
+                while kind == CHUNK and not queue.empty():
+                    next_kind, next_item = queue.get_nowait()
+                    if next_kind != CHUNK:
+                        queue.put_nowait((next_kind, next_item))
+                        break
+                    item = next_item
+                if kind == CHUNK:
+                    yield CHUNK, item
+                elif kind == 'error':
+                    raise item
+                else:
+                    return
+        finally:
+            # Client disconnected, handler cancelled or session finished
+            cancel.set()
+            with self._lock:
+                if not ticket.admitted and ticket in self._waiting:
+                    self._waiting.remove(ticket)
+
+    def _enqueue(self, user_id: str):
+        with self._lock:
+            if len(self._waiting) >= self.max_queue_size:
+                logger.warning(f'agent executor queue full ({len(self._waiting)}), rejecting session of {user_id}')
+                return None
+            ticket = _Ticket(next(self._ids), user_id)
+            self._waiting.append(ticket)
+            return ticket
+
+    def _try_admit(self, ticket: _Ticket) -> bool:
+        with self._lock:
+            if self._running >= self.max_workers:
+                return False
+            # The first waiting ticket whose user is under the per-user limit gets the free slot
+            for waiting in self._waiting:
+                if self._running_per_user[waiting.user_id] < self.max_sessions_per_user:
+                    if waiting is not ticket:
+                        return False
+                    self._waiting.remove(ticket)
+                    ticket.admitted = True
+                    self._running += 1
+                    self._running_per_user[ticket.user_id] += 1
+                    return True
+            return False
+
+    def _position(self, ticket: _Ticket) -> int:
+        with self._lock:
+            return self._waiting.index(ticket) if ticket in self._waiting else 0
+
+    def _release(self, ticket: _Ticket):
+        with self._lock:
+            self._running -= 1
+            self._running_per_user[ticket.user_id] -= 1
+            if self._running_per_user[ticket.user_id] <= 0:
+                del self._running_per_user[ticket.user_id]
+
+    def _run_session(self, ticket: _Ticket, run_fn, cancel: threading.Event, loop, queue):
+        """Worker thread: pull from the agent generator until it ends or the session is cancelled."""
+        generator = None
+        try:
+            generator = run_fn()
+            for item in generator:
+                if cancel.is_set():
+                    logger.info(f'agent session of {ticket.user_id} cancelled, stopping the agent')
+                    break
+                self._put(loop, queue, CHUNK, item)
+            self._put(loop, queue, 'done', None)
+        except Exception as e:
+            self._put(loop, queue, 'error', e)
+        finally:
+            if generator is not None and hasattr(generator, 'close'):
+                generator.close()
+            self._release(ticket)
+
+    @staticmethod
+    def _put(loop, queue, kind, item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (kind, item))
+        except RuntimeError:
+            # The consumer's event loop is already closed
+            pass
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
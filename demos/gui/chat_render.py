@@ -0,0 +1,98 @@
+from typing import Dict, List, Tuple
+
+from qwen_agent.gui.utils import convert_fncall_to_text
+from qwen_agent.llm.schema import ASSISTANT, CONTENT, FUNCTION, NAME, ROLE
+
+
+def _message_key(msg) -> tuple:
+    """Cheap fingerprint of a message.
+
+    Streamed responses re-dump the earlier messages on every chunk, but their content strings are the same
+    objects, so comparing these tuples is an identity check in the common case.
+    """
+    return msg[ROLE], msg.get(NAME), msg[CONTENT], msg.get(f'{FUNCTION}_call'), msg.get('reasoning_content')
+
+
+class IncrementalChatRenderer:
+    """Convert a growing response list into chat bubbles, converting each message only once.
+
+    `convert_fncall_to_text` converts every message on its own and then concatenates consecutive assistant
+    messages of the same agent (and the function results between them) into one bubble. A whole tool-calling
+    session is usually a single bubble, so the converted text of every message is cached, and on each
+    streamed chunk only the messages that changed (normally just the last one) are converted again. Each
+    bubble also caches the joined text of its finished messages, so a chunk only appends the last one.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._keys: List[tuple] = []
+        self._pieces: List[str] = []
+        self._bubbles: Dict[Tuple[int, int], Dict] = {}
+        self._prefixes: Dict[int, Tuple[int, str]] = {}  # bubble start -> (end of the joined pieces, text)
+
+    def convert(self, messages: List[Dict]) -> List[Dict]:
+        if messages and messages[0][ROLE] == FUNCTION:
+            return convert_fncall_to_text(messages)
+
+        # Keep the cached conversions up to the first message that changed
+        num_valid = 0
+        for key, msg in zip(self._keys, messages):
+            if _message_key(msg) != key:
+                break
+            num_valid += 1
+        del self._keys[num_valid:], self._pieces[num_valid:]
+        self._bubbles = {span: bubble for span, bubble in self._bubbles.items() if span[1] <= num_valid}
+        self._prefixes = {start: prefix for start, prefix in self._prefixes.items() if prefix[0] <= num_valid}
+
+        for msg in messages[num_valid:]:
+            self._keys.append(_message_key(msg))
+            self._pieces.append(self._convert_piece(msg))
+
+        starts = self._bubble_starts(messages)
+        display = []
+        for start, end in zip(starts, starts[1:] + [len(messages)]):
+            bubble = self._bubbles.get((start, end))
+            if bubble is None:
+                bubble = {
+                    ROLE: messages[start][ROLE],
+                    CONTENT: self._bubble_text(start, end, len(messages)),
+                    NAME: messages[start].get(NAME),
+                }
+                self._bubbles[(start, end)] = bubble
+            display.append(bubble)
+        return display
+
+    def _bubble_text(self, start: int, end: int, num_messages: int) -> str:
+        """Text of the bubble holding messages[start:end], reusing the joined text of its finished messages."""
+        # Only the last message of the response list can still be streaming
+        finished = min(end, num_messages - 1)
+        joined, text = self._prefixes.get(start, (start, ''))
+        if joined < finished:
+            text += ''.join(self._pieces[joined:finished])
+            joined = finished
+            self._prefixes[start] = (joined, text)
+        return text + ''.join(self._pieces[joined:end])
+
+    @staticmethod
+    def _convert_piece(msg) -> str:
+        """The text a single message contributes to its bubble."""
+        if msg[ROLE] == FUNCTION:
+            # A function result is appended to the assistant bubble before it
+            return convert_fncall_to_text([{ROLE: ASSISTANT, CONTENT: '', NAME: None}, msg])[0][CONTENT]
+        return convert_fncall_to_text([msg])[0][CONTENT]
+
+    @staticmethod
+    def _bubble_starts(messages: List[Dict]) -> List[int]:
+        """Indexes of the messages that open a new bubble, following `convert_fncall_to_text`."""
+        starts = []
+        prev_role, prev_name = None, None
+        for i, msg in enumerate(messages):
+            role, name = msg[ROLE], msg.get(NAME)
+            if role == FUNCTION:
+                continue
+            if not (role == ASSISTANT and prev_role == ASSISTANT and prev_name == name):
+                starts.append(i)
+            prev_role, prev_name = role, name
+        return starts
@@ -1,16 +1,20 @@
 import os
 import pprint
 import re
+import time
 from typing import List, Optional, Union
 
 from qwen_agent import Agent, MultiAgentHub
 from qwen_agent.agents.user_agent import PENDING_USER_INPUT
 from qwen_agent.gui.gradio_utils import format_cover_html
-from qwen_agent.gui.utils import convert_fncall_to_text, convert_history_to_chatbot, get_avatar_image
+from qwen_agent.gui.utils import convert_history_to_chatbot, get_avatar_image
 from qwen_agent.llm.schema import AUDIO, CONTENT, FILE, IMAGE, NAME, ROLE, USER, VIDEO, Message
 from qwen_agent.log import logger
 from qwen_agent.utils.utils import print_traceback
 
+from demos.gui.agent_executor import CHUNK, QUEUED, REJECTED, AgentSessionExecutor
+from demos.gui.chat_render import IncrementalChatRenderer
+
 
 class WebUI:
     """A Common chatbot application for agent."""
@@ -23,7 +27,8 @@ class WebUI:
             agent: The agent or a list of agents,
                 supports various types of agents such as Assistant, GroupChat, Router, etc.
             chatbot_config: The chatbot configuration.
-                Set the configuration as {'user.name': '', 'user.avatar': '', 'agent.avatar': '', 'input.placeholder': '', 'prompt.suggestions': []}.
+                Set the configuration as {'user.name': '', 'user.avatar': '', 'agent.avatar': '', 'input.placeholder': '', 'prompt.suggestions': [], 'render.fps': 10}.
+                `render.fps` caps how many streamed updates per second are sent to the browser (0 disables the cap).
         """
         chatbot_config = chatbot_config or {}
 
@@ -58,6 +63,7 @@ class WebUI:
         self.input_placeholder = chatbot_config.get('input.placeholder', '请输入需要分析的问题，尽管交给我吧～')
         self.prompt_suggestions = chatbot_config.get('prompt.suggestions', [])
         self.verbose = chatbot_config.get('verbose', False)
+        self.render_fps = chatbot_config.get('render.fps', 10)
 
     """
     Run the chatbot.
@@ -73,11 +79,23 @@ class WebUI:
             server_port: int = None,
             concurrency_limit: int = 10,
             enable_mention: bool = False,
+            max_sessions_per_user: int = 2,
+            max_queue_size: int = 100,
             **kwargs):
         self.run_kwargs = kwargs
 
         from qwen_agent.gui.gradio_dep import gr, mgr, ms
 
+        # Agent sessions run on their own thread pool; the Gradio handler only awaits their output
+        self.session_executor = AgentSessionExecutor(max_workers=concurrency_limit,
+                                                     max_sessions_per_user=max_sessions_per_user,
+                                                     max_queue_size=max_queue_size)
+
+        async def session_run(_chatbot, _history, _agent_selector=None, request: gr.Request = None):
+            async for outputs in self.agent_run_async(_chatbot, _history, _agent_selector,
+                                                      user_id=self._get_user_id(request)):
+                yield outputs
+
         customTheme = gr.themes.Default(
             primary_hue=gr.themes.utils.colors.blue,
             radius_size=gr.themes.utils.sizes.radius_none,
@@ -186,21 +204,24 @@ class WebUI:
                                 [chatbot, agent_selector],
                                 [chatbot, agent_selector],
                             ).then(
-                                self.agent_run,
+                                session_run,
                                 [chatbot, history, agent_selector],
                                 [chatbot, history, agent_selector],
+                                concurrency_limit=None,
                             )
                         else:
                             input_promise = input_promise.then(
-                                self.agent_run,
+                                session_run,
                                 [chatbot, history, agent_selector],
                                 [chatbot, history, agent_selector],
+                                concurrency_limit=None,
                             )
                     else:
                         input_promise = input_promise.then(
-                            self.agent_run,
+                            session_run,
                             [chatbot, history],
                             [chatbot, history],
+                            concurrency_limit=None,
                         )
 
                     input_promise.then(self.flushed, None, [input])
@@ -263,6 +284,37 @@ class WebUI:
 
         yield _chatbot, _agent_selector
 
+    async def agent_run_async(self, _chatbot, _history, _agent_selector=None, user_id='anonymous'):
+        """Run `agent_run` on the session executor, showing the queue position while the session waits."""
+        agent_index = _agent_selector or 0
+
+        def status(text):
+            _chatbot[-1][1] = [None for _ in range(len(self.agent_list))]
+            _chatbot[-1][1][agent_index] = text
+            return (_chatbot, _history, _agent_selector) if _agent_selector is not None else (_chatbot, _history)
+
+        async for kind, outputs in self.session_executor.stream(
+                user_id, lambda: self._snapshot_run(_chatbot, _history, _agent_selector)):
+            if kind == QUEUED:
+                yield status(f'⏳ 排队中，前面还有 {outputs} 个会话…')
+            elif kind == REJECTED:
+                yield status('⚠️ 当前排队人数过多，请稍后再试。')
+            elif kind == CHUNK:
+                yield outputs
+
+    def _snapshot_run(self, _chatbot, _history, _agent_selector=None):
+        """`agent_run` with each update copied, since the worker thread keeps mutating the chat while it is sent."""
+        for outputs in self.agent_run(_chatbot, _history, _agent_selector):
+            chatbot_copy = [[query, list(answer) if isinstance(answer, list) else answer] for query, answer in outputs[0]]
+            yield (chatbot_copy, list(outputs[1])) + tuple(outputs[2:])
+
+    @staticmethod
+    def _get_user_id(request) -> str:
+        """Authenticated username, else the browser session; never the client IP, which NAT and proxies share."""
+        if request is None:
+            return 'anonymous'
+        return getattr(request, 'username', None) or getattr(request, 'session_hash', None) or 'anonymous'
+
     def agent_run(self, _chatbot, _history, _agent_selector=None):
         # TODO 仅保持任务的单论对话
         if self.verbose:
@@ -289,19 +341,18 @@ class WebUI:
             agent_runner = self.agent_hub
         agent_runner.function_map
 
-        responses = []
-        for responses in agent_runner.run(_history, **self.run_kwargs):
-            if not responses:
-                continue
-            if responses[-1][CONTENT] == PENDING_USER_INPUT:
-                logger.info('Interrupted. Waiting for user input!')
-                break
+        renderer = IncrementalChatRenderer()
+        min_frame_interval = 1.0 / self.render_fps if self.render_fps else 0.0
+        last_frame = 0.0
 
-            display_responses = convert_fncall_to_text(responses)
+        def render(responses) -> bool:
+            """Write the converted responses into the chatbot; False if there is nothing to show yet."""
+            nonlocal num_output_bubbles, _agent_selector
+            display_responses = renderer.convert(responses)
             if not display_responses:
-                continue
+                return False
             if display_responses[-1][CONTENT] is None:
-                continue
+                return False
 
             while len(display_responses) > num_output_bubbles:
                 # Create a new chat bubble
@@ -318,12 +369,35 @@ class WebUI:
 
             if len(self.agent_list) > 1:
                 _agent_selector = agent_index
+            return True
+
+        responses = []
+        unrendered = None
+        for responses in agent_runner.run(_history, **self.run_kwargs):
+            if not responses:
+                continue
+            if responses[-1][CONTENT] == PENDING_USER_INPUT:
+                logger.info('Interrupted. Waiting for user input!')
+                break
+
+            # Throttle UI updates before converting; the latest state is rendered after the loop
+            now = time.monotonic()
+            if now - last_frame < min_frame_interval:
+                unrendered = responses
+                continue
+            unrendered = None
+            if not render(responses):
+                continue
+            last_frame = now
 
             if _agent_selector is not None:
                 yield _chatbot, _history, _agent_selector
             else:
                 yield _chatbot, _history
 
+        if unrendered is not None:
+            render(unrendered)
+
         if responses:
             _history.extend([res for res in responses if res[CONTENT] != PENDING_USER_INPUT])
 
@@ -18,6 +18,8 @@ from qwen_agent.llm.function_calling import BaseFnCallModel, simulate_response_c
 from qwen_agent.llm.schema import ASSISTANT, Message, FunctionCall
 from qwen_agent.log import logger
 
+from demos.llm.stream_buffer import StreamBuffer, log_stream_chunk
+
 
 @register_llm('oai')
 class TextChatAtOAI(BaseFnCallModel):
@@ -90,6 +92,11 @@ class TextChatAtOAI(BaseFnCallModel):
         messages = self.convert_messages_to_dicts(messages)
         try:
             response = self._chat_complete_create(model=self.model, messages=messages, stream=True, **generate_cfg)
+            # In delta mode every message carries only the new chunk, while the buffers in `extra`
+            # give consumers the full text on demand without re-concatenating it per chunk.
+            content_buffer = StreamBuffer()
+            reasoning_buffer = StreamBuffer()
+            stream_extra = {'content_buffer': content_buffer, 'reasoning_buffer': reasoning_buffer}
             if delta_stream:
                 for chunk in response:
                     if chunk.choices:
@@ -99,11 +106,17 @@ class TextChatAtOAI(BaseFnCallModel):
                                 Message(
                                     role=ASSISTANT,
                                     content='',
-                                    reasoning_content=choice.delta.reasoning_content
+                                    reasoning_content=reasoning_buffer.append(choice.delta.reasoning_content),
+                                    extra=stream_extra,
                                 )
                             ]
                         if hasattr(choice.delta, 'content') and choice.delta.content:
-                            yield [Message(role=ASSISTANT, content=choice.delta.content, reasoning_content='')]
+                            yield [
+                                Message(role=ASSISTANT,
+                                        content=content_buffer.append(choice.delta.content),
+                                        reasoning_content='',
+                                        extra=stream_extra)
+                            ]
                         # 兼容 map agent 模型
                         if hasattr(choice.delta, 'tool_calls') and choice.delta.tool_calls:
                             function_name = choice.delta.tool_calls[0].function.name
@@ -112,18 +125,20 @@ class TextChatAtOAI(BaseFnCallModel):
                                 'arguments': json.loads(choice.delta.tool_calls[0].function.arguments)
                             }
                             function_json = json.dumps(function_call, ensure_ascii=False)
-                            yield [Message(role=ASSISTANT, content=f'<tool_call>{function_json}</tool_call>')]
-                    logger.info(f'delta_stream message chunk: {chunk}')
+                            yield [
+                                Message(role=ASSISTANT,
+                                        content=content_buffer.append(f'<tool_call>{function_json}</tool_call>'),
+                                        extra=stream_extra)
+                            ]
+                    log_stream_chunk(chunk, prefix='delta_stream message chunk')
             else:
-                full_response = ''
-                full_reasoning_content = ''
                 for chunk in response:
                     if chunk.choices:
                         choice = chunk.choices[0]
                         if hasattr(choice.delta, 'reasoning_content') and choice.delta.reasoning_content:
-                            full_reasoning_content += choice.delta.reasoning_content
+                            reasoning_buffer.append(choice.delta.reasoning_content)
                         if hasattr(choice.delta, 'content') and choice.delta.content:
-                            full_response += choice.delta.content
+                            content_buffer.append(choice.delta.content)
                         # 兼容 map agent 模型
                         if hasattr(choice.delta, 'tool_calls') and choice.delta.tool_calls:
                             function_name = choice.delta.tool_calls[0].function.name
@@ -138,9 +153,23 @@ class TextChatAtOAI(BaseFnCallModel):
                             }
                             function_json = json.dumps(function_call, ensure_ascii=False)
                             logger.info(json.dumps(function_call, ensure_ascii=False, indent=4))
-                            full_response += f'<tool_call>{function_json}</tool_call>'
-                        yield [Message(role=ASSISTANT, content=full_response, reasoning_content=full_reasoning_content)]
-                    logger.info(f'message chunk: {chunk}')
+                            content_buffer.append(f'<tool_call>{function_json}</tool_call>')
+                        # Full-text mode: snapshot once the text grew enough or the last one is too old (see StreamBuffer)
+                        if content_buffer.snapshot_due() or reasoning_buffer.snapshot_due():
+                            yield [
+                                Message(role=ASSISTANT,
+                                        content=content_buffer.snapshot(),
+                                        reasoning_content=reasoning_buffer.snapshot())
+                            ]
+                    log_stream_chunk(chunk)
+                if content_buffer.pending or reasoning_buffer.pending or not content_buffer.num_snapshots:
+                    yield [
+                        Message(role=ASSISTANT,
+                                content=content_buffer.snapshot(),
+                                reasoning_content=reasoning_buffer.snapshot())
+                    ]
+            logger.info(f'stream finished: {content_buffer.num_chunks} content chunks ({len(content_buffer)} chars), '
+                        f'{reasoning_buffer.num_chunks} reasoning chunks ({len(reasoning_buffer)} chars)')
         except OpenAIError as ex:
             raise ModelServiceError(exception=ex)
 
@@ -10,6 +10,8 @@ from qwen_agent.llm.function_calling import BaseFnCallModel
 from qwen_agent.llm.schema import ASSISTANT, Message
 from qwen_agent.log import logger
 
+from demos.llm.stream_buffer import StreamBuffer, log_stream_chunk
+
 
 @register_llm('qwen_dashscope')
 class QwenChatAtDS(BaseFnCallModel):
@@ -77,35 +79,57 @@ class QwenChatAtDS(BaseFnCallModel):
 
     @staticmethod
     def _delta_stream_output(response) -> Iterator[List[Message]]:
+        content_buffer = StreamBuffer()
+        reasoning_buffer = StreamBuffer()
         for chunk in response:
             if chunk.status_code == HTTPStatus.OK:
                 yield [
                     Message(role=ASSISTANT,
-                            content=chunk.output.choices[0].message.content,
-                            reasoning_content=chunk.output.choices[0].message.reasoning_content,
-                            extra={'model_service_info': chunk})
+                            content=content_buffer.append(chunk.output.choices[0].message.content),
+                            reasoning_content=reasoning_buffer.append(
+                                chunk.output.choices[0].message.get('reasoning_content', '')),
+                            extra={
+                                'model_service_info': chunk,
+                                'content_buffer': content_buffer,
+                                'reasoning_buffer': reasoning_buffer,
+                            })
                 ]
+                log_stream_chunk(chunk, prefix='delta_stream message chunk')
             else:
                 raise ModelServiceError(code=chunk.code, message=chunk.message, extra={'model_service_info': chunk})
 
     @staticmethod
     def _full_stream_output(response) -> Iterator[List[Message]]:
-        full_content = ''
-        full_reasoning_content = ''
+        content_buffer = StreamBuffer()
+        reasoning_buffer = StreamBuffer()
+        last_chunk = None
         for chunk in response:
             if chunk.status_code == HTTPStatus.OK:
+                last_chunk = chunk
                 if chunk.output.choices[0].message.get('reasoning_content', ''):
-                    full_reasoning_content += chunk.output.choices[0].message.reasoning_content
+                    reasoning_buffer.append(chunk.output.choices[0].message.reasoning_content)
                 if chunk.output.choices[0].message.content:
-                    full_content += chunk.output.choices[0].message.content
-                yield [
-                    Message(role=ASSISTANT,
-                            content=full_content,
-                            reasoning_content=full_reasoning_content,
-                            extra={'model_service_info': chunk})
-                ]
+                    content_buffer.append(chunk.output.choices[0].message.content)
+                # Emit a snapshot once the text has grown enough or the last one is too old (see StreamBuffer)
+                if content_buffer.snapshot_due() or reasoning_buffer.snapshot_due():
+                    yield [
+                        Message(role=ASSISTANT,
+                                content=content_buffer.snapshot(),
+                                reasoning_content=reasoning_buffer.snapshot(),
+                                extra={'model_service_info': chunk})
+                    ]
+                log_stream_chunk(chunk)
             else:
                 raise ModelServiceError(code=chunk.code, message=chunk.message, extra={'model_service_info': chunk})
+        if content_buffer.pending or reasoning_buffer.pending or not content_buffer.num_snapshots:
+            yield [
+                Message(role=ASSISTANT,
+                        content=content_buffer.snapshot(),
+                        reasoning_content=reasoning_buffer.snapshot(),
+                        extra={'model_service_info': last_chunk})
+            ]
+        logger.info(f'stream finished: {content_buffer.num_chunks} content chunks ({len(content_buffer)} chars), '
+                    f'{reasoning_buffer.num_chunks} reasoning chunks ({len(reasoning_buffer)} chars)')
 
 
 def initialize_dashscope(cfg: Optional[Dict] = None) -> None:
@@ -0,0 +1,79 @@
+import logging
+import time
+from typing import List
+
+from qwen_agent.log import logger
+
+
+class StreamBuffer:
+    """Accumulates streamed text chunks.
+
+    Appending a chunk is O(1) and `getvalue` only joins when new chunks arrived, but every call still builds a
+    string of the full length. Full-text streams should therefore not call it per chunk: `snapshot_due` says when
+    the text has grown by at least `SNAPSHOT_GROWTH` of its length (and `SNAPSHOT_MIN_CHARS`) since the last
+    snapshot, so the snapshot sizes grow geometrically. To keep long answers streaming smoothly, a snapshot is
+    also due once `SNAPSHOT_MAX_GAP_CHARS` new characters or `SNAPSHOT_MAX_INTERVAL` seconds have passed; the
+    text copied is then at most about n^2 / (2 * SNAPSHOT_MAX_GAP_CHARS), far below one snapshot per chunk.
+    After the stream ends, `pending` says whether a final snapshot is still owed (full-text consumers always
+    get at least one).
+    """
+
+    SNAPSHOT_MIN_CHARS = 64
+    SNAPSHOT_GROWTH = 0.125
+    SNAPSHOT_MAX_GAP_CHARS = 4096
+    SNAPSHOT_MAX_INTERVAL = 0.1
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._num_joined = 0
+        self._length = 0
+        self._snapshot_length = 0
+        self._snapshot_time = time.monotonic()
+        self.last_delta = ''
+        self.num_chunks = 0
+        self.num_snapshots = 0
+
+    def append(self, chunk: str) -> str:
+        self.last_delta = chunk or ''
+        if chunk:
+            self._chunks.append(chunk)
+            self._length += len(chunk)
+            self.num_chunks += 1
+        return self.last_delta
+
+    def getvalue(self) -> str:
+        if self._num_joined != len(self._chunks):
+            # Collapse everything into a single chunk so the next call only joins new chunks
+            self._chunks = [''.join(self._chunks)]
+            self._num_joined = 1
+        return self._chunks[0] if self._chunks else ''
+
+    def snapshot_due(self) -> bool:
+        grown = self._length - self._snapshot_length
+        if grown <= 0:
+            return False
+        gap = min(max(self.SNAPSHOT_MIN_CHARS, self.SNAPSHOT_GROWTH * self._length), self.SNAPSHOT_MAX_GAP_CHARS)
+        return grown >= gap or time.monotonic() - self._snapshot_time >= self.SNAPSHOT_MAX_INTERVAL
+
+    @property
+    def pending(self) -> bool:
+        return self._length != self._snapshot_length
+
+    def snapshot(self) -> str:
+        """The full text, marking it as emitted."""
+        self._snapshot_length = self._length
+        self._snapshot_time = time.monotonic()
+        self.num_snapshots += 1
+        return self.getvalue()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        return self.getvalue()
+
+
+def log_stream_chunk(chunk, prefix: str = 'message chunk') -> None:
+    # Formatting every raw chunk is as expensive as the stream itself, so only do it in debug mode
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f'{prefix}: {chunk}')
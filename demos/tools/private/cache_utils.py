@@ -1,6 +1,11 @@
 import os
 import json
 import fcntl
+import threading
+import time
+from collections import OrderedDict
+
+import json5
 
 
 class JSONLCache:
@@ -55,3 +60,211 @@ class JSONLCache:
         """ 设置缓存值 """
         self.cache[key] = value
 
+
+def _canonicalize(value):
+    """ 规范化参数: 去除字符串多余空白, 递归处理列表和字典 """
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _canonicalize(v) for k, v in value.items()}
+    return value
+
+
+class ToolResultCache:
+    """ 工具调用结果的进程内缓存: 每条记录有独立 TTL, 超出容量按 LRU 淘汰, 线程安全 """
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(tool_name, tool_args):
+        """ 以工具名和规范化后的参数生成缓存键 """
+        if isinstance(tool_args, str):
+            try:
+                tool_args = json5.loads(tool_args)
+            except Exception:
+                return f'{tool_name}:{" ".join(tool_args.split())}'
+        return f'{tool_name}:' + json.dumps(_canonicalize(tool_args), ensure_ascii=False, sort_keys=True)
+
+    def get(self, key, default=None):
+        """ 获取未过期的缓存值 """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        """ 设置缓存值, ttl 为秒数, 不大于 0 时不缓存 """
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# 同一进程内的所有 agent (包括 WebUI 中的多个 agent) 共享同一个工具结果缓存
+tool_result_cache = ToolResultCache()
+
+
+class PersistentResponseCache:
+    """ 跨进程持久化的响应缓存 (JSONL, 只追加写入)
+
+    - 每条记录保存写入时间, 与当前时间处于同一个新鲜度时间段 (bucket_seconds) 时为新鲜结果
+    - 过期记录不删除, 在接口故障且显式允许时可作为旧结果返回
+    - 其他进程追加的记录在下次读取时增量加载; 超出 max_entries 时按 LRU 淘汰, 文件膨胀后压缩重写
+    - 所有文件操作通过独立的锁文件 (fcntl) 串行化
+    """
+
+    def __init__(self, cache_file, max_entries=5000, bucket_seconds=3600):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.bucket_seconds = bucket_seconds
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (written_at, value)
+        self._offset = 0
+        self._file_lines = 0
+        self._file_id = None  # (st_dev, st_ino): 压缩重写 (os.replace) 后会变化
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+        with self._locked(fcntl.LOCK_SH):
+            self._load_new_lines()
+
+    @staticmethod
+    def make_key(*parts, **options):
+        """ 以规范化的位置参数 (小写, 去除多余空白) 和非空选项生成缓存键 """
+        normalized = [' '.join(str(part).lower().split()) for part in parts]
+        options = {k: _canonicalize(v) for k, v in options.items() if v not in (None, '')}
+        return json.dumps([normalized, options], ensure_ascii=False, sort_keys=True)
+
+    def _locked(self, lock_type):
+        return _FileLock(self.cache_file + '.lock', lock_type)
+
+    def _load_new_lines(self):
+        """ 增量读取其他进程追加的记录 (文件被压缩重写后从头读取, 即使新文件不比已读部分短) """
+        try:
+            st = os.stat(self.cache_file)
+        except FileNotFoundError:
+            return
+        file_id = (st.st_dev, st.st_ino)
+        if file_id != self._file_id or st.st_size < self._offset:
+            self._entries.clear()
+            self._offset = self._file_lines = 0
+            self._file_id = file_id
+        if st.st_size == self._offset:
+            return
+        with open(self.cache_file, 'rb') as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # 另一个进程正在写入的行
+                self._offset += len(line)
+                self._file_lines += 1
+                try:
+                    data = json.loads(line)
+                    self._entries[data['key']] = (data['time'], data['value'])
+                    self._entries.move_to_end(data['key'])
+                except (ValueError, KeyError):
+                    continue
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _is_fresh(self, written_at, now):
+        return int(written_at // self.bucket_seconds) == int(now // self.bucket_seconds)
+
+    def get(self, key, allow_stale=False):
+        """ 获取新鲜的缓存值; allow_stale 为 True 时也返回过期的值 (不计入命中/未命中) """
+        with self._lock:
+            with self._locked(fcntl.LOCK_SH):
+                self._load_new_lines()
+            entry = self._entries.get(key)
+            if entry is not None and allow_stale:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return entry[1]
+            if entry is None or not self._is_fresh(entry[0], time.time()):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """ 设置缓存值并追加到缓存文件 """
+        written_at = time.time()
+        line = json.dumps({'key': key, 'time': written_at, 'value': value}, ensure_ascii=False) + '\n'
+        with self._lock, self._locked(fcntl.LOCK_EX):
+            self._load_new_lines()
+            with open(self.cache_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self._entries[key] = (written_at, value)
+            self._entries.move_to_end(key)
+            st = os.stat(self.cache_file)
+            self._file_id = (st.st_dev, st.st_ino)  # 第一次写入时文件才被创建
+            self._offset = st.st_size
+            self._file_lines += 1
+            self._evict()
+            if self._file_lines > 2 * self.max_entries:
+                self._compact()
+
+    def _compact(self):
+        """ 只保留当前的记录重写缓存文件 (调用方已持有排它锁) """
+        tmp_file = f'{self.cache_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for key, (written_at, value) in self._entries.items():
+                f.write(json.dumps({'key': key, 'time': written_at, 'value': value}, ensure_ascii=False) + '\n')
+        os.replace(tmp_file, self.cache_file)
+        st = os.stat(self.cache_file)
+        self._file_id = (st.st_dev, st.st_ino)
+        self._offset = st.st_size
+        self._file_lines = len(self._entries)
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'stale_hits': self.stale_hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _FileLock:
+    """ 基于锁文件的 fcntl 锁 (上下文管理器) """
+
+    def __init__(self, lock_file, lock_type=fcntl.LOCK_EX):
+        self.lock_file = lock_file
+        self.lock_type = lock_type
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.lock_file, 'a')
+        fcntl.flock(self._file, self.lock_type)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
@@ -0,0 +1,203 @@
+"""Shrink a fetched page before it is sent to the extraction LLM.
+
+Jina returns the whole page as markdown: navigation menus, cookie banners, share buttons and related-article
+lists usually outweigh the article itself. `reduce_content` drops those blocks, removes repeated link lines and
+lines repeated far apart on the page, turns links into their anchor text and, if the page is still over the
+token budget, keeps the blocks most related to the visit goal (in page order).
+"""
+import math
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from demos.utils.tokens import count_tokens, truncate_tokens
+
+_IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_LINK = re.compile(r'\[([^\]]*)\]\((?:[^()]|\([^)]*\))*\)')
+_BARE_URL = re.compile(r'https?://\S+')
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+# Jina reader header lines that carry no content
+_JINA_HEADER = re.compile(r'^(?:URL Source:|Markdown Content:|Warning:)', re.IGNORECASE)
+
+# Banners, footers and sharing widgets; a short block is dropped only when these dominate it
+_BOILERPLATE = re.compile(
+    r'cookie|privacy policy|terms of (?:use|service)|all rights reserved|©|subscribe|newsletter|sign in|log in|'
+    r'sign up|follow us|share (?:this|on)|advertisement|skip to (?:main )?content|'
+    r'pol[ií]tica de privacidad|t[ée]rminos y condiciones|derechos reservados|suscr[ií]bete|iniciar sesi[óo]n|'
+    r's[ií]guenos|compartir en|publicidad|aceptar (?:todas|cookies)', re.IGNORECASE)
+_BOILERPLATE_MAX_WORDS = 40
+# A sentence mentioning a boilerplate pattern counts as boilerplate if it starts with it or is this short
+_BOILERPLATE_SENTENCE_WORDS = 8
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+|\n')
+
+# Non-link lines are deduplicated only when they reappear this many blocks later (footers, captions)
+_DEDUP_BLOCK_DISTANCE = 3
+
+_STOPWORDS = frozenset(
+    'the and for with that this from what which who whom when where how are was were been has have had does '
+    'did about into over under their there them they its any all can could should would will find information '
+    'page website webpage content details detail please los las del por para con una uno que como sobre sus '
+    'entre cual cuales cuando donde'.split())
+
+
+@dataclass
+class ReductionStats:
+    tokens_in: int
+    tokens_out: int
+    blocks_in: int
+    blocks_out: int
+    tokens_dropped: int = 0  # Tokens of cleaned blocks left out to meet the budget
+
+
+def goal_terms(goal: str) -> List[str]:
+    return list(dict.fromkeys(word for word in _WORD.findall(goal.lower())
+                              if len(word) >= 3 and word not in _STOPWORDS))
+
+
+def _visible_text(block: str) -> str:
+    text = _IMAGE.sub('', block)
+    text = _LINK.sub(lambda m: m.group(1), text)
+    return _BARE_URL.sub('', text)
+
+
+def _anchor_words(text: str) -> int:
+    return sum(len(_WORD.findall(anchor)) for anchor in _LINK.findall(_IMAGE.sub('', text)))
+
+
+def _is_boilerplate_sentence(sentence: str) -> bool:
+    match = _BOILERPLATE.search(sentence)
+    if match is None:
+        return False
+    starts_with_match = not _WORD.search(sentence[:match.start()])
+    return starts_with_match or len(_WORD.findall(sentence)) <= _BOILERPLATE_SENTENCE_WORDS
+
+
+def _is_boilerplate(block: str, visible: str) -> bool:
+    words = _WORD.findall(visible)
+    if not words:
+        return True
+    # Menus and link lists: mostly anchor text
+    if len(_LINK.findall(_IMAGE.sub('', block))) >= 2 and _anchor_words(block) >= 0.6 * len(words):
+        return True
+    if len(words) > _BOILERPLATE_MAX_WORDS:
+        return False
+    # Banners: most sentences are boilerplate, so one keyword next to real content does not drop it
+    sentences = [sentence for sentence in _SENTENCE_END.split(visible) if _WORD.search(sentence)]
+    return sum(_is_boilerplate_sentence(sentence) for sentence in sentences) > len(sentences) / 2
+
+
+def _is_link_line(line: str, visible_line: str) -> bool:
+    anchor_words = _anchor_words(line)
+    return anchor_words > 0 and anchor_words >= 0.6 * len(_WORD.findall(visible_line))
+
+
+def clean_blocks(content: str) -> Tuple[List[str], int]:
+    """Split the page into blocks without boilerplate or repeated lines. Returns (blocks, number of raw blocks)."""
+    raw_blocks = [block.strip() for block in re.split(r'\n\s*\n', content) if block.strip()]
+    first_seen = {}  # line key -> index of the raw block where it first appeared
+    blocks = []
+    for position, block in enumerate(raw_blocks):
+        lines = [line for line in block.split('\n') if not _JINA_HEADER.match(line.strip())]
+        block = '\n'.join(lines)
+        visible = _visible_text(block)
+        if _is_boilerplate(block, visible):
+            continue
+        kept_lines = []
+        for line in lines:
+            visible_line = _visible_text(line)
+            key = ' '.join(visible_line.lower().split())
+            if not key or key.strip('-=*#|_ ') == '':
+                continue
+            # Repeated links ("read more", menus rendered twice) are kept once; other lines only when they
+            # reappear far away (footers, captions), so table rows and nearby repeats survive
+            seen_at = first_seen.setdefault(key, position)
+            if seen_at < position and len(key) > 3 and (
+                    _is_link_line(line, visible_line)
+                    or (position - seen_at >= _DEDUP_BLOCK_DISTANCE and not key.startswith('|'))):
+                continue
+            kept_lines.append(visible_line.rstrip())
+        if kept_lines:
+            blocks.append('\n'.join(kept_lines))
+    return blocks, len(raw_blocks)
+
+
+def _block_score(block: str, terms: List[str], position: int, num_tokens: int) -> float:
+    text = block.lower()
+    matched = sum(1 for term in terms if term in text)
+    # Relevance density, with a small bonus for the title and lead paragraphs
+    lead_bonus = 0.5 if position < 3 else 0.0
+    return (matched + lead_bonus) / math.log2(2 + num_tokens)
+
+
+def reduce_content(content: str, goal: str, max_tokens: int) -> Tuple[str, ReductionStats]:
+    """Content to send to the extractor, under `max_tokens` tokens, and the reduction stats."""
+    tokens_in = count_tokens(content)
+    blocks, blocks_in = clean_blocks(content)
+    block_tokens = [count_tokens(block) for block in blocks]
+    total_tokens = sum(block_tokens)
+    tokens_dropped = 0
+
+    if total_tokens + len(blocks) > max_tokens:
+        terms = goal_terms(goal)
+        ranked = sorted(range(len(blocks)),
+                        key=lambda i: _block_score(blocks[i], terms, i, block_tokens[i]), reverse=True)
+        selected, budget = set(), max_tokens
+        for i in ranked:
+            if block_tokens[i] + 1 <= budget:
+                selected.add(i)
+                budget -= block_tokens[i] + 1
+        if not selected and blocks:
+            # A single block larger than the budget
+            best = ranked[0]
+            blocks[best] = truncate_tokens(blocks[best], max_tokens)
+            block_tokens[best] = max_tokens
+            selected.add(best)
+        tokens_dropped = total_tokens - sum(block_tokens[i] for i in selected)
+        blocks = [blocks[i] for i in sorted(selected)]
+
+    reduced = '\n\n'.join(blocks)
+    return reduced, ReductionStats(tokens_in=tokens_in, tokens_out=count_tokens(reduced),
+                                   blocks_in=blocks_in, blocks_out=len(blocks), tokens_dropped=tokens_dropped)
+
+
+def _prefix_within(text: str, max_tokens: int) -> int:
+    """Length of the longest prefix of `text` within `max_tokens` tokens, ending after whitespace when possible."""
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return len(text)
+    # Start from the average characters per token and shrink until the prefix fits
+    end = max(1, len(text) * max_tokens // total)
+    while end > 1 and count_tokens(text[:end]) > max_tokens:
+        end -= max(1, end // 10)
+    space = max(text.rfind(' ', 0, end), text.rfind('\n', 0, end))
+    if space >= end // 2:
+        end = space + 1
+    return end
+
+
+def split_chunks(text: str, max_tokens: int) -> List[str]:
+    """
+    Split text into consecutive chunks of at most `max_tokens` tokens, cutting between blocks when possible.
+
+    Chunks are cut on character offsets, so ''.join(chunks) == text.
+    """
+    pieces = []
+    # Each block keeps its trailing blank line(s)
+    for block in re.split(r'(?<=\n\n)(?!\n)', text):
+        while block:
+            end = _prefix_within(block, max_tokens)
+            pieces.append(block[:end])
+            block = block[end:]
+
+    chunks, current, current_tokens = [], '', 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece) + 1
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = '', 0
+        current += piece
+        current_tokens += piece_tokens
+    if current:
+        chunks.append(current)
+    return chunks
@@ -1,11 +1,50 @@
 import os
 import json
+import threading
 import requests
 from typing import List
 from qwen_agent.tools.base import BaseTool, register_tool
 from concurrent.futures import ThreadPoolExecutor
-MAX_MULTIQUERY_NUM = os.getenv("MAX_MULTIQUERY_NUM", 3)
+from qwen_agent.log import logger
+from demos.tools.private.cache_utils import PersistentResponseCache
+MAX_MULTIQUERY_NUM = int(os.getenv("MAX_MULTIQUERY_NUM", 3))
 GOOGLE_SEARCH_KEY = os.getenv("GOOGLE_SEARCH_KEY")
+# Persistent response cache shared by every process using the same file ("" disables it)
+SEARCH_CACHE_FILE = os.getenv("SEARCH_CACHE_FILE", os.path.expanduser("~/.cache/webdancer/search_cache.jsonl"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 5000))
+# Cached results are reused until the clock enters the next bucket of this many seconds
+SEARCH_CACHE_BUCKET_SECONDS = int(os.getenv("SEARCH_CACHE_BUCKET_SECONDS", 3600))
+# Serve expired cached results when the search API is down
+SEARCH_CACHE_ALLOW_STALE = os.getenv("SEARCH_CACHE_ALLOW_STALE", "0").strip().lower() in ("1", "true")
+
+_search_caches = {}
+
+
+def get_search_cache(cache_file: str = SEARCH_CACHE_FILE, max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+                     bucket_seconds: int = SEARCH_CACHE_BUCKET_SECONDS):
+    """The process-wide cache for `cache_file` (None when caching is disabled)."""
+    if not cache_file:
+        return None
+    if cache_file not in _search_caches:
+        _search_caches[cache_file] = PersistentResponseCache(cache_file, max_entries, bucket_seconds)
+    return _search_caches[cache_file]
+
+
+# Serper endpoint and the key holding the result list, per search type
+SERPER_ENDPOINTS = {
+    "search": ("https://google.serper.dev/search", "organic"),
+    "news": ("https://google.serper.dev/news", "news"),
+}
+
+
+def time_range_tbs(days_back: int) -> str:
+    """Google `tbs` time filter covering the last `days_back` days (qdr:d, qdr:w, qdr:m, qdr:y or qdr:dN)."""
+    days_back = int(days_back)
+    if days_back <= 1:
+        return "qdr:d"
+    named = {7: "qdr:w", 30: "qdr:m", 31: "qdr:m", 365: "qdr:y", 366: "qdr:y"}
+    return named.get(days_back, f"qdr:d{days_back}")
+
 
 @register_tool("search", allow_overwrite=True)
 class Search(BaseTool):
@@ -21,29 +60,79 @@ class Search(BaseTool):
                     },
                     "description": "Array of query strings. Include multiple complementary search queries in a single call."
                 },
+                "type": {
+                    "type": "string",
+                    "enum": ["search", "news"],
+                    "description": "Search vertical: 'search' for web results (default) or 'news' for news articles."
+                },
+                "days_back": {
+                    "type": "integer",
+                    "description": "Only return results published within the last N days."
+                },
+                "gl": {
+                    "type": "string",
+                    "description": "Two-letter country code to search from, e.g. 'co' or 'mx'."
+                },
+                "hl": {
+                    "type": "string",
+                    "description": "Interface language of the results, e.g. 'es' or 'en'."
+                },
+                "num": {
+                    "type": "integer",
+                    "description": "Number of results per query (default 10, max 100)."
+                },
+                "page": {
+                    "type": "integer",
+                    "description": "Result page to return, starting at 1 (pages hold 'num' results each)."
+                },
             },
         "required": ["query"],
     }
 
+    def __init__(self, cfg: dict = None):
+        super().__init__(cfg)
+        # cfg: cache_file, cache_max_entries, cache_bucket_seconds, allow_stale (default: environment)
+        self.cache = get_search_cache(self.cfg.get("cache_file", SEARCH_CACHE_FILE),
+                                      self.cfg.get("cache_max_entries", SEARCH_CACHE_MAX_ENTRIES),
+                                      self.cfg.get("cache_bucket_seconds", SEARCH_CACHE_BUCKET_SECONDS))
+        self.allow_stale = self.cfg.get("allow_stale", SEARCH_CACHE_ALLOW_STALE)
+        # Result pages fetched from the Serper API and pages served from the cache
+        self.request_stats = {"api_requests": 0, "cache_hits": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.request_stats[name] += 1
+
     def call(self, params: str, **kwargs) -> str:
         assert GOOGLE_SEARCH_KEY, "Please set the GOOGLE_SEARCH_KEY environment variable."
         try:
             params = self._verify_json_format_args(params)
             query = params["query"][:MAX_MULTIQUERY_NUM]
+            options = self._search_options(params)
         except:
             return "[Search] Invalid request format: Input must be a JSON object containing 'query' field"
 
         if isinstance(query, str):
-            response = self.google_search(query)
+            response = self.google_search(query, **options)
         else:
             assert isinstance(query, List)
             with ThreadPoolExecutor(max_workers=3) as executor:
-                response = list(executor.map(self.google_search, query))
+                response = list(executor.map(lambda q: self.google_search(q, **options), query))
             response = "\n=======\n".join(response)
         return response
 
-    def google_search(self, query: str) -> str:
-        url = 'https://google.serper.dev/search'
+    def _search_options(self, params: dict) -> dict:
+        """Structured options from the call, falling back to the tool cfg (e.g. Search({'type': 'news', 'hl': 'es'}))."""
+        options = {key: params.get(key, self.cfg.get(key)) for key in ("type", "days_back", "gl", "hl", "num", "page")}
+        options["search_type"] = options.pop("type") or "search"
+        if options["search_type"] not in SERPER_ENDPOINTS:
+            raise ValueError(f"Unknown search type: {options['search_type']}")
+        return options
+
+    def google_search(self, query: str, search_type: str = "search", days_back: int = None,
+                      gl: str = None, hl: str = None, num: int = None, page: int = None) -> str:
+        url, results_key = SERPER_ENDPOINTS[search_type]
         headers = {
             'X-API-KEY': GOOGLE_SEARCH_KEY,
             'Content-Type': 'application/json',
@@ -51,27 +140,55 @@ class Search(BaseTool):
         data = {
             "q": query,
         }
+        if days_back:
+            data["tbs"] = time_range_tbs(days_back)
+        if gl:
+            data["gl"] = gl.lower()
+        if hl:
+            data["hl"] = hl.lower()
+        if num:
+            data["num"] = max(1, min(int(num), 100))
+        if page and int(page) > 1:
+            data["page"] = int(page)
+
+        cache_key = None
+        results = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(query, type=search_type, **{k: v for k, v in data.items() if k != "q"})
+            results = self.cache.get(cache_key)
+            if results is not None:
+                self._count("cache_hits")
 
-        for i in range(5):
-            try:
-                response = requests.post(url, headers=headers, data=json.dumps(data))
-                results = response.json()
-                break
-            except Exception as e:
-                if i == 4:
-                    return f"Google search Timeout, return None, Please try again later."
-                continue
-    
-        if response.status_code != 200:
-            raise Exception(f"Error: {response.status_code} - {response.text}")
+        if results is None:
+            self._count("api_requests")
+            for i in range(5):
+                try:
+                    response = requests.post(url, headers=headers, data=json.dumps(data))
+                    results = response.json()
+                    break
+                except Exception as e:
+                    if i == 4:
+                        results = self._stale_results(cache_key, query, e)
+                        if results is None:
+                            return f"Google search Timeout, return None, Please try again later."
+                        response = None
+                    continue
+
+            if response is not None and response.status_code != 200:
+                results = self._stale_results(cache_key, query, f"{response.status_code} - {response.text}")
+                if results is None:
+                    raise Exception(f"Error: {response.status_code} - {response.text}")
+            elif response is not None and cache_key is not None and results.get(results_key):
+                # Only the result list is kept, the rest of the response is not used
+                self.cache.set(cache_key, {results_key: results[results_key]})
 
         try:
-            if "organic" not in results:
+            if not results.get(results_key):
                 raise Exception(f"No results found for query: '{query}'. Use a less specific query.")
             
             web_snippets = list()
             idx = 0
-            for page in results["organic"]:
+            for page in results[results_key]:
                 idx += 1
                 date_published = ""
                 if "date" in page:
@@ -90,10 +207,20 @@ class Search(BaseTool):
                 redacted_version = redacted_version.replace("Your browser can't play this video.", "")
                 web_snippets.append(redacted_version)
 
-            content = f"A Google search for '{query}' found {len(web_snippets)} results:\n\n## Web Results\n" + "\n\n".join(web_snippets)
+            heading = "News Results" if search_type == "news" else "Web Results"
+            content = f"A Google search for '{query}' found {len(web_snippets)} results:\n\n## {heading}\n" + "\n\n".join(web_snippets)
             return content
         except Exception as e:
             return str(e) + f"No results found for '{query}'. Try with a more general query."
 
+    def _stale_results(self, cache_key, query: str, error):
+        """Expired cached results for the query, when the search API failed and stale results are allowed."""
+        if cache_key is None or not self.allow_stale:
+            return None
+        stale = self.cache.get(cache_key, allow_stale=True)
+        if stale is not None:
+            logger.warning(f"Search API unavailable ({error}), serving cached results for '{query}'")
+        return stale
+
 if __name__ == "__main__":
     print(Search().call({"query": ["tongyi lab"]}))
@@ -1,14 +1,24 @@
 import os
 import json
+import threading
 import requests
 from openai import OpenAI
 from qwen_agent.tools.base import BaseTool, register_tool
-from typing import List
+from typing import List, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from qwen_agent.log import logger
+from demos.tools.private.content_reducer import ReductionStats, reduce_content, split_chunks
+from demos.utils.tokens import count_tokens, truncate_tokens
 
-MAX_MULTIQUERY_NUM = os.getenv("MAX_MULTIQUERY_NUM", 3)
+MAX_MULTIQUERY_NUM = int(os.getenv("MAX_MULTIQUERY_NUM", 3))
 JINA_API_KEY = os.getenv("JINA_API_KEY")
 DASHSCOPE_KEY = os.getenv('DASHSCOPE_API_KEY')
+# Token budget of the page content sent to the extraction LLM
+VISIT_MAX_CONTENT_TOKENS = int(os.getenv("VISIT_MAX_CONTENT_TOKENS", 12000))
+# Longer pages are split into chunks of that size, extracted in parallel and merged (map-reduce).
+# Only pages over this safety cap lose their passages least related to the goal, which the tool output reports.
+VISIT_MAP_REDUCE_TOKENS = int(os.getenv("VISIT_MAP_REDUCE_TOKENS", 200000))
+VISIT_CHUNK_WORKERS = int(os.getenv("VISIT_CHUNK_WORKERS", 4))
 
 extractor_prompt = """Please process the following webpage content and user goal to extract relevant information:
 
@@ -24,6 +34,28 @@ extractor_prompt = """Please process the following webpage content and user goal
 3. **Summary Output**: Organize into a concise paragraph with logical flow, prioritizing clarity and judge the contribution of the information to the goal.
 
 
+**Final Output Format using JSON format**:
+{{
+  "rational": "string",
+  "evidence": "string",
+  "summary": "string",
+}}
+"""
+
+reducer_prompt = """The webpage below was too long to read at once, so it was split into {num_parts} consecutive parts and the relevant information was extracted from each part separately. Merge these partial extractions into one answer for the user goal.
+
+## **Partial Extractions**
+{partial_extractions}
+
+## **User Goal**
+{goal}
+
+## **Task Guidelines**
+1. **Merge Evidence**: Keep every piece of evidence that contributes to the goal, remove duplicates, and preserve the page order.
+2. **Resolve Conflicts**: If parts disagree, keep both facts and say which part each one comes from.
+3. **Summary Output**: Write one concise paragraph with logical flow that answers the goal using all parts.
+
+
 **Final Output Format using JSON format**:
 {{
   "rational": "string",
@@ -91,6 +123,14 @@ class Visit(BaseTool):
     "required": ["url", "goal"]
   }
 
+    def __init__(self, cfg: dict = None):
+        super().__init__(cfg)
+        self.max_content_tokens = self.cfg.get("max_content_tokens", VISIT_MAX_CONTENT_TOKENS)
+        self.map_reduce_tokens = max(self.cfg.get("map_reduce_tokens", VISIT_MAP_REDUCE_TOKENS), self.max_content_tokens)
+        self.chunk_workers = self.cfg.get("chunk_workers", VISIT_CHUNK_WORKERS)
+        self.token_stats = {"pages": 0, "tokens_in": 0, "tokens_sent": 0}
+        self._stats_lock = threading.Lock()
+
     # The `call` method is the main function of the tool.
     def call(self, params: str, **kwargs) -> str:
         try:
@@ -128,6 +168,91 @@ class Visit(BaseTool):
         return ""
 
 
+    def reduce_page(self, url: str, content: str, goal: str) -> Tuple[str, ReductionStats]:
+        """Strip boilerplate; pages over the map-reduce cap keep only their passages most related to the goal."""
+        reduced, stats = reduce_content(content, goal, self.map_reduce_tokens)
+        with self._stats_lock:
+            self.token_stats["pages"] += 1
+            self.token_stats["tokens_in"] += stats.tokens_in
+            self.token_stats["tokens_sent"] += stats.tokens_out
+        logger.info(f"visit {url}: {stats.tokens_in} page tokens, {stats.tokens_out} sent "
+                    f"({stats.blocks_out}/{stats.blocks_in} blocks)")
+        if stats.tokens_dropped:
+            logger.warning(f"visit {url}: {stats.tokens_dropped} tokens least related to the goal were left out "
+                           f"(cap of {self.map_reduce_tokens} tokens)")
+        return reduced, stats
+
+    def _extract_json(self, prompt: str):
+        """One extractor call; the parsed JSON dict, or None if the model did not return valid JSON twice."""
+        messages = [{"role": "user", "content": prompt}]
+        for _ in range(2):
+            raw = self.llm(messages).replace("```json\n", "").replace("\n```", "").strip()
+            try:
+                result = json.loads(raw)
+                if isinstance(result, dict):
+                    return result
+            except Exception as e:
+                print("[visit] Failed to parse json:", e)
+        return None
+
+    def _extract_chunk(self, chunk: str, goal: str):
+        try:
+            return self._extract_json(extractor_prompt.format(webpage_content=chunk, goal=goal))
+        except Exception as e:
+            logger.warning(f"visit chunk extraction failed: {e}")
+            return None
+
+    def _format_parts(self, parts: List[dict]) -> str:
+        """Partial extractions for the merge prompt, trimmed so they stay within `max_content_tokens` tokens."""
+        text = json.dumps(parts, ensure_ascii=False, indent=1)
+        if count_tokens(text) <= self.max_content_tokens:
+            return text
+        # Even share per part, leaving room for the JSON keys and escaping
+        share = self.max_content_tokens // len(parts) - 32
+        fitted = []
+        for part in parts:
+            summary = truncate_tokens(part["summary"], share // 4)
+            evidence = truncate_tokens(part["evidence"], max(share - count_tokens(summary), 0))
+            fitted.append({**part, "evidence": evidence, "summary": summary})
+        return json.dumps(fitted, ensure_ascii=False, indent=1)
+
+    def extract(self, content: str, goal: str):
+        """
+        Extract the goal-related evidence and summary of a page.
+
+        Content over the token budget is split into chunks that are extracted concurrently (map, at most
+        `chunk_workers` at a time) and merged by a final call (reduce), so no part of `content` is skipped.
+        """
+        chunks = split_chunks(content, self.max_content_tokens)
+        if len(chunks) <= 1:
+            return self._extract_json(extractor_prompt.format(webpage_content=content, goal=goal))
+
+        with ThreadPoolExecutor(max_workers=min(self.chunk_workers, len(chunks))) as executor:
+            partials = list(executor.map(lambda chunk: self._extract_chunk(chunk, goal), chunks))
+
+        parts = []
+        for i, partial in enumerate(partials, 1):
+            if partial is None:
+                parts.append({"part": i, "evidence": "This part could not be processed.", "summary": ""})
+            else:
+                parts.append({"part": i, "evidence": partial.get("evidence", ""), "summary": partial.get("summary", "")})
+        failed = [part["part"] for part in parts if partials[part["part"] - 1] is None]
+        if len(failed) == len(parts):
+            return None
+
+        merged = self._extract_json(reducer_prompt.format(
+            num_parts=len(chunks), partial_extractions=self._format_parts(parts), goal=goal))
+        if merged is None:
+            # Keep every part's findings rather than losing them to a failed merge
+            merged = {
+                "evidence": "\n\n".join(f"[Part {part['part']}] {part['evidence']}" for part in parts),
+                "summary": "\n\n".join(f"[Part {part['part']}] {part['summary']}" for part in parts if part["summary"]),
+            }
+        if failed:
+            merged["summary"] = merged.get("summary", "") + \
+                f"\n(The page was read in {len(parts)} parts; part(s) {', '.join(map(str, failed))} could not be processed.)"
+        return merged
+
     def readpage(self, url: str, goal: str) -> str:
         """
         Attempt to read webpage content by alternating between jina and aidata services.
@@ -143,23 +268,19 @@ class Visit(BaseTool):
         for attempt in range(max_attempts):
             content = jina_readpage(url)
             if content and not content.startswith("[visit] Failed to read page.") and content != "[visit] Empty content." and not content.startswith("[document_parser]"):
-                messages = [{"role":"user","content": extractor_prompt.format(webpage_content=content, goal=goal)}]
-                raw = self.llm(messages).replace("```json\n", "").replace("\n```", "").strip()
-                parse_retry_times = 0
-                try:
-                    rawjson = json.loads(raw)
+                content, stats = self.reduce_page(url, content, goal)
+                rawjson = self.extract(content, goal)
+                if rawjson is not None:
                     useful_information = "The useful information in {url} for user goal {goal} as follows: \n\n".format(url=url, goal=goal)
-                    useful_information += "Evidence in page: \n" + rawjson.get("evidence", "The provided webpage content is not in json.") + "\n\n"
-                    useful_information += "Summary: \n" + rawjson.get("summary", "The webpage content is not processed in json") + "\n\n"
+                    useful_information += "Evidence in page: \n" + str(rawjson.get("evidence", "The provided webpage content is not in json.")) + "\n\n"
+                    useful_information += "Summary: \n" + str(rawjson.get("summary", "The webpage content is not processed in json")) + "\n\n"
+                    if stats.tokens_dropped:
+                        useful_information += (f"Note: the page is longer than {self.map_reduce_tokens} tokens, so "
+                                               f"{stats.tokens_dropped} tokens least related to the goal were not read.\n\n")
                     if useful_information != "":
                         print("useful_information:",useful_information)
                         return useful_information
-                except Exception as e:
-                    print("[visit] Failed to parse json:", e)
-                    raw = self.llm(messages).replace("```json\n", "").replace("\n```", "")
-                    parse_retry_times += 1
 
-                
             # If we're on the last attempt, return the last result
             if attempt == max_attempts - 1:
                 useful_information = "The useful information in {url} for user goal {goal} as follows: \n\n".format(url=url, goal=goal)
@@ -0,0 +1,32 @@
+# coding=utf-8
+"""Token counting helpers.
+
+Uses tiktoken with the Qwen BPE vocabulary shipped with qwen_agent, so counts match the
+QwQ/Qwen models served behind the agents without downloading any encoding at runtime.
+"""
+from typing import List
+
+from qwen_agent.utils.tokenization_qwen import tokenizer
+
+_encoding = tokenizer.tokenizer
+
+
+def encode(text: str) -> List[int]:
+    return _encoding.encode(text, disallowed_special=())
+
+
+def decode(tokens: List[int]) -> str:
+    return _encoding.decode(tokens, errors='ignore')
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return len(encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    tokens = encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return decode(tokens[:max_tokens])
@@ -0,0 +1,145 @@
+"""
+Motor de agregación de resultados.
+Calcula en una sola pasada todas las estadísticas de las noticias procesadas
+(relevancia, país, droga, medio, subregión, semana y tamaño de grupos duplicados).
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import urlparse
+
+from .dates import parse_publication_date
+
+
+CARIBE_COUNTRIES = frozenset([
+    "Cuba", "República Dominicana", "Jamaica", "Trinidad y Tobago",
+    "Barbados", "Granada", "Santa Lucía", "Dominica"
+])
+
+CENTRAL_AMERICA_COUNTRIES = frozenset([
+    "Guatemala", "Belice", "El Salvador", "Honduras",
+    "Nicaragua", "Costa Rica", "Panamá"
+])
+
+RELEVANCE_LEVELS = ('Alta', 'Media', 'Baja')
+
+NO_COUNTRY = "Sin especificar"
+NO_DATE = "Sin fecha"
+
+
+def determine_subregion(country: str) -> str:
+    """Determina la subregión basada en el país"""
+
+    if not country:
+        return "Sin especificar"
+    if country in CARIBE_COUNTRIES:
+        return "Caribe"
+    if country in CENTRAL_AMERICA_COUNTRIES:
+        return "America Central"
+    return "America del Sur"
+
+
+class NewsAggregator:
+    """
+    Acumulador incremental de estadísticas sobre noticias procesadas
+
+    Cada noticia se cuenta en todas las facetas con una sola llamada a add(),
+    así que puede alimentarse mientras llegan los resultados y compartirse
+    entre el reporte, la CLI y cualquier otro consumidor.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.relevance = Counter({level: 0 for level in RELEVANCE_LEVELS})
+        self.countries = Counter()
+        self.drugs = Counter()
+        self.sources = Counter()
+        self.subregions = Counter()
+        self.weeks = Counter()
+        self.duplicate_group_sizes = Counter()
+        self._week_cache: Dict[str, str] = {}
+        # Las fechas relativas ("2 days ago") se resuelven respecto a la creación del agregador
+        self._reference = datetime.now()
+
+    @classmethod
+    def from_results(cls, results) -> "NewsAggregator":
+        """Agrega unos SearchResults completos (noticias y grupos duplicados)"""
+
+        aggregator = cls()
+        aggregator.add_all(results.processed_news)
+        for group in results.duplicate_groups:
+            aggregator.add_duplicate_group(group)
+        return aggregator
+
+    def add(self, news) -> None:
+        """Cuenta una noticia procesada en todas las facetas"""
+
+        article = news.article
+        country = news.location_info.country or NO_COUNTRY
+
+        self.total += 1
+        self.relevance[news.relevance.level] += 1
+        self.countries[country] += 1
+        self.drugs.update(news.relevance.drug_mentions)
+        self.sources[self._source_domain(article.url, article.source)] += 1
+        self.subregions[determine_subregion(news.location_info.country)] += 1
+        self.weeks[self._iso_week(article.date)] += 1
+
+    def add_all(self, processed_news: Iterable) -> "NewsAggregator":
+        """Cuenta todas las noticias de un iterable (puede ser un generador)"""
+
+        for news in processed_news:
+            self.add(news)
+        return self
+
+    def add_duplicate_group(self, group) -> None:
+        """Cuenta un grupo de duplicados por su tamaño (principal + duplicados)"""
+
+        self.duplicate_group_sizes[1 + len(group.duplicates)] += 1
+
+    def top(self, facet: str, n: int = 5) -> List[Tuple[str, int]]:
+        """Los n valores más frecuentes de una faceta ('countries', 'drugs', ...)"""
+
+        return getattr(self, facet).most_common(n)
+
+    def percentage(self, count: int) -> float:
+        """Porcentaje de count sobre el total de noticias"""
+
+        return (count / self.total) * 100 if self.total else 0.0
+
+    def to_dict(self) -> Dict:
+        """Todas las facetas como diccionarios simples (p. ej. para JSON o un dashboard)"""
+
+        return {
+            'total': self.total,
+            'relevance': dict(self.relevance),
+            'countries': dict(self.countries.most_common()),
+            'drugs': dict(self.drugs.most_common()),
+            'sources': dict(self.sources.most_common()),
+            'subregions': dict(self.subregions.most_common()),
+            'weeks': dict(sorted(self.weeks.items())),
+            'duplicate_group_sizes': dict(sorted(self.duplicate_group_sizes.items())),
+        }
+
+    @staticmethod
+    def _source_domain(url: str, source: str) -> str:
+        """Dominio del medio, sin 'www.'"""
+
+        domain = urlparse(url).netloc.lower() if url else ""
+        if domain.startswith("www."):
+            domain = domain[4:]
+        return domain or source or "unknown"
+
+    def _iso_week(self, date_str: str) -> str:
+        """Semana ISO (AAAA-Www) de una fecha de publicación (dd/mm/aaaa, "Aug 4, 2025", "2 days ago"...)"""
+
+        week = self._week_cache.get(date_str)
+        if week is None:
+            published = parse_publication_date(date_str, self._reference)
+            if published is None:
+                week = NO_DATE
+            else:
+                year, week_number, _ = published.isocalendar()
+                week = f"{year}-W{week_number:02d}"
+            self._week_cache[date_str] = week
+        return week
@@ -0,0 +1,83 @@
+"""
+Checkpoints por etapa para búsquedas largas.
+Guarda los resultados intermedios de cada etapa del agente (pickle comprimido
+con gzip) para poder reanudar una ejecución desde la última etapa completada.
+"""
+import gzip
+import json
+import os
+import pickle
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+# Etapas del pipeline de search_drug_news, en orden
+STAGES = ('search', 'canonicalize', 'filter', 'enrich', 'llm', 'classify', 'deduplicate', 'locations', 'geocode',
+          'query_yield')
+
+META_FILE = 'run.json'
+
+
+class CheckpointStore:
+    """Almacén de checkpoints de una ejecución (un directorio por run_id)"""
+
+    def __init__(self, checkpoint_dir: str, run_id: Optional[str] = None):
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.run_dir = os.path.join(checkpoint_dir, self.run_id)
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.meta = self._load_meta()
+
+    @classmethod
+    def resume(cls, checkpoint_dir: str, run_id: str) -> "CheckpointStore":
+        """Abre una ejecución existente (error si no hay checkpoints)"""
+        if not os.path.exists(os.path.join(checkpoint_dir, run_id, META_FILE)):
+            raise FileNotFoundError(f"No hay checkpoints para la ejecución '{run_id}' en {checkpoint_dir}")
+        return cls(checkpoint_dir, run_id)
+
+    def _load_meta(self) -> Dict:
+        meta_path = os.path.join(self.run_dir, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'run_id': self.run_id, 'created_at': datetime.now().isoformat(timespec='seconds'),
+                'params': {}, 'completed_stages': []}
+
+    def _save_meta(self) -> None:
+        meta_path = os.path.join(self.run_dir, META_FILE)
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, meta_path)
+
+    @property
+    def params(self) -> Dict:
+        """Parámetros con los que se inició la ejecución"""
+        return self.meta['params']
+
+    def set_params(self, **params) -> None:
+        self.meta['params'] = params
+        self._save_meta()
+
+    @property
+    def last_completed_stage(self) -> Optional[str]:
+        completed = self.meta['completed_stages']
+        return completed[-1] if completed else None
+
+    def has(self, stage: str) -> bool:
+        return stage in self.meta['completed_stages']
+
+    def save(self, stage: str, data: Any) -> None:
+        """Guarda el resultado de una etapa y la marca como completada"""
+        path = os.path.join(self.run_dir, f"{stage}.pkl.gz")
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        if stage not in self.meta['completed_stages']:
+            self.meta['completed_stages'].append(stage)
+        self.meta['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        self._save_meta()
+
+    def load(self, stage: str) -> Any:
+        with gzip.open(os.path.join(self.run_dir, f"{stage}.pkl.gz"), 'rb') as f:
+            return pickle.load(f)
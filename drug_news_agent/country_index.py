@@ -0,0 +1,250 @@
+"""
+Índice de menciones de países objetivo.
+Compila en una sola expresión regular los nombres oficiales, nombres cortos,
+variantes sin tilde, gentilicios y códigos ISO alpha-3 de los países objetivo,
+para encontrar el país mencionado en un texto con una sola pasada.
+"""
+import argparse
+import random
+import re
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+
+# alpha-2: (alpha-3, nombres y nombres cortos, gentilicios)
+TARGET_COUNTRY_ALIASES = {
+    # América del Sur
+    'AR': ('ARG', ['Argentina', 'República Argentina'], ['argentino', 'argentina', 'argentinos', 'argentinas']),
+    'BO': ('BOL', ['Bolivia', 'Estado Plurinacional de Bolivia'], ['boliviano', 'boliviana', 'bolivianos', 'bolivianas']),
+    'BR': ('BRA', ['Brasil', 'Brazil', 'República Federativa del Brasil'], ['brasileño', 'brasileña', 'brasileños', 'brasileñas', 'brasilero', 'brasilera']),
+    'CL': ('CHL', ['Chile', 'República de Chile'], ['chileno', 'chilena', 'chilenos', 'chilenas']),
+    'CO': ('COL', ['Colombia', 'República de Colombia'], ['colombiano', 'colombiana', 'colombianos', 'colombianas']),
+    'EC': ('ECU', ['Ecuador', 'República del Ecuador'], ['ecuatoriano', 'ecuatoriana', 'ecuatorianos', 'ecuatorianas']),
+    'GY': ('GUY', ['Guyana', 'República Cooperativa de Guyana'], ['guyanés', 'guyanesa', 'guyaneses']),
+    'PY': ('PRY', ['Paraguay', 'República del Paraguay'], ['paraguayo', 'paraguaya', 'paraguayos', 'paraguayas']),
+    'PE': ('PER', ['Perú', 'Peru', 'República del Perú'], ['peruano', 'peruana', 'peruanos', 'peruanas']),
+    'SR': ('SUR', ['Surinam', 'Suriname', 'República de Surinam'], ['surinamés', 'surinamesa', 'surinameses']),
+    'UY': ('URY', ['Uruguay', 'República Oriental del Uruguay'], ['uruguayo', 'uruguaya', 'uruguayos', 'uruguayas']),
+    'VE': ('VEN', ['Venezuela', 'República Bolivariana de Venezuela'], ['venezolano', 'venezolana', 'venezolanos', 'venezolanas']),
+    # América Central y México
+    'BZ': ('BLZ', ['Belice', 'Belize'], ['beliceño', 'beliceña', 'beliceños']),
+    'CR': ('CRI', ['Costa Rica', 'República de Costa Rica'], ['costarricense', 'costarricenses']),
+    'SV': ('SLV', ['El Salvador', 'República de El Salvador'], ['salvadoreño', 'salvadoreña', 'salvadoreños', 'salvadoreñas']),
+    'GT': ('GTM', ['Guatemala', 'República de Guatemala'], ['guatemalteco', 'guatemalteca', 'guatemaltecos', 'guatemaltecas']),
+    'HN': ('HND', ['Honduras', 'República de Honduras'], ['hondureño', 'hondureña', 'hondureños', 'hondureñas']),
+    'NI': ('NIC', ['Nicaragua', 'República de Nicaragua'], ['nicaragüense', 'nicaragüenses']),
+    'PA': ('PAN', ['Panamá', 'Panama', 'República de Panamá'], ['panameño', 'panameña', 'panameños', 'panameñas']),
+    'MX': ('MEX', ['México', 'Mexico', 'Estados Unidos Mexicanos'], ['mexicano', 'mexicana', 'mexicanos', 'mexicanas']),
+    # Caribe
+    'AG': ('ATG', ['Antigua y Barbuda', 'Antigua and Barbuda'], ['antiguano', 'antiguana']),
+    'BS': ('BHS', ['Bahamas', 'Las Bahamas', 'Commonwealth de las Bahamas'], ['bahameño', 'bahameña', 'bahameños']),
+    'BB': ('BRB', ['Barbados'], ['barbadense', 'barbadenses']),
+    'CU': ('CUB', ['Cuba', 'República de Cuba'], ['cubano', 'cubana', 'cubanos', 'cubanas']),
+    'DM': ('DMA', ['Dominica', 'Mancomunidad de Dominica'], ['dominiqués', 'dominiquesa']),
+    'GD': ('GRD', ['Grenada'], []),
+    'HT': ('HTI', ['Haití', 'Haiti', 'República de Haití'], ['haitiano', 'haitiana', 'haitianos', 'haitianas']),
+    'JM': ('JAM', ['Jamaica'], ['jamaiquino', 'jamaiquina', 'jamaicano', 'jamaicana', 'jamaiquinos']),
+    'DO': ('DOM', ['República Dominicana', 'Dominican Republic'], ['dominicano', 'dominicana', 'dominicanos', 'dominicanas']),
+    'KN': ('KNA', ['San Cristóbal y Nieves', 'Saint Kitts and Nevis'], ['sancristobaleño', 'sancristobaleña']),
+    'LC': ('LCA', ['Santa Lucía', 'Saint Lucia'], ['santalucense', 'santalucenses']),
+    'VC': ('VCT', ['San Vicente y las Granadinas', 'Saint Vincent and the Grenadines'], ['sanvicentino', 'sanvicentina']),
+    'TT': ('TTO', ['Trinidad y Tobago', 'Trinidad and Tobago'], ['trinitense', 'trinitenses']),
+}
+
+# Alias que casi siempre se refieren a otra cosa: Granada es también una ciudad de España
+# y de Nicaragua (y granadino su gentilicio). Se ignoran aunque vengan de los CSV de referencia.
+AMBIGUOUS_ALIASES = frozenset({'granada', 'granadino', 'granadina', 'granadinos', 'granadinas'})
+
+# Los alias más cortos (p. ej. 'tico', 'nica') coinciden con palabras o nombres propios comunes
+MIN_ALIAS_LENGTH = 4
+
+
+def strip_accents(text: str) -> str:
+    """Elimina tildes y diéresis conservando mayúsculas (á -> a, Ñ -> N)"""
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+def _case_variants(alias: str, proper_noun: bool = False) -> set:
+    """
+    Grafías habituales de un alias: como está escrito, capitalizado, título y mayúsculas
+
+    Los gentilicios también se buscan en minúsculas; los nombres de país no, porque en
+    minúsculas suelen ser otra palabra ("chile" jalapeño).
+    """
+    variants = {alias, alias[:1].upper() + alias[1:].lower(), alias.title(), alias.upper()}
+    if not proper_noun:
+        variants.add(alias.lower())
+    return variants
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Alternación regex factorizada por prefijos (los alias más largos ganan)"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict) -> str:
+        end = node.get('', False)
+        branches = []
+        for char in sorted(key for key in node if key):
+            char_pattern = r'\s+' if char == ' ' else re.escape(char)
+            branches.append(char_pattern + build(node[char]))
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 and not end else f"(?:{'|'.join(branches)})"
+        # Opcional si un alias termina aquí; el cuantificador voraz prefiere el alias más largo
+        return f"{body}?" if end else body
+
+    return build(trie)
+
+
+class CountryIndex:
+    """Índice compilado de menciones de países objetivo"""
+
+    def __init__(self, countries: Dict[str, object]):
+        """
+        Args:
+            countries: Países objetivo por código alpha-2 (DataLoader.countries)
+        """
+        self.countries = countries
+        self._alias_to_code: Dict[str, str] = {}
+        self._iso_to_code: Dict[str, str] = {}
+        spellings = set()
+
+        for code, country in countries.items():
+            alpha2 = code[-2:].upper()
+            alpha3, names, demonyms = TARGET_COUNTRY_ALIASES.get(alpha2, ('', [], []))
+            aliases = [(name, True) for name in [country.name] + names] + [(demonym, False) for demonym in demonyms]
+            for alias, proper_noun in aliases:
+                alias = strip_accents(alias)
+                if len(alias) < MIN_ALIAS_LENGTH or alias.lower() in AMBIGUOUS_ALIASES:
+                    continue
+                # Si un alias es ambiguo, gana el primer país que lo declara
+                self._alias_to_code.setdefault(alias.lower(), code)
+                spellings.update(_case_variants(alias, proper_noun))
+            alpha3 = (getattr(country, 'code_alpha3', '') or alpha3).upper()
+            if alpha3:
+                self._iso_to_code.setdefault(alpha3, code)
+                spellings.add(alpha3)
+
+        # Una sola alternación factorizada en trie de prefijos y sensible a mayúsculas:
+        # el motor de re descarta cada posición con una comparación (IGNORECASE es
+        # varias veces más lento) y los códigos ISO solo cuentan en mayúsculas ("PAN", no "pan")
+        self.pattern = re.compile(rf'(?<![A-Za-z0-9])(?:{_trie_pattern(spellings)})\b')
+
+    def _code_for(self, match_text: str) -> Optional[str]:
+        if match_text in self._iso_to_code:
+            return self._iso_to_code[match_text]
+        return self._alias_to_code.get(' '.join(match_text.lower().split()))
+
+    def find(self, text: str) -> Optional[str]:
+        """Código del primer país mencionado en el texto, o None"""
+        match = self.pattern.search(strip_accents(text))
+        return self._code_for(match.group(0)) if match else None
+
+    def find_all(self, text: str) -> List[str]:
+        """Códigos de todos los países mencionados, en orden de aparición y sin repetir"""
+        codes = (self._code_for(match) for match in self.pattern.findall(strip_accents(text)))
+        return list(dict.fromkeys(code for code in codes if code))
+
+    def filter_batch(self, texts: Iterable[str]) -> List[Optional[str]]:
+        """Código del país de cada texto (None si no menciona ningún país objetivo)"""
+        search = self.pattern.search
+        code_for = self._code_for
+        results = []
+        for text in texts:
+            match = search(strip_accents(text))
+            results.append(code_for(match.group(0)) if match else None)
+        return results
+
+
+def _demo_countries() -> Dict[str, object]:
+    """Países objetivo con nombres oficiales, para pruebas sin los CSV de referencia"""
+    from .data_loader import Country
+    return {
+        alpha2: Country(name=names[-1] if len(names) > 1 else names[0], code_alpha2=alpha2, code_alpha3=alpha3,
+                        iso_code=f"ISO 3166-2:{alpha2}", continent="", region="", coordinates="")
+        for alpha2, (alpha3, names, _) in TARGET_COUNTRY_ALIASES.items()
+    }
+
+
+def _synthetic_snippets(total: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    mentions = [alias for _, names, demonyms in TARGET_COUNTRY_ALIASES.values() for alias in names + demonyms]
+    mentions += ['COL', 'MEX', 'PER']
+    fillers = ['Incautan cargamento de droga en operativo policial', 'Decomisan cocaína en el puerto',
+               'Capturan a red de narcotráfico tras meses de investigación', 'La fiscalía informó sobre el caso',
+               'Autoridades de España y Estados Unidos coordinan la operación', 'Detienen a sospechosos en aeropuerto']
+    snippets = []
+    for _ in range(total):
+        text = f"{rng.choice(fillers)}. {rng.choice(fillers)}"
+        if rng.random() < 0.6:
+            text = f"{text} {rng.choice(['en', 'de', 'policía'])} {rng.choice(mentions)}"
+        snippets.append(text)
+    return snippets
+
+
+def _best_time(function, repeat: int):
+    """Mejor tiempo de `repeat` ejecuciones y el resultado de la última"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice de países")
+    parser.add_argument("--snippets", type=int, default=100000, help="Número de textos sintéticos")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones (se informa la mejor)")
+    args = parser.parse_args()
+
+    countries = _demo_countries()
+    snippets = _synthetic_snippets(args.snippets)
+
+    print(f"🌎 Filtro de países objetivo sobre {len(snippets):,} textos (mejor de {args.repeat})")
+
+    def official_name_loop():
+        names = [(country.name.lower(), code) for code, country in countries.items()]
+        results = []
+        for text in snippets:
+            full_text = text.lower()
+            results.append(next((code for name, code in names if name in full_text), None))
+        return results
+
+    # Mismo vocabulario que el índice, probado alias por alias: es la comparación justa
+    index = CountryIndex(countries)
+    aliases = sorted(index._alias_to_code.items(), key=lambda item: -len(item[0]))
+
+    def alias_loop():
+        results = []
+        for text in snippets:
+            full_text = strip_accents(text).lower()
+            results.append(next((code for alias, code in aliases if alias in full_text), None))
+        return results
+
+    build_time, index = _best_time(lambda: CountryIndex(countries), args.repeat)
+    naive_time, naive = _best_time(official_name_loop, args.repeat)
+    alias_time, naive_aliases = _best_time(alias_loop, args.repeat)
+    index_time, indexed = _best_time(lambda: index.filter_batch(snippets), args.repeat)
+
+    def report(label, seconds, results):
+        print(f"• {label}: {seconds:.2f}s ({len(snippets) / seconds:,.0f} textos/s), "
+              f"{sum(code is not None for code in results):,} coincidencias")
+
+    report("Bucle por país (nombre oficial)", naive_time, naive)
+    report(f"Bucle por alias ({len(aliases)} alias)", alias_time, naive_aliases)
+    report("Índice compilado", index_time, indexed)
+    print(f"⚡ Índice frente al bucle por alias: {alias_time / index_time:.1f}x "
+          f"(construcción: {build_time * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
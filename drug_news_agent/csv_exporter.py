@@ -3,11 +3,84 @@ Exportador de resultados a formato CSV compatible con Centro Regional Base.
 Genera archivos CSV con la estructura exacta requerida para análisis.
 """
 import csv
+import json
 import os
 from datetime import datetime
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
+from .aggregation import NewsAggregator, determine_subregion
 from .intelligent_search_agent import ProcessedNews, SearchResults
+from .country_index import strip_accents
+from .dates import format_publication_date
+from .quantities import article_quantities, seized_amount, to_kg
+
+
+# Orden de columnas (basado en Centro Regional Base)
+CSV_COLUMNS = (
+    'Articulo_ID', 'CUI', 'Fecha_Publicacion_Articulo', 'Titulo_Articulo',
+    'Descripcion_Articulo', 'Medio', 'URL_Acortada', 'Pais_Origen_Articulo',
+    'Cod_Continente', 'Idioma', 'Categoria_tematica', 'Relevancia_Mencion',
+    'Frecuencia_Mencion', 'Impacto_Articulo', 'Keywords',
+    'Clasificacion_Sust_Estup_Decomisada', 'Tipo_Sus_Estup_Decomisada',
+    'Cant_Sust_Estup_Sintetica_incautada', 'Unidad', 'Fueza_interviniente',
+    'Ubicacion_Secuestro', 'Region', 'Sub region', 'Pais', 'Provincia',
+    'Distrito', 'Alfa_2', 'ISO_3166_2', 'Geo_Pais', 'Geo_Prov',
+    'Geo_Distrito', 'Fecha', 'Dia', 'Semana', 'Quincena', 'Mes_Largo',
+    'Trimestre', 'Año'
+)
+
+_COL = {name: index for index, name in enumerate(CSV_COLUMNS)}
+
+# Columnas que las filas de drogas secundarias copian de la fila base
+_ADDITIONAL_ROW_KEPT = tuple(_COL[name] for name in (
+    'CUI', 'Fecha_Publicacion_Articulo', 'Geo_Pais', 'Geo_Prov', 'Geo_Distrito',
+    'Fecha', 'Dia', 'Semana', 'Quincena', 'Mes_Largo', 'Trimestre', 'Año'
+))
+
+CSV_BUFFER_SIZE = 1024 * 1024
+
+# Tipos de la exportación columnar (Parquet)
+_GEO_COLUMNS = ('Geo_Pais', 'Geo_Prov', 'Geo_Distrito')
+_DATE_COLUMNS = ('Fecha_Publicacion_Articulo', 'Fecha')
+_INT_COLUMNS = ('Dia', 'Semana', 'Quincena', 'Año')
+_FLOAT_COLUMNS = ('Cant_Sust_Estup_Sintetica_incautada',)
+_CATEGORICAL_COLUMNS = (
+    'Medio', 'Pais_Origen_Articulo', 'Cod_Continente', 'Idioma', 'Categoria_tematica',
+    'Relevancia_Mencion', 'Frecuencia_Mencion', 'Impacto_Articulo',
+    'Clasificacion_Sust_Estup_Decomisada', 'Tipo_Sus_Estup_Decomisada', 'Unidad',
+    'Fueza_interviniente', 'Region', 'Sub region', 'Pais', 'Provincia', 'Distrito',
+    'Alfa_2', 'ISO_3166_2', 'Mes_Largo', 'Trimestre'
+)
+
+PARQUET_ROW_GROUP_SIZE = 64 * 1024
+
+# Exportación XLSX: formato y ancho por columna (se aplican una vez por columna, no por celda)
+XLSX_SHEET_NAME = 'Noticias_Drogas'
+XLSX_MAX_ROWS = 1048576
+_XLSX_COLUMN_FORMATS = {
+    'Fecha_Publicacion_Articulo': {'num_format': 'dd/mm/yyyy'},
+    'Fecha': {'num_format': 'dd/mm/yyyy'},
+    'Cant_Sust_Estup_Sintetica_incautada': {'num_format': '#,##0.00'},
+    'Dia': {'num_format': '0'},
+    'Semana': {'num_format': '0'},
+    'Quincena': {'num_format': '0'},
+    'Año': {'num_format': '0'},
+}
+_XLSX_COLUMN_WIDTHS = {
+    'Titulo_Articulo': 60,
+    'Descripcion_Articulo': 80,
+    'Keywords': 40,
+    'Ubicacion_Secuestro': 35,
+    'URL_Acortada': 30,
+}
+
+# Dataset particionado (estilo Hive: Año=2025/Mes=08/Pais=Colombia/part-<run>.csv)
+DATASET_PARTITIONING = ('Año', 'Mes', 'Pais')
+DATASET_MANIFEST = '_manifest.json'
+DATASET_CUI_INDEX = '_cui_index.txt'
+DATASET_MANIFEST_RUNS = 50
+# Línea del índice de CUI que cierra cada ejecución
+_RUN_MARKER = '#run='
 
 
 class CentroRegionalCSVExporter:
@@ -42,6 +115,9 @@ class CentroRegionalCSVExporter:
             'cristal': 'Cristal'
         }
         
+        # Clasificación ya calculada por nombre de droga
+        self._drug_data_cache: Dict[str, Tuple[str, str]] = {}
+        
     def export_to_csv(self, results: SearchResults, output_path: str) -> str:
         """
         Exporta los resultados a CSV en formato Centro Regional Base
@@ -54,40 +130,515 @@ class CentroRegionalCSVExporter:
             Ruta del archivo generado
         """
         
-        # Preparar datos para el CSV
-        csv_rows = []
+        return self.export_stream(results.processed_news, output_path)
+        
+    def export_stream(self, processed_news: Iterable[ProcessedNews], output_path: str,
+                      buffer_size: int = CSV_BUFFER_SIZE) -> str:
+        """
+        Exporta noticias procesadas a CSV fila por fila
+        
+        Acepta cualquier iterable (por ejemplo un generador) y escribe cada fila
+        en cuanto se genera, por lo que la memoria usada no depende del número
+        de resultados. El archivo solo se crea si hay al menos una fila.
+        
+        Args:
+            processed_news: Noticias procesadas a exportar
+            output_path: Ruta donde guardar el archivo CSV
+            buffer_size: Tamaño del buffer de escritura en bytes
+            
+        Returns:
+            Ruta del archivo generado
+        """
+        
+        filename = self._generate_filename(output_path)
+        date_fields = self._current_date_fields()
         
-        for processed_news in results.processed_news:
-            # Crear fila base
-            base_row = self._create_base_row(processed_news)
+        csvfile = None
+        total_rows = 0
+        try:
+            for row in self._iter_rows(processed_news, date_fields):
+                if csvfile is None:
+                    csvfile = open(filename, 'w', newline='', encoding='utf-8', buffering=buffer_size)
+                    writer = csv.writer(csvfile)
+                    writer.writerow(CSV_COLUMNS)
+                writer.writerow(row)
+                total_rows += 1
+        finally:
+            if csvfile is not None:
+                csvfile.close()
+                
+        if total_rows:
+            print(f"✅ CSV exportado: {filename}")
+            print(f"📊 Total filas: {total_rows}")
             
-            # Si hay múltiples drogas mencionadas, crear filas adicionales
-            drug_mentions = processed_news.relevance.drug_mentions
+        return filename
+        
+    def export_to_xlsx(self, processed_news: Iterable[ProcessedNews], output_path: str,
+                       sheet_name: str = XLSX_SHEET_NAME) -> str:
+        """
+        Exporta noticias procesadas a XLSX en modo de memoria constante
+        
+        Usa xlsxwriter con constant_memory: cada fila se escribe al disco en
+        cuanto se genera, así que la memoria no depende del número de filas.
+        Los formatos de columna (fechas, números) y anchos se definen una sola
+        vez; las fechas y campos numéricos se escriben como valores reales y
+        las coordenadas como texto "lat, lng". Si se supera el límite de filas
+        de Excel se continúa en una hoja nueva.
+        
+        Args:
+            processed_news: Noticias procesadas a exportar
+            output_path: Ruta donde guardar el archivo XLSX
+            sheet_name: Nombre de la hoja de datos
             
-            if drug_mentions:
-                for i, drug in enumerate(drug_mentions):
-                    row = base_row.copy()
+        Returns:
+            Ruta del archivo generado
+        """
+        
+        try:
+            import xlsxwriter
+        except ImportError:
+            raise ImportError("La exportación XLSX requiere xlsxwriter: pip install xlsxwriter")
+            
+        filename = self._generate_filename(output_path, extension="xlsx")
+        date_fields = self._current_date_fields()
+        converters = [self._xlsx_converter(name) for name in CSV_COLUMNS]
+        
+        workbook = None
+        worksheet = None
+        row_index = XLSX_MAX_ROWS
+        total_rows = 0
+        try:
+            for row in self._iter_rows(processed_news, date_fields):
+                if row_index >= XLSX_MAX_ROWS:
+                    if workbook is None:
+                        workbook = xlsxwriter.Workbook(filename, {'constant_memory': True, 'strings_to_urls': False})
+                        header_format = workbook.add_format({'bold': True, 'bg_color': '#D9E1F2', 'border': 1})
+                        column_formats = [
+                            workbook.add_format(_XLSX_COLUMN_FORMATS[name]) if name in _XLSX_COLUMN_FORMATS else None
+                            for name in CSV_COLUMNS
+                        ]
+                    sheet_number = len(workbook.worksheets()) + 1
+                    worksheet = workbook.add_worksheet(sheet_name if sheet_number == 1 else f"{sheet_name}_{sheet_number}")
+                    self._setup_xlsx_sheet(worksheet, header_format, column_formats)
+                    row_index = 1
                     
-                    # Solo la primera fila tiene todos los datos, las demás solo datos de droga
-                    if i > 0:
-                        row = self._create_additional_drug_row(base_row, drug)
-                    else:
-                        # Actualizar datos de droga para la primera fila
-                        self._update_drug_data(row, drug)
+                worksheet.write_row(row_index, 0, [convert(value) for convert, value in zip(converters, row)])
+                row_index += 1
+                total_rows += 1
+        finally:
+            if workbook is not None:
+                workbook.close()
+                
+        if total_rows:
+            print(f"✅ XLSX exportado: {filename}")
+            print(f"📊 Total filas: {total_rows}")
+            
+        return filename
+        
+    @staticmethod
+    def _setup_xlsx_sheet(worksheet, header_format, column_formats: List) -> None:
+        """Escribe encabezados y aplica formato y ancho de cada columna una sola vez"""
+        
+        for index, name in enumerate(CSV_COLUMNS):
+            width = _XLSX_COLUMN_WIDTHS.get(name, max(12, len(name) + 2))
+            worksheet.set_column(index, index, width, column_formats[index])
+        worksheet.write_row(0, 0, CSV_COLUMNS, header_format)
+        worksheet.freeze_panes(1, 0)
+        
+    @staticmethod
+    def _xlsx_converter(name: str):
+        """Devuelve la función que convierte el valor de una columna a su tipo en Excel"""
+        
+        if name in _DATE_COLUMNS:
+            parsed_dates = {}
+            
+            def convert_date(value):
+                if value not in parsed_dates:
+                    parsed_dates[value] = datetime.strptime(value, "%d/%m/%Y") if value else None
+                return parsed_dates[value]
+            return convert_date
+        if name in _INT_COLUMNS:
+            return lambda value: int(value) if value else None
+        if name in _FLOAT_COLUMNS:
+            return lambda value: float(value.replace(",", ".")) if value else None
+        if name in _GEO_COLUMNS:
+            return lambda value: value.strip('"')
+        return lambda value: value
+        
+    def export_to_dataset(self, processed_news: Iterable[ProcessedNews], dataset_dir: str,
+                          run_id: Optional[str] = None) -> Dict:
+        """
+        Agrega las filas de una ejecución a un dataset CSV particionado
+        
+        Las filas se escriben en Año=<aaaa>/Mes=<mm>/Pais=<país>/part-<run_id>.csv,
+        creando un archivo nuevo por partición y ejecución (los existentes nunca
+        se reescriben). Año y Mes son los de Fecha_Publicacion_Articulo. Los artículos
+        cuyo CUI ya está en el índice del dataset se omiten. Al terminar se actualiza
+        el manifiesto _manifest.json.
+        
+        Las partes se escriben como .tmp y se renombran al cerrarse; después se
+        actualizan el manifiesto y el índice, que termina con la marca de la ejecución.
+        Si el proceso se interrumpe antes de la marca, la siguiente ejecución recupera
+        los CUI (y el manifiesto) a partir de las partes ya publicadas, así que sus
+        filas no se vuelven a exportar.
+        
+        El dataset puede leerse filtrando particiones con pyarrow.dataset, declarando
+        Año como int64 y Mes/Pais como string en el esquema de particionado (Año y
+        Pais también son columnas de los archivos; al leer prevalece el valor de la
+        partición). No está pensado para escrituras concurrentes desde varios procesos.
+        
+        Args:
+            processed_news: Noticias procesadas a agregar
+            dataset_dir: Directorio raíz del dataset
+            run_id: Identificador de la ejecución (por defecto, la fecha y hora, con un
+                sufijo _2, _3... si ya existe una ejecución con ese identificador)
+            
+        Returns:
+            Resumen de la ejecución (filas, artículos, duplicados omitidos, particiones)
+            
+        Raises:
+            ValueError: Si el dataset ya tiene una ejecución con el run_id indicado
+        """
+        
+        os.makedirs(dataset_dir, exist_ok=True)
+        known_cuis, used_run_ids = self._load_cui_index(dataset_dir)
+        if run_id is None:
+            base_run_id = run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+            suffix = 2
+            while run_id in used_run_ids:
+                run_id = f"{base_run_id}_{suffix}"
+                suffix += 1
+        elif run_id in used_run_ids:
+            # os.replace sobrescribiría sus partes sin avisar
+            raise ValueError(f"El dataset {dataset_dir} ya tiene una ejecución '{run_id}'")
+        date_fields = self._current_date_fields()
+        
+        open_parts = {}
+        partition_rows = {}
+        new_cuis = []
+        skipped = 0
+        try:
+            for news in processed_news:
+                if news.cui in known_cuis:
+                    skipped += 1
+                    continue
+                known_cuis.add(news.cui)
+                new_cuis.append(news.cui)
+                
+                # Las filas de drogas secundarias no llevan país: usan la partición de la fila base
+                partition = None
+                for row in self._iter_rows((news,), date_fields):
+                    partition = partition or self._partition_path(row)
+                    if partition not in open_parts:
+                        part_dir = os.path.join(dataset_dir, partition)
+                        os.makedirs(part_dir, exist_ok=True)
+                        part_path = os.path.join(part_dir, f"part-{run_id}.csv")
+                        # Oculto (prefijo '.') para que pyarrow.dataset no lo lea
+                        part_file = open(os.path.join(part_dir, f".part-{run_id}.csv.tmp"), 'w', newline='',
+                                         encoding='utf-8', buffering=CSV_BUFFER_SIZE)
+                        writer = csv.writer(part_file)
+                        writer.writerow(CSV_COLUMNS)
+                        open_parts[partition] = (part_file, writer, part_path)
+                        partition_rows[partition] = 0
+                    open_parts[partition][1].writerow(row)
+                    partition_rows[partition] += 1
+        except BaseException:
+            # Una ejecución interrumpida no publica ninguna parte
+            for part_file, _, _ in open_parts.values():
+                part_file.close()
+                os.remove(part_file.name)
+            raise
+            
+        for part_file, _, part_path in open_parts.values():
+            part_file.close()
+            os.replace(part_file.name, part_path)
+            
+        run_summary = {
+            'run_id': run_id,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'articles': len(new_cuis),
+            'rows': sum(partition_rows.values()),
+            'skipped_duplicates': skipped,
+            'partitions': sorted(partition_rows)
+        }
+        self._commit_run(dataset_dir, run_summary, partition_rows, new_cuis)
+        
+        print(f"✅ Dataset actualizado: {dataset_dir}")
+        print(f"📊 {run_summary['rows']} filas nuevas en {len(partition_rows)} particiones "
+              f"({skipped} artículos ya exportados omitidos)")
+        
+        return run_summary
+        
+    @staticmethod
+    def _partition_path(row: Tuple) -> str:
+        """Ruta relativa de la partición (Año/Mes de publicación y Pais) de una fila"""
+        
+        _, month, year = row[_COL['Fecha_Publicacion_Articulo']].split("/")
+        country = row[_COL['Pais']] or "Sin especificar"
+        # Evitar separadores de ruta en el valor de la partición
+        country = country.replace("/", "-").replace("\\", "-").replace("=", "-")
+        return os.path.join(f"Año={year}", f"Mes={month}", f"Pais={country}")
+        
+    @classmethod
+    def _load_cui_index(cls, dataset_dir: str) -> Tuple[set, set]:
+        """
+        Carga los CUI ya exportados al dataset y los run_id ya usados
+        
+        Las partes de ejecuciones sin marca en el índice (interrumpidas antes de
+        terminar) se leen para recuperar sus CUI y registrar la ejecución.
+        """
+        
+        cuis, committed_runs = set(), set()
+        index_path = os.path.join(dataset_dir, DATASET_CUI_INDEX)
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith(_RUN_MARKER):
+                        committed_runs.add(line[len(_RUN_MARKER):])
+                    elif line:
+                        cuis.add(line)
                         
-                    csv_rows.append(row)
-            else:
-                # Si no hay drogas específicas, agregar fila sin clasificación
-                csv_rows.append(base_row)
+        pending, run_ids = {}, set(committed_runs)
+        for root, _, files in os.walk(dataset_dir):
+            for name in files:
+                if not (name.startswith("part-") and name.endswith(".csv")):
+                    continue
+                run_id = name[len("part-"):-len(".csv")]
+                run_ids.add(run_id)
+                if run_id in committed_runs:
+                    continue
+                run_cuis, partition_rows = pending.setdefault(run_id, ([], {}))
+                with open(os.path.join(root, name), 'r', newline='', encoding='utf-8') as f:
+                    reader = csv.reader(f)
+                    next(reader, None)
+                    rows = 0
+                    for row in reader:
+                        rows += 1
+                        cui = row[_COL['CUI']]
+                        if cui and cui not in cuis:
+                            cuis.add(cui)
+                            run_cuis.append(cui)
+                partition_rows[os.path.relpath(root, dataset_dir)] = rows
                 
-        # Escribir CSV
-        filename = self._generate_filename(output_path)
-        self._write_csv_file(csv_rows, filename)
+        for run_id, (run_cuis, partition_rows) in sorted(pending.items()):
+            run_summary = {
+                'run_id': run_id,
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'articles': len(run_cuis),
+                'rows': sum(partition_rows.values()),
+                'skipped_duplicates': 0,
+                'partitions': sorted(partition_rows),
+                'recovered': True
+            }
+            # Partes de las que ya se conocían todos los CUI: solo falta la marca
+            cls._commit_run(dataset_dir, run_summary, partition_rows, run_cuis, update_manifest=bool(run_cuis))
+        return cuis, run_ids
+        
+    @classmethod
+    def _commit_run(cls, dataset_dir: str, run_summary: Dict, partition_rows: Dict[str, int],
+                    new_cuis: List[str], update_manifest: bool = True) -> None:
+        """Registra una ejecución: manifiesto y después CUI del índice con la marca de la ejecución"""
+        
+        manifest_path = os.path.join(dataset_dir, DATASET_MANIFEST)
+        recorded = not update_manifest
+        if not recorded and os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                recorded = any(run['run_id'] == run_summary['run_id'] for run in json.load(f)['runs'])
+        # Si el proceso se interrumpió después del manifiesto no se cuenta dos veces
+        if not recorded:
+            cls._update_manifest(dataset_dir, run_summary, partition_rows)
+        if partition_rows:
+            with open(os.path.join(dataset_dir, DATASET_CUI_INDEX), 'a', encoding='utf-8') as f:
+                f.write("".join(f"{cui}\n" for cui in new_cuis) + f"{_RUN_MARKER}{run_summary['run_id']}\n")
+                
+    @staticmethod
+    def _update_manifest(dataset_dir: str, run_summary: Dict, partition_rows: Dict[str, int]) -> None:
+        """Actualiza el manifiesto del dataset de forma atómica"""
+        
+        manifest_path = os.path.join(dataset_dir, DATASET_MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        else:
+            manifest = {
+                'format': 'csv',
+                'partitioning': list(DATASET_PARTITIONING),
+                'columns': list(CSV_COLUMNS),
+                'total_rows': 0,
+                'total_articles': 0,
+                'partitions': {},
+                'runs': []
+            }
+            
+        for partition, rows in partition_rows.items():
+            key = partition.replace(os.sep, "/")
+            stats = manifest['partitions'].setdefault(key, {'rows': 0, 'files': 0})
+            stats['rows'] += rows
+            stats['files'] += 1
+            stats['last_run'] = run_summary['run_id']
+        manifest['total_rows'] += run_summary['rows']
+        manifest['total_articles'] += run_summary['articles']
+        manifest['updated_at'] = run_summary['timestamp']
+        # Solo se guardan las últimas ejecuciones para que el manifiesto siga siendo pequeño
+        manifest['runs'] = (manifest['runs'] + [dict(run_summary, partitions=len(partition_rows))])[-DATASET_MANIFEST_RUNS:]
+        
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+        
+    def export_to_parquet(self, processed_news: Iterable[ProcessedNews], output_path: str,
+                          compression: str = 'zstd',
+                          row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> str:
+        """
+        Exporta noticias procesadas a Parquet con tipos de datos reales
+        
+        Usa las mismas columnas que el CSV, salvo que cada columna Geo_* se
+        divide en dos columnas float (Geo_*_Lat y Geo_*_Lon). Las fechas se
+        guardan como date, los campos de día/semana/año como enteros y las
+        columnas categóricas con codificación de diccionario (en pandas se
+        cargan como category). Las filas se escriben por grupos de
+        row_group_size, así que la memoria usada no depende del total.
+        
+        Args:
+            processed_news: Noticias procesadas a exportar
+            output_path: Ruta donde guardar el archivo Parquet
+            compression: Códec de compresión ('zstd', 'snappy', 'gzip', 'none')
+            row_group_size: Filas por grupo de filas
+            
+        Returns:
+            Ruta del archivo generado
+        """
         
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("La exportación Parquet requiere pyarrow: pip install pyarrow")
+            
+        filename = self._generate_filename(output_path, extension="parquet")
+        schema = self._parquet_schema(pa)
+        date_fields = self._current_date_fields()
+        
+        writer = None
+        total_rows = 0
+        batch = []
+        try:
+            for row in self._iter_rows(processed_news, date_fields):
+                batch.append(row)
+                if len(batch) >= row_group_size:
+                    writer = writer or pq.ParquetWriter(filename, schema, compression=compression)
+                    writer.write_table(self._rows_to_table(pa, schema, batch))
+                    total_rows += len(batch)
+                    batch = []
+            if batch:
+                writer = writer or pq.ParquetWriter(filename, schema, compression=compression)
+                writer.write_table(self._rows_to_table(pa, schema, batch))
+                total_rows += len(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+                
+        if total_rows:
+            print(f"✅ Parquet exportado: {filename}")
+            print(f"📊 Total filas: {total_rows}")
+            
         return filename
         
-    def _create_base_row(self, processed_news: ProcessedNews) -> Dict:
-        """Crea la fila base con todos los campos"""
+    @staticmethod
+    def _parquet_schema(pa):
+        """Esquema Arrow equivalente a CSV_COLUMNS"""
+        
+        fields = []
+        for name in CSV_COLUMNS:
+            if name in _GEO_COLUMNS:
+                fields.append(pa.field(f"{name}_Lat", pa.float64()))
+                fields.append(pa.field(f"{name}_Lon", pa.float64()))
+            elif name in _DATE_COLUMNS:
+                fields.append(pa.field(name, pa.date32()))
+            elif name in _INT_COLUMNS:
+                fields.append(pa.field(name, pa.int16()))
+            elif name in _FLOAT_COLUMNS:
+                fields.append(pa.field(name, pa.float64()))
+            elif name in _CATEGORICAL_COLUMNS:
+                fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                fields.append(pa.field(name, pa.string()))
+        return pa.schema(fields)
+        
+    def _rows_to_table(self, pa, schema, rows: List[Tuple]):
+        """Convierte un lote de filas del CSV en una tabla Arrow tipada"""
+        
+        arrays = []
+        parsed_dates = {}
+        for name, values in zip(CSV_COLUMNS, zip(*rows)):
+            if name in _GEO_COLUMNS:
+                coordinates = [self._parse_coordinates(value) for value in values]
+                arrays.append(pa.array([c[0] for c in coordinates], type=pa.float64()))
+                arrays.append(pa.array([c[1] for c in coordinates], type=pa.float64()))
+            elif name in _DATE_COLUMNS:
+                dates = []
+                for value in values:
+                    if value not in parsed_dates:
+                        parsed_dates[value] = datetime.strptime(value, "%d/%m/%Y").date() if value else None
+                    dates.append(parsed_dates[value])
+                arrays.append(pa.array(dates, type=pa.date32()))
+            elif name in _INT_COLUMNS:
+                arrays.append(pa.array([int(value) if value else None for value in values], type=pa.int16()))
+            elif name in _FLOAT_COLUMNS:
+                arrays.append(pa.array([float(value.replace(",", ".")) if value else None for value in values],
+                                       type=pa.float64()))
+            elif name in _CATEGORICAL_COLUMNS:
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=pa.string()))
+        return pa.Table.from_arrays(arrays, schema=schema)
+        
+    @staticmethod
+    def _parse_coordinates(value: str) -> Tuple[Optional[float], Optional[float]]:
+        """Convierte '"lat, lng"' en (lat, lng)"""
+        
+        if not value:
+            return None, None
+        latitude, longitude = value.strip('"').split(",", 1)
+        return float(latitude), float(longitude)
+        
+    def _iter_rows(self, processed_news: Iterable[ProcessedNews], date_fields: Tuple) -> Iterator[Tuple]:
+        """Genera las filas del CSV (una por droga mencionada) como tuplas"""
+        
+        for news in processed_news:
+            base_row = self._create_base_row(news, date_fields)
+            drug_mentions = news.relevance.drug_mentions
+            
+            if not drug_mentions:
+                # Si no hay drogas específicas, agregar fila sin clasificación
+                yield tuple(base_row)
+                continue
+                
+            # Solo la primera fila tiene todos los datos, las demás solo datos de droga
+            self._update_drug_data(base_row, drug_mentions[0])
+            yield tuple(base_row)
+            
+            for drug in drug_mentions[1:]:
+                yield self._create_additional_drug_row(base_row, drug, news)
+                
+    def _current_date_fields(self) -> Tuple:
+        """Calcula una vez por exportación los campos de fecha"""
+        
+        current_date = datetime.now()
+        return (
+            current_date.strftime("%d/%m/%Y"),
+            str(current_date.day),
+            str(current_date.isocalendar()[1]),
+            "1" if current_date.day <= 15 else "2",
+            current_date.strftime("%B").title(),
+            f"T{(current_date.month - 1) // 3 + 1}",
+            str(current_date.year)
+        )
+        
+    def _create_base_row(self, processed_news: ProcessedNews, date_fields: Optional[Tuple] = None) -> List:
+        """Crea la fila base con todos los campos, en el orden de CSV_COLUMNS"""
         
         article = processed_news.article
         relevance = processed_news.relevance
@@ -96,97 +647,124 @@ class CentroRegionalCSVExporter:
         
         # Extraer coordenadas
         coordinates = ""
-        geo_pais = ""
-        geo_prov = ""
-        geo_distrito = ""
         
         if geocoding.success and geocoding.coordinates:
             coordinates = f"\"{geocoding.coordinates.latitude}, {geocoding.coordinates.longitude}\""
-            geo_pais = coordinates  # Para simplicidad, usar mismas coordenadas
-            geo_prov = coordinates
-            geo_distrito = coordinates
             
         # Determinar país y códigos
         country_code = location.country_code or "XX"
         iso_code = f"ISO 3166-2:{country_code}"
         
-        # Fecha actual
-        current_date = datetime.now()
-        fecha_str = current_date.strftime("%d/%m/%Y")
-        
-        # Crear fila
-        row = {
-            'Articulo_ID': processed_news.article_id,
-            'CUI': processed_news.cui,
-            'Fecha_Publicacion_Articulo': fecha_str,
-            'Titulo_Articulo': article.title,
-            'Descripcion_Articulo': article.description,
-            'Medio': article.source,
-            'URL_Acortada': self._shorten_url(article.url),
-            'Pais_Origen_Articulo': location.country or "Sin especificar",
-            'Cod_Continente': "SA",  # Sudamérica por defecto
-            'Idioma': "ES",
-            'Categoria_tematica': "Incidente",
-            'Relevancia_Mencion': relevance.level,
-            'Frecuencia_Mencion': self._map_frequency(relevance.score),
-            'Impacto_Articulo': self._map_impact(relevance.score),
-            'Keywords': ", ".join(relevance.drug_mentions + relevance.reasons),
-            'Clasificacion_Sust_Estup_Decomisada': "",  # Se llena por droga específica
-            'Tipo_Sus_Estup_Decomisada': "",  # Se llena por droga específica
-            'Cant_Sust_Estup_Sintetica_incautada': "0,00",
-            'Unidad': "Sin datos",
-            'Fueza_interviniente': self._extract_force(article.title + " " + article.description),
-            'Ubicacion_Secuestro': location.full_address or "Sin especificar",
-            'Region': "America",
-            'Sub region': self._determine_subregion(location.country),
-            'Pais': location.country or "Sin especificar",
-            'Provincia': location.state_province or "",
-            'Distrito': location.city or "",
-            'Alfa_2': country_code,
-            'ISO_3166_2': iso_code,
-            'Geo_Pais': geo_pais,
-            'Geo_Prov': geo_prov,
-            'Geo_Distrito': geo_distrito,
-            'Fecha': fecha_str,
-            'Dia': str(current_date.day),
-            'Semana': str(current_date.isocalendar()[1]),
-            'Quincena': "1" if current_date.day <= 15 else "2",
-            'Mes_Largo': current_date.strftime("%B").title(),
-            'Trimestre': f"T{(current_date.month - 1) // 3 + 1}",
-            'Año': str(current_date.year)
-        }
-        
-        return row
+        fecha_str, dia, semana, quincena, mes_largo, trimestre, anio = date_fields or self._current_date_fields()
+        # Si la fecha del resultado no se reconoce se usa la de exportación
+        publication_date = format_publication_date(article.date) or fecha_str
+        
+        # La extracción LLM (si existe) tiene prioridad sobre las heurísticas; su
+        # relevancia ya se aplicó a relevance.level antes de filtrar
+        llm = processed_news.llm_extraction
+        drug_mentions = relevance.drug_mentions
+        quantity, unit = self._seized_quantity(processed_news, drug_mentions[0] if drug_mentions else "")
+        force = (llm and llm.enforcement_force) or self._extract_force(article.title + " " + article.description)
+        seizure_location = location.full_address or (llm and llm.location) or "Sin especificar"
+        
+        return [
+            processed_news.article_id,                              # Articulo_ID
+            processed_news.cui,                                     # CUI
+            publication_date,                                       # Fecha_Publicacion_Articulo
+            article.title,                                          # Titulo_Articulo
+            article.description,                                    # Descripcion_Articulo
+            article.source,                                         # Medio
+            self._shorten_url(article.url),                         # URL_Acortada
+            location.country or "Sin especificar",                  # Pais_Origen_Articulo
+            "SA",                                                   # Cod_Continente (Sudamérica por defecto)
+            "ES",                                                   # Idioma
+            "Incidente",                                            # Categoria_tematica
+            relevance.level,                                        # Relevancia_Mencion
+            self._map_frequency(relevance.score),                   # Frecuencia_Mencion
+            self._map_impact(relevance.score),                      # Impacto_Articulo
+            ", ".join(relevance.drug_mentions + relevance.reasons),  # Keywords
+            "",                                                     # Clasificacion (se llena por droga)
+            "",                                                     # Tipo (se llena por droga)
+            quantity,                                               # Cant_Sust_Estup_Sintetica_incautada
+            unit,                                                   # Unidad
+            force,                                                  # Fueza_interviniente
+            seizure_location,                                       # Ubicacion_Secuestro
+            "America",                                              # Region
+            self._determine_subregion(location.country),            # Sub region
+            location.country or "Sin especificar",                  # Pais
+            location.state_province or "",                          # Provincia
+            location.city or "",                                    # Distrito
+            country_code,                                           # Alfa_2
+            iso_code,                                               # ISO_3166_2
+            coordinates,                                            # Geo_Pais (mismas coordenadas por simplicidad)
+            coordinates,                                            # Geo_Prov
+            coordinates,                                            # Geo_Distrito
+            fecha_str,                                              # Fecha
+            dia,                                                    # Dia
+            semana,                                                 # Semana
+            quincena,                                               # Quincena
+            mes_largo,                                              # Mes_Largo
+            trimestre,                                              # Trimestre
+            anio                                                    # Año
+        ]
         
-    def _create_additional_drug_row(self, base_row: Dict, drug: str) -> Dict:
+    def _create_additional_drug_row(self, base_row: List, drug: str,
+                                    processed_news: Optional[ProcessedNews] = None) -> Tuple:
         """Crea fila adicional para droga secundaria (sin datos generales)"""
         
-        row = {key: "" for key in base_row.keys()}
+        row = [""] * len(CSV_COLUMNS)
         
         # Mantener solo datos esenciales
-        row['CUI'] = base_row['CUI']
-        row['Fecha_Publicacion_Articulo'] = base_row['Fecha_Publicacion_Articulo']
-        row['Cant_Sust_Estup_Sintetica_incautada'] = "0,00"
-        row['Unidad'] = "Sin datos"
-        row['Geo_Pais'] = base_row['Geo_Pais']
-        row['Geo_Prov'] = base_row['Geo_Prov']
-        row['Geo_Distrito'] = base_row['Geo_Distrito']
-        row['Fecha'] = base_row['Fecha']
-        row['Dia'] = base_row['Dia']
-        row['Semana'] = base_row['Semana']
-        row['Quincena'] = base_row['Quincena']
-        row['Mes_Largo'] = base_row['Mes_Largo']
-        row['Trimestre'] = base_row['Trimestre']
-        row['Año'] = base_row['Año']
+        for index in _ADDITIONAL_ROW_KEPT:
+            row[index] = base_row[index]
+        quantity, unit = ("0,00", "Sin datos")
+        if processed_news is not None:
+            # Solo cantidades ligadas a esta droga; las genéricas ya están en la fila base
+            quantity, unit = self._seized_quantity(processed_news, drug, primary=False)
+        row[_COL['Cant_Sust_Estup_Sintetica_incautada']] = quantity
+        row[_COL['Unidad']] = unit
         
         # Actualizar datos de droga
         self._update_drug_data(row, drug)
         
-        return row
+        return tuple(row)
+        
+    def _seized_quantity(self, processed_news: ProcessedNews, drug: str, primary: bool = True) -> Tuple[str, str]:
+        """
+        Cantidad incautada de una droga y su unidad, normalizada a kilogramos cuando es una masa
         
-    def _update_drug_data(self, row: Dict, drug: str) -> None:
+        La extracción LLM tiene prioridad (si corresponde a la misma droga); si no,
+        se usan las cantidades del extractor compartido (calculadas una vez por artículo).
+        """
+        llm = processed_news.llm_extraction
+        if llm and llm.quantity is not None and (
+                primary or (llm.drug and strip_accents(llm.drug).lower() in strip_accents(drug).lower())):
+            kg = to_kg(llm.quantity, llm.unit)
+            if kg is not None:
+                return self._format_quantity(kg), "kg"
+            return self._format_quantity(llm.quantity), llm.unit or "Sin datos"
+        
+        mention = seized_amount(article_quantities(processed_news.article), drug, fallback=primary)
+        if mention is None:
+            return "0,00", "Sin datos"
+        if mention.is_mass:
+            return self._format_quantity(mention.kg), "kg"
+        return self._format_quantity(mention.value), "unidades"
+        
+    def _update_drug_data(self, row: List, drug: str) -> None:
         """Actualiza los datos específicos de la droga en la fila"""
         
+        classification, drug_type = self._classify_drug(drug)
+        row[_COL['Clasificacion_Sust_Estup_Decomisada']] = classification
+        row[_COL['Tipo_Sus_Estup_Decomisada']] = drug_type
+        
+    def _classify_drug(self, drug: str) -> Tuple[str, str]:
+        """Determina clasificación y tipo de una droga (memorizado por nombre)"""
+        
+        cached = self._drug_data_cache.get(drug)
+        if cached:
+            return cached
+            
         drug_lower = drug.lower()
         
         # Determinar clasificación
@@ -209,8 +787,8 @@ class CentroRegionalCSVExporter:
             elif drug_lower in ['metanfetamina', 'cristal']:
                 classification = "Estimulante sintetico"
                 
-        row['Clasificacion_Sust_Estup_Decomisada'] = classification
-        row['Tipo_Sus_Estup_Decomisada'] = drug_type
+        self._drug_data_cache[drug] = (classification, drug_type)
+        return classification, drug_type
         
     def _shorten_url(self, url: str) -> str:
         """Simula el acortamiento de URL (en producción usar servicio real)"""
@@ -238,6 +816,11 @@ class CentroRegionalCSVExporter:
         else:
             return "Bajo"
             
+    @staticmethod
+    def _format_quantity(value: float) -> str:
+        """Cantidad con dos decimales y coma decimal (formato de Centro Regional Base)"""
+        return f"{value:.2f}".replace(".", ",")
+        
     def _extract_force(self, text: str) -> str:
         """Extrae la fuerza interviniente del texto"""
         
@@ -257,68 +840,26 @@ class CentroRegionalCSVExporter:
     def _determine_subregion(self, country: str) -> str:
         """Determina la subregión basada en el país"""
         
-        if not country:
-            return "Sin especificar"
+        return determine_subregion(country)
             
-        caribe_countries = [
-            "Cuba", "República Dominicana", "Jamaica", "Trinidad y Tobago",
-            "Barbados", "Granada", "Santa Lucía", "Dominica"
-        ]
-        
-        central_america = [
-            "Guatemala", "Belice", "El Salvador", "Honduras", 
-            "Nicaragua", "Costa Rica", "Panamá"
-        ]
-        
-        if country in caribe_countries:
-            return "Caribe"
-        elif country in central_america:
-            return "America Central"
-        else:
-            return "America del Sur"
-            
-    def _generate_filename(self, output_path: str) -> str:
+    def _generate_filename(self, output_path: str, extension: str = "csv") -> str:
         """Genera nombre de archivo único"""
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"Centro_Regional_DrugNews_{timestamp}.csv"
+        filename = f"Centro_Regional_DrugNews_{timestamp}.{extension}"
         
         if os.path.isdir(output_path):
             return os.path.join(output_path, filename)
         else:
             return filename
             
-    def _write_csv_file(self, rows: List[Dict], filename: str) -> None:
-        """Escribe el archivo CSV"""
-        
-        if not rows:
-            return
-            
-        # Definir orden de columnas (basado en Centro Regional Base)
-        fieldnames = [
-            'Articulo_ID', 'CUI', 'Fecha_Publicacion_Articulo', 'Titulo_Articulo',
-            'Descripcion_Articulo', 'Medio', 'URL_Acortada', 'Pais_Origen_Articulo',
-            'Cod_Continente', 'Idioma', 'Categoria_tematica', 'Relevancia_Mencion',
-            'Frecuencia_Mencion', 'Impacto_Articulo', 'Keywords',
-            'Clasificacion_Sust_Estup_Decomisada', 'Tipo_Sus_Estup_Decomisada',
-            'Cant_Sust_Estup_Sintetica_incautada', 'Unidad', 'Fueza_interviniente',
-            'Ubicacion_Secuestro', 'Region', 'Sub region', 'Pais', 'Provincia',
-            'Distrito', 'Alfa_2', 'ISO_3166_2', 'Geo_Pais', 'Geo_Prov',
-            'Geo_Distrito', 'Fecha', 'Dia', 'Semana', 'Quincena', 'Mes_Largo',
-            'Trimestre', 'Año'
-        ]
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-            
-        print(f"✅ CSV exportado: {filename}")
-        print(f"📊 Total filas: {len(rows)}")
-        
-    def export_summary_report(self, results: SearchResults, output_path: str) -> str:
+    def export_summary_report(self, results: SearchResults, output_path: str,
+                              aggregator: Optional[NewsAggregator] = None) -> str:
         """Exporta un reporte resumen de la búsqueda"""
         
+        # Reutilizar la agregación ya calculada (p. ej. por la CLI) si se recibe
+        aggregator = aggregator or NewsAggregator.from_results(results)
+        
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         report_filename = f"Drug_News_Search_Report_{timestamp}.txt"
         
@@ -328,47 +869,71 @@ class CentroRegionalCSVExporter:
             report_path = report_filename
             
         with open(report_path, 'w', encoding='utf-8') as f:
-            f.write("🔍 REPORTE DE BÚSQUEDA DE NOTICIAS SOBRE DROGAS\\n")
-            f.write("=" * 50 + "\\n\\n")
+            f.write("🔍 REPORTE DE BÚSQUEDA DE NOTICIAS SOBRE DROGAS\n")
+            f.write("=" * 50 + "\n\n")
             
-            f.write(f"📅 Fecha de búsqueda: {datetime.now().strftime('%d/%m/%Y %H:%M')}\\n")
-            f.write(f"⏱️  Tiempo de procesamiento: {results.processing_time:.1f} segundos\\n\\n")
+            f.write(f"📅 Fecha de búsqueda: {datetime.now().strftime('%d/%m/%Y %H:%M')}\n")
+            f.write(f"⏱️  Tiempo de procesamiento: {results.processing_time:.1f} segundos\n\n")
             
-            f.write("📊 MÉTRICAS GENERALES:\\n")
-            f.write("-" * 25 + "\\n")
+            f.write("📊 MÉTRICAS GENERALES:\n")
+            f.write("-" * 25 + "\n")
             for key, value in results.search_metrics.items():
-                f.write(f"• {key.replace('_', ' ').title()}: {value}\\n")
+                if isinstance(value, (list, dict)):
+                    continue
+                f.write(f"• {key.replace('_', ' ').title()}: {value}\n")
                 
-            f.write("\\n🎯 RESULTADOS POR RELEVANCIA:\\n")
-            f.write("-" * 30 + "\\n")
-            
-            relevance_counts = {'Alta': 0, 'Media': 0, 'Baja': 0}
-            for news in results.processed_news:
-                relevance_counts[news.relevance.level] += 1
+            query_yield = results.search_metrics.get('query_yield')
+            if query_yield:
+                f.write("\n🧭 RENDIMIENTO POR CONSULTA (top 10):\n")
+                f.write("-" * 30 + "\n")
+                for item in query_yield[:10]:
+                    f.write(f"• {item['query']}: {item['raw_hits']} resultados, {item['target_hits']} país objetivo, "
+                            f"{item['relevant_hits']} relevantes, {item['new_events']} eventos nuevos "
+                            f"(rendimiento {item['run_yield']}, media {item['avg_yield']})\n")
                 
-            for level, count in relevance_counts.items():
-                f.write(f"• {level}: {count} artículos\\n")
+            f.write("\n🎯 RESULTADOS POR RELEVANCIA:\n")
+            f.write("-" * 30 + "\n")
+            for level, count in aggregator.relevance.items():
+                f.write(f"• {level}: {count} artículos\n")
                 
-            f.write("\\n🌎 PAÍSES CON MÁS NOTICIAS:\\n")
-            f.write("-" * 25 + "\\n")
-            
-            country_counts = {}
-            for news in results.processed_news:
-                country = news.location_info.country or "Sin especificar"
-                country_counts[country] = country_counts.get(country, 0) + 1
+            f.write("\n🌎 PAÍSES CON MÁS NOTICIAS:\n")
+            f.write("-" * 25 + "\n")
+            for country, count in aggregator.top('countries', 10):
+                f.write(f"• {country}: {count} artículos\n")
                 
-            sorted_countries = sorted(country_counts.items(), key=lambda x: x[1], reverse=True)
-            for country, count in sorted_countries[:10]:
-                f.write(f"• {country}: {count} artículos\\n")
+            f.write("\n🗺️  POR SUBREGIÓN:\n")
+            f.write("-" * 25 + "\n")
+            for subregion, count in aggregator.top('subregions', None):
+                f.write(f"• {subregion}: {count} artículos\n")
+                
+            if aggregator.drugs:
+                f.write("\n💊 DROGAS MÁS MENCIONADAS:\n")
+                f.write("-" * 25 + "\n")
+                for drug, count in aggregator.top('drugs', 10):
+                    f.write(f"• {drug}: {count} menciones\n")
+                    
+            f.write("\n📰 MEDIOS CON MÁS NOTICIAS:\n")
+            f.write("-" * 25 + "\n")
+            for source, count in aggregator.top('sources', 10):
+                f.write(f"• {source}: {count} artículos\n")
+                
+            f.write("\n📆 NOTICIAS POR SEMANA:\n")
+            f.write("-" * 25 + "\n")
+            for week, count in sorted(aggregator.weeks.items()):
+                f.write(f"• {week}: {count} artículos\n")
                 
             if results.duplicate_groups:
-                f.write("\\n🔄 GRUPOS DE NOTICIAS DUPLICADAS:\\n")
-                f.write("-" * 30 + "\\n")
+                f.write("\n🔄 GRUPOS DE NOTICIAS DUPLICADAS:\n")
+                f.write("-" * 30 + "\n")
+                
+                for size, count in sorted(aggregator.duplicate_group_sizes.items()):
+                    f.write(f"• Grupos de {size} noticias: {count}\n")
+                f.write("\n")
                 
                 for i, group in enumerate(results.duplicate_groups[:5]):
-                    f.write(f"• Grupo {i+1}: {len(group.duplicates)} duplicados\\n")
-                    f.write(f"  Artículo principal: {group.primary_article.title[:60]}...\\n")
-                    f.write(f"  Similitud: {group.similarity_score:.2f}\\n\\n")
+                    f.write(f"• Grupo {i+1}: {len(group.duplicates)} duplicados\n")
+                    f.write(f"  Artículo principal: {group.primary_article.title[:60]}...\n")
+                    f.write(f"  Similitud: {group.similarity_score:.2f}\n\n")
                     
         print(f"📋 Reporte generado: {report_path}")
         return report_path
@@ -0,0 +1,131 @@
+"""
+Modo daemon del agente de noticias sobre drogas.
+Ejecuta búsquedas periódicas reutilizando el mismo agente (y sus cachés) y
+procesa solo la ventana desde la última ejecución exitosa (watermark).
+"""
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import List, Optional
+
+from .aggregation import NewsAggregator
+
+
+# Máximo de CUI recordados para filtrar eventos ya emitidos
+MAX_SEEN_CUIS = 50000
+
+
+@dataclass
+class DaemonState:
+    """Estado persistente del daemon entre ciclos y reinicios"""
+    watermark: Optional[str] = None
+    seen_cuis: List[str] = field(default_factory=list)
+    cycles: int = 0
+    total_new_events: int = 0
+
+    @classmethod
+    def load(cls, path: str) -> "DaemonState":
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(**{key: value for key, value in data.items() if key in cls.__dataclass_fields__})
+
+    def save(self, path: str) -> None:
+        """Guarda el estado de forma atómica"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.__dict__, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def window_days(self, now: datetime, max_days: int) -> int:
+        """Días a buscar: desde el watermark (mínimo 1) o max_days en el primer ciclo"""
+        if not self.watermark:
+            return max_days
+        elapsed = (now - datetime.fromisoformat(self.watermark)).total_seconds()
+        return max(1, min(max_days, math.ceil(elapsed / 86400)))
+
+
+def run_cycle(agent, exporter, state: DaemonState, args, output_dir: str) -> DaemonState:
+    """
+    Ejecuta un ciclo de búsqueda y exporta solo los eventos nuevos
+
+    El estado recibido no se modifica: se devuelve el estado siguiente, que el
+    llamador guarda y adopta solo si el ciclo terminó sin errores.
+    """
+
+    cycle_start = datetime.now()
+    days_back = state.window_days(cycle_start, args.days)
+    print(f"\n⏰ Ciclo {state.cycles + 1} - {cycle_start.strftime('%d/%m/%Y %H:%M')} "
+          f"(ventana: {days_back} días desde {state.watermark or 'inicio'})")
+
+    results = agent.search_drug_news(
+        days_back=days_back,
+        max_articles_per_query=args.max_articles,
+        min_relevance=args.min_relevance
+    )
+
+    seen = set(state.seen_cuis)
+    new_news = [news for news in results.processed_news if news.cui not in seen]
+    new_results = replace(
+        results,
+        processed_news=new_news,
+        search_metrics=dict(results.search_metrics, new_events=len(new_news), window_days=days_back)
+    )
+
+    if new_news:
+        aggregator = NewsAggregator.from_results(new_results)
+        exporter.export_to_csv(new_results, output_dir)
+        exporter.export_summary_report(new_results, output_dir, aggregator)
+        if args.xlsx:
+            exporter.export_to_xlsx(new_news, output_dir)
+        if args.parquet:
+            exporter.export_to_parquet(new_news, output_dir)
+        if args.dataset_dir:
+            exporter.export_to_dataset(new_news, args.dataset_dir)
+
+    print(f"🆕 {len(new_news)} eventos nuevos de {len(results.processed_news)} procesados")
+    return replace(
+        state,
+        seen_cuis=(state.seen_cuis + [news.cui for news in new_news])[-MAX_SEEN_CUIS:],
+        watermark=cycle_start.isoformat(timespec='seconds'),
+        cycles=state.cycles + 1,
+        total_new_events=state.total_new_events + len(new_news)
+    )
+
+
+def run_daemon(agent, exporter, args, output_dir: str) -> None:
+    """Bucle principal: un ciclo cada interval_minutes, con el agente siempre en memoria"""
+
+    state_file = args.state_file or os.path.join(output_dir, "daemon_state.json")
+    state = DaemonState.load(state_file)
+    interval = args.interval_minutes * 60
+
+    print(f"\n🛰️  MODO DAEMON: un ciclo cada {args.interval_minutes} minutos")
+    print(f"• Estado: {os.path.abspath(state_file)}")
+    print(f"• Último watermark: {state.watermark or 'ninguno'}")
+
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                next_state = run_cycle(agent, exporter, state, args, output_dir)
+                next_state.save(state_file)
+                state = next_state
+            except Exception as e:
+                # Un ciclo fallido no mueve el watermark: el siguiente cubre la misma ventana
+                print(f"❌ Error en el ciclo: {e}")
+                if args.verbose:
+                    import traceback
+                    traceback.print_exc()
+
+            wait = max(0, interval - (time.monotonic() - started))
+            print(f"💤 Próximo ciclo en {wait / 60:.1f} minutos")
+            time.sleep(wait)
+    except KeyboardInterrupt:
+        print(f"\n⚠️ Daemon detenido ({state.cycles} ciclos, {state.total_new_events} eventos nuevos)")
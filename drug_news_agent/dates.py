@@ -0,0 +1,96 @@
+"""
+Normalización de fechas de publicación.
+Serper devuelve la fecha de cada resultado tal como la muestra Google: relativa
+("2 days ago", "hace 3 horas") o absoluta en inglés ("Aug 4, 2025"). El resto del
+pipeline (exportación, particiones, agregados por semana) trabaja con dd/mm/aaaa.
+"""
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+MONTHS = {
+    'jan': 1, 'january': 1, 'ene': 1, 'enero': 1,
+    'feb': 2, 'february': 2, 'febrero': 2,
+    'mar': 3, 'march': 3, 'marzo': 3,
+    'apr': 4, 'april': 4, 'abr': 4, 'abril': 4,
+    'may': 5, 'mayo': 5,
+    'jun': 6, 'june': 6, 'junio': 6,
+    'jul': 7, 'july': 7, 'julio': 7,
+    'aug': 8, 'august': 8, 'ago': 8, 'agosto': 8,
+    'sep': 9, 'sept': 9, 'september': 9, 'septiembre': 9, 'setiembre': 9,
+    'oct': 10, 'october': 10, 'octubre': 10,
+    'nov': 11, 'november': 11, 'noviembre': 11,
+    'dec': 12, 'december': 12, 'dic': 12, 'diciembre': 12,
+}
+
+# Unidades de las fechas relativas, en días
+_RELATIVE_UNITS = {
+    'minute': 0, 'min': 0, 'minuto': 0, 'hour': 0, 'hora': 0,
+    'day': 1, 'día': 1, 'dia': 1,
+    'week': 7, 'semana': 7,
+    'month': 30, 'mes': 30,
+    'year': 365, 'año': 365,
+}
+
+_NUMERIC = re.compile(r'^(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})$')
+_ISO = re.compile(r'^(\d{4})-(\d{2})-(\d{2})(?:[t ].*)?$')
+_MONTH_FIRST = re.compile(r'^([a-z]+)\.? (\d{1,2}),? (\d{4})$')
+_DAY_FIRST = re.compile(r'^(\d{1,2}) (?:de )?([a-z]+)\.?,? (?:de )?(\d{4})$')
+_AGO = re.compile(r'^(\d+|an?|one) (minute|min|hour|day|week|month|year)s? ago$')
+_HACE = re.compile(r'^hace (\d+|una?) (minuto|hora|d[ií]a|semana|mes|año)(?:e?s)?$')
+
+
+def parse_publication_date(value: str, reference: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Convierte la fecha de un resultado de búsqueda en datetime
+
+    Args:
+        value: Fecha tal como llega (dd/mm/aaaa, ISO, "Aug 4, 2025", "2 days ago", "hace 3 días"...)
+        reference: Momento respecto al que se resuelven las fechas relativas (por defecto, ahora)
+
+    Returns:
+        Fecha de publicación, o None si no se reconoce el formato
+    """
+
+    text = " ".join((value or "").lower().split())
+    if not text:
+        return None
+    reference = reference or datetime.now()
+
+    try:
+        match = _NUMERIC.match(text)
+        if match:
+            return datetime(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+        match = _ISO.match(text)
+        if match:
+            return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        match = _MONTH_FIRST.match(text)
+        if match and match.group(1) in MONTHS:
+            return datetime(int(match.group(3)), MONTHS[match.group(1)], int(match.group(2)))
+        match = _DAY_FIRST.match(text)
+        if match and match.group(2) in MONTHS:
+            return datetime(int(match.group(3)), MONTHS[match.group(2)], int(match.group(1)))
+    except ValueError:
+        # Día o mes fuera de rango
+        return None
+
+    if text in ('today', 'hoy', 'just now'):
+        return reference
+    if text in ('yesterday', 'ayer'):
+        return reference - timedelta(days=1)
+
+    match = _AGO.match(text) or _HACE.match(text)
+    if match:
+        amount, unit = match.groups()
+        amount = int(amount) if amount.isdigit() else 1
+        days = _RELATIVE_UNITS[unit]
+        return reference - timedelta(days=amount * days)
+    return None
+
+
+def format_publication_date(value: str, reference: Optional[datetime] = None) -> str:
+    """Fecha de publicación como dd/mm/aaaa, o cadena vacía si no se reconoce"""
+
+    parsed = parse_publication_date(value, reference)
+    return parsed.strftime("%d/%m/%Y") if parsed else ""
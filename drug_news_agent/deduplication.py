@@ -9,6 +9,7 @@ from typing import Dict, List, Set, Tuple
 from dataclasses import dataclass
 from difflib import SequenceMatcher
 from .relevance_classifier import NewsArticle
+from .quantities import article_quantities
 
 
 @dataclass
@@ -243,24 +244,8 @@ class NewsDeduplicator:
         return found_drugs
         
     def _extract_quantities(self, article: NewsArticle) -> List[str]:
-        """Extrae cantidades mencionadas"""
-        full_text = f"{article.title} {article.description}".lower()
-        
-        # Patrones de cantidades
-        quantity_patterns = [
-            r'(\d+)\s*kilos?',
-            r'(\d+)\s*kilogramos?',
-            r'(\d+)\s*gramos?',
-            r'(\d+)\s*toneladas?',
-            r'(\d+)\s*libras?'
-        ]
-        
-        quantities = []
-        for pattern in quantity_patterns:
-            matches = re.findall(pattern, full_text, re.IGNORECASE)
-            quantities.extend(matches)
-            
-        return quantities
+        """Extrae las masas mencionadas, normalizadas a kilogramos (500 kilos == 0,5 toneladas)"""
+        return [f"{round(mention.kg, 3):g}kg" for mention in article_quantities(article) if mention.is_mass]
         
     def _find_common_elements(self, primary: NewsArticle, duplicates: List[NewsArticle]) -> List[str]:
         """Encuentra elementos comunes entre artículos duplicados"""
@@ -0,0 +1,182 @@
+"""
+Enriquecimiento de artículos con el texto completo.
+Descarga en paralelo (con límites por dominio y caché en disco) el contenido de
+los N artículos con mejor puntuación por snippet y lo guarda en NewsArticle.content,
+para que la clasificación y la extracción de ubicaciones trabajen con la noticia completa.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .relevance_classifier import NewsArticle
+
+
+# Máximo de caracteres de contenido por artículo (las páginas largas son sobre todo menús y enlaces)
+ENRICH_MAX_CHARS = 20000
+
+# Prefijos con los que el lector de páginas indica un error en lugar de contenido
+FETCH_ERROR_PREFIXES = ("[visit]", "[document_parser]")
+
+# Contenidos guardados en memoria (LRU); el resto se relee del disco
+CONTENT_CACHE_MEMORY_ENTRIES = 256
+
+
+class ContentCache:
+    """Caché de contenido por URL (LRU acotada en memoria + un archivo de texto por URL en disco)"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_entries: int = CONTENT_CACHE_MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + ".txt")
+
+    def _remember(self, url: str, content: str) -> None:
+        self._memory[url] = content
+        self._memory.move_to_end(url)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, url: str) -> Optional[str]:
+        if url in self._memory:
+            self._memory.move_to_end(url)
+            return self._memory[url]
+        if self.cache_dir and os.path.exists(self._path(url)):
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                content = f.read()
+            self._remember(url, content)
+            return content
+        return None
+
+    def set(self, url: str, content: str) -> None:
+        self._remember(url, content)
+        if self.cache_dir:
+            path = self._path(url)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+
+class DomainLimiter:
+    """Limita las descargas simultáneas y el ritmo de peticiones por dominio"""
+
+    def __init__(self, max_per_domain: int = 2, min_interval: float = 1.0):
+        self.max_per_domain = max_per_domain
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    def acquire(self, domain: str) -> None:
+        with self._lock:
+            semaphore = self._semaphores.setdefault(domain, threading.BoundedSemaphore(self.max_per_domain))
+        semaphore.acquire()
+        # Reservar el siguiente turno del dominio y esperar fuera del lock
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def release(self, domain: str) -> None:
+        self._semaphores[domain].release()
+
+
+class ArticleEnricher:
+    """Descarga el texto completo de los artículos más prometedores"""
+
+    def __init__(self,
+                 fetch: Callable[[str], str],
+                 cache_dir: Optional[str] = None,
+                 max_workers: int = 8,
+                 max_per_domain: int = 2,
+                 min_interval: float = 1.0,
+                 max_chars: int = ENRICH_MAX_CHARS):
+        """
+        Args:
+            fetch: Función que devuelve el contenido de una URL (p. ej. jina_readpage)
+            cache_dir: Directorio de la caché de contenido (None: solo en memoria)
+            max_workers: Descargas simultáneas en total
+            max_per_domain: Descargas simultáneas por dominio
+            min_interval: Segundos mínimos entre peticiones al mismo dominio
+            max_chars: Caracteres máximos guardados por artículo
+        """
+        self.fetch = fetch
+        self.cache = ContentCache(cache_dir)
+        self.max_workers = max_workers
+        self.limiter = DomainLimiter(max_per_domain, min_interval)
+        self.max_chars = max_chars
+
+    def enrich(self,
+               articles: List[NewsArticle],
+               top_n: int,
+               score: Callable[[NewsArticle], float]) -> Dict:
+        """
+        Rellena article.content de los top_n artículos según su puntuación por snippet
+
+        Returns:
+            Métricas del enriquecimiento (candidatos, aciertos de caché, descargas, fallos, tiempo)
+        """
+        start = time.monotonic()
+        pending = [article for article in articles if article.url and not article.content]
+        candidates = sorted(pending, key=score, reverse=True)[:top_n]
+
+        metrics = {'candidates': len(candidates), 'cache_hits': 0, 'fetched': 0, 'failed': 0}
+        to_fetch = []
+        for article in candidates:
+            cached = self.cache.get(article.url)
+            if cached is not None:
+                article.content = cached
+                metrics['cache_hits'] += 1
+            else:
+                to_fetch.append(article)
+
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self._fetch_one, article.url): article for article in to_fetch}
+                for future in as_completed(futures):
+                    article = futures[future]
+                    content = future.result()
+                    if content:
+                        article.content = content
+                        self.cache.set(article.url, content)
+                        metrics['fetched'] += 1
+                    else:
+                        metrics['failed'] += 1
+
+        metrics['elapsed_seconds'] = round(time.monotonic() - start, 2)
+        return metrics
+
+    def _fetch_one(self, url: str) -> str:
+        """Descarga una URL respetando los límites de su dominio ("" si falla)"""
+
+        domain = urlparse(url).netloc.lower()
+        self.limiter.acquire(domain)
+        try:
+            content = self.fetch(url)
+        except Exception as e:
+            print(f"⚠️ Error descargando {url}: {e}")
+            return ""
+        finally:
+            self.limiter.release(domain)
+        return self._clean(content)
+
+    def _clean(self, content: str) -> str:
+        """Quita la cabecera del lector de páginas y recorta el contenido"""
+
+        if not content or content.startswith(FETCH_ERROR_PREFIXES):
+            return ""
+        marker = "Markdown Content:"
+        if marker in content:
+            content = content.split(marker, 1)[1]
+        return content.strip()[:self.max_chars]
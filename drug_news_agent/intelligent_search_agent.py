@@ -2,23 +2,43 @@
 Agente de búsqueda inteligente principal.
 Orquesta todo el sistema de búsqueda, análisis y geocodificación de noticias sobre drogas.
 """
+import hashlib
+import json
 import os
+import re
 import sys
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
 # Agregar el path del proyecto para importar las herramientas
 sys.path.append('/Users/macbook/Documents/AgenteWeb/WebAgent/WebDancer')
 
 from demos.tools.private.search import Search
-from demos.tools.private.visit import Visit
+from demos.tools.private.visit import Visit, jina_readpage
 from .data_loader import DataLoader
 from .relevance_classifier import NewsArticle, RelevanceClassifier, RelevanceScore
 from .deduplication import NewsDeduplicator, DuplicateGroup
 from .location_extractor import LocationExtractor, LocationInfo
 from .geocoder import GoogleMapsGeocoder, CachedGeocoder, GeocodingResult
+from .checkpoint import CheckpointStore
+from .country_index import CountryIndex
+from .enrichment import ArticleEnricher
+from .llm_classifier import BatchLLMClassifier, LLMExtraction
+from .query_planner import QueryPlanner
+from .url_canonicalizer import canonicalize_url, fold_duplicate_urls
+
+
+# Inicio de un resultado en la salida de Search: "12. [Título](URL)"
+ARTICLE_LINE = re.compile(r'\d+\. \[(.+?)\]\((.+?)\)')
+
+# Resultados por página de búsqueda (lo que Serper cobra como una petición)
+SEARCH_PAGE_SIZE = 10
+
+# Vertical e idioma de todas las búsquedas (el país depende de la consulta)
+SEARCH_TYPE = "news"
+SEARCH_LANGUAGE = "es"
 
 
 @dataclass
@@ -32,6 +52,7 @@ class ProcessedNews:
     geocoding_result: GeocodingResult
     is_duplicate: bool = False
     duplicate_group_id: str = ""
+    llm_extraction: Optional[LLMExtraction] = None
     
 
 @dataclass
@@ -46,7 +67,9 @@ class SearchResults:
 class IntelligentDrugNewsAgent:
     """Agente inteligente de búsqueda de noticias sobre drogas"""
     
-    def __init__(self, google_maps_api_key: str = None):
+    def __init__(self, google_maps_api_key: str = None, query_stats_path: str = None, query_budget: int = 25,
+                 enrich_top: int = 0, content_cache_dir: str = None,
+                 llm_classifier: Optional[BatchLLMClassifier] = None):
         print("🚀 Inicializando Agente de Noticias sobre Drogas...")
         
         # Cargar datos de referencia
@@ -59,17 +82,30 @@ class IntelligentDrugNewsAgent:
         self.relevance_classifier = RelevanceClassifier(self.data_loader)
         self.deduplicator = NewsDeduplicator()
         self.location_extractor = LocationExtractor(self.data_loader)
+        self.country_index = CountryIndex(self.data_loader.countries)
         
         # Inicializar geocodificador con caché
         base_geocoder = GoogleMapsGeocoder(google_maps_api_key)
         self.geocoder = CachedGeocoder(base_geocoder)
         
+        # Planificador de consultas (estadísticas de rendimiento entre ejecuciones)
+        self.query_planner = QueryPlanner(query_stats_path, budget=query_budget,
+                                          search_options=self._search_options)
+        
+        # Texto completo de los mejores candidatos (0 = solo snippets)
+        self.enrich_top = enrich_top
+        self.enricher = ArticleEnricher(jina_readpage, cache_dir=content_cache_dir)
+        
+        # Clasificación y extracción de entidades con LLM en lotes (opcional)
+        self.llm_classifier = llm_classifier
+        
         print("✅ Agente inicializado correctamente")
         
     def search_drug_news(self, 
                         days_back: int = 7,
                         max_articles_per_query: int = 20,
-                        min_relevance: str = "Media") -> SearchResults:
+                        min_relevance: str = "Media",
+                        checkpoint: Optional[CheckpointStore] = None) -> SearchResults:
         """
         Realiza búsqueda inteligente de noticias sobre drogas
         
@@ -77,50 +113,100 @@ class IntelligentDrugNewsAgent:
             days_back: Días hacia atrás para buscar noticias
             max_articles_per_query: Máximo artículos por consulta de búsqueda  
             min_relevance: Relevancia mínima (Alta, Media, Baja)
+            checkpoint: Almacén donde guardar el resultado de cada etapa. Si ya
+                contiene etapas completadas (reanudación), se cargan en lugar de
+                recalcularse y se usan los parámetros de la ejecución original.
         """
         start_time = datetime.now()
-        print(f"\n🔍 Iniciando búsqueda de noticias de los últimos {days_back} días...")
         
-        # 1. Generar consultas de búsqueda inteligentes
-        search_queries = self._generate_search_queries(days_back)
-        print(f"📝 Generadas {len(search_queries)} consultas de búsqueda")
+        if checkpoint is not None:
+            if checkpoint.params:
+                days_back = checkpoint.params['days_back']
+                max_articles_per_query = checkpoint.params['max_articles_per_query']
+                min_relevance = checkpoint.params['min_relevance']
+                print(f"♻️  Reanudando ejecución {checkpoint.run_id} "
+                      f"(última etapa completada: {checkpoint.last_completed_stage or 'ninguna'})")
+            else:
+                checkpoint.set_params(days_back=days_back, max_articles_per_query=max_articles_per_query,
+                                      min_relevance=min_relevance)
+                print(f"💾 Checkpoints de la ejecución {checkpoint.run_id} en {checkpoint.run_dir}")
+        
+        print(f"\n🔍 Iniciando búsqueda de noticias de los últimos {days_back} días...")
         
-        # 2. Realizar búsquedas
-        raw_articles = self._perform_searches(search_queries, max_articles_per_query)
+        # 1-2. Generar consultas de búsqueda inteligentes y realizar búsquedas
+        def search_stage():
+            queries = self._generate_search_queries()
+            print(f"📝 Generadas {len(queries)} consultas de búsqueda")
+            return (queries, *self._perform_searches(queries, max_articles_per_query, days_back))
+        search_queries, raw_articles, paging_metrics = self._run_stage(checkpoint, 'search', search_stage)
         print(f"📰 Encontrados {len(raw_articles)} artículos en total")
         
-        # 3. Filtrar por países objetivo
-        filtered_articles = self._filter_by_target_countries(raw_articles)
-        print(f"🌎 Filtrados {len(filtered_articles)} artículos de países objetivo\")
+        # 2b. Plegar resultados repetidos por URL canónica antes de procesar texto
+        folded_articles, url_dedup_metrics = self._run_stage(checkpoint, 'canonicalize',
+                                                             lambda: fold_duplicate_urls(raw_articles))
+        print(f"🔗 {len(folded_articles)} URLs únicas ({url_dedup_metrics['folded_duplicates']} repetidas, "
+              f"{url_dedup_metrics['fold_ratio']:.0%})")
         
-        # 4. Clasificar relevancia
-        classified_articles = self._classify_relevance(filtered_articles, min_relevance)
-        print(f"⭐ {len(classified_articles)} artículos cumplen criterios de relevancia\")
+        # 3. Filtrar por países objetivo
+        filtered_articles = self._run_stage(checkpoint, 'filter',
+                                            lambda: self._filter_by_target_countries(folded_articles))
+        print(f"🌎 Filtrados {len(filtered_articles)} artículos de países objetivo")
+        
+        # 3b. Descargar el texto completo de los artículos más prometedores
+        filtered_articles, enrichment_metrics = self._run_stage(checkpoint, 'enrich',
+                                                                lambda: self._enrich_articles(filtered_articles))
+        
+        # 3c. Relevancia y entidades con LLM (varios artículos por petición), antes del filtro de relevancia
+        llm_extractions = {}
+        if self.llm_classifier is not None:
+            llm_extractions = self._run_stage(checkpoint, 'llm',
+                                              lambda: self._llm_classify(filtered_articles))
+        
+        # 4. Clasificar relevancia (el nivel del LLM, si existe, decide qué artículos se conservan)
+        classified_articles = self._run_stage(checkpoint, 'classify',
+                                              lambda: self._classify_relevance(filtered_articles, min_relevance,
+                                                                               llm_extractions))
+        print(f"⭐ {len(classified_articles)} artículos cumplen criterios de relevancia")
         
         # 5. Deduplicar noticias
-        unique_articles, duplicate_groups = self._deduplicate_news(classified_articles)
-        print(f"🔄 Identificados {len(unique_articles)} eventos únicos, {len(duplicate_groups)} grupos duplicados\")
+        unique_articles, duplicate_groups = self._run_stage(checkpoint, 'deduplicate',
+                                                            lambda: self._deduplicate_news(classified_articles))
+        print(f"🔄 Identificados {len(unique_articles)} eventos únicos, {len(duplicate_groups)} grupos duplicados")
         
         # 6. Extraer ubicaciones
-        articles_with_locations = self._extract_locations(unique_articles)
-        print(f"📍 Extraídas ubicaciones de {len(articles_with_locations)} artículos\")
+        articles_with_locations = self._run_stage(checkpoint, 'locations',
+                                                  lambda: self._extract_locations(unique_articles))
+        print(f"📍 Extraídas ubicaciones de {len(articles_with_locations)} artículos")
         
         # 7. Geocodificar ubicaciones
-        final_results = self._geocode_locations(articles_with_locations)
-        print(f"🗺️  Geocodificados {len(final_results)} artículos\")
+        final_results = self._run_stage(checkpoint, 'geocode',
+                                        lambda: self._geocode_locations(articles_with_locations, llm_extractions))
+        print(f"🗺️  Geocodificados {len(final_results)} artículos")
         
-        # 8. Preparar resultados finales
+        # 8. Actualizar el rendimiento de cada consulta (una sola vez por ejecución, también al reanudar)
+        query_yield = self._run_stage(checkpoint, 'query_yield',
+                                      lambda: self._record_query_yield(search_queries, folded_articles, filtered_articles,
+                                                                       classified_articles, unique_articles))
+        
+        # 9. Preparar resultados finales
         processing_time = (datetime.now() - start_time).total_seconds()
         
         search_metrics = {
             'total_queries': len(search_queries),
             'raw_articles_found': len(raw_articles),
+            'unique_url_articles': len(folded_articles),
             'target_country_articles': len(filtered_articles),
             'relevant_articles': len(classified_articles),
             'unique_events': len(unique_articles),
             'duplicate_groups': len(duplicate_groups),
             'geocoded_articles': len(final_results),
-            'processing_time_seconds': processing_time
+            'processing_time_seconds': processing_time,
+            'query_yield': query_yield,
+            'search_paging': paging_metrics,
+            'search_cache': self.search_tool.cache.stats if self.search_tool.cache is not None else {},
+            'url_dedup': url_dedup_metrics,
+            'enrichment': enrichment_metrics,
+            'llm': dict(self.llm_classifier.stats) if self.llm_classifier is not None else {}
         }
         
         results = SearchResults(
@@ -130,96 +216,239 @@ class IntelligentDrugNewsAgent:
             processing_time=processing_time
         )
         
-        print(f"\\n✅ Búsqueda completada en {processing_time:.1f} segundos\")
+        print(f"\n✅ Búsqueda completada en {processing_time:.1f} segundos")
         return results
         
-    def _generate_search_queries(self, days_back: int) -> List[str]:
-        \"\"\"Genera consultas de búsqueda inteligentes\"\"\"
+    def _run_stage(self, checkpoint: Optional[CheckpointStore], stage: str, compute: Callable):
+        """Ejecuta una etapa o la recupera del checkpoint si ya estaba completada"""
+        
+        if checkpoint is not None and checkpoint.has(stage):
+            print(f"♻️  Etapa '{stage}' recuperada del checkpoint")
+            return checkpoint.load(stage)
+            
+        result = compute()
+        if checkpoint is not None:
+            checkpoint.save(stage, result)
+        return result
+        
+    def _generate_search_queries(self) -> List[str]:
+        """Genera consultas de búsqueda inteligentes"""
+        
+        candidates = self._candidate_queries()
+        queries = self.query_planner.plan(candidates)
+        
+        tried = sum(1 for query in queries if self.query_planner.was_tried(query))
+        print(f"🧭 Plan de consultas: {tried} ya probadas, {len(queries) - tried} nuevas "
+              f"({len(candidates)} candidatas)")
+        return queries
+        
+    def _candidate_queries(self) -> List[str]:
+        """
+        Todas las consultas posibles, en orden de prioridad (las primeras son el plan inicial)
+        
+        La ventana temporal no va en el texto: se aplica como filtro del buscador en _perform_searches.
+        """
         
         # Obtener palabras clave principales de drogas
         drug_categories = list(self.data_loader.drug_keywords.keys())
         
         # Países objetivo principales
         main_countries = [
-            \"Colombia\", \"México\", \"Argentina\", \"Brasil\", \"Perú\", 
-            \"Venezuela\", \"Chile\", \"Ecuador\", \"Bolivia\", \"Uruguay\"
+            "Colombia", "México", "Argentina", "Brasil", "Perú", 
+            "Venezuela", "Chile", "Ecuador", "Bolivia", "Uruguay"
         ]
         
         # Términos operativos
         operational_terms = [
-            \"incautación\", \"decomiso\", \"operativo\", \"captura\", 
-            \"narcotráfico\", \"drogas\", \"antinarcóticos\"
+            "incautación", "decomiso", "operativo", "captura", 
+            "narcotráfico", "drogas", "antinarcóticos"
         ]
         
+        def drug_country_queries(categories, countries):
+            for category in categories:
+                main_drug = self.data_loader.drug_keywords[category][0] if self.data_loader.drug_keywords[category] else category
+                for country in countries:
+                    yield f"{main_drug} {country}"
+                    
+        def operational_queries(terms, countries):
+            for term in terms:
+                for country in countries:
+                    yield f"{term} drogas {country}"
+        
         queries = []
         
-        # Consultas por categoría de droga + país
-        for category in drug_categories[:3]:  # Primeras 3 categorías más importantes
-            main_drug = self.data_loader.drug_keywords[category][0] if self.data_loader.drug_keywords[category] else category
-            for country in main_countries[:5]:  # Top 5 países
-                query = f"{main_drug} {country} últimos días\"
-                queries.append(query)
-                
-        # Consultas operativas generales
-        for term in operational_terms[:4]:
-            for country in main_countries[:3]:
-                query = f"{term} drogas {country} {days_back} días\"
-                queries.append(query)
-                
+        # Plan inicial: primeras 3 categorías x top 5 países, 4 términos x top 3 países
+        queries.extend(drug_country_queries(drug_categories[:3], main_countries[:5]))
+        queries.extend(operational_queries(operational_terms[:4], main_countries[:3]))
+        
         # Consultas regionales amplias
-        regional_queries = [
-            f"incautación drogas América Latina últimos {days_back} días\",
-            f"operativo antinarcóticos Sudamérica {days_back} días\",
-            f"decomiso cocaína Caribe {days_back} días\",
-            \"narcotráfico operaciones recientes América\"
-        ]
+        queries.extend([
+            "incautación drogas América Latina",
+            "operativo antinarcóticos Sudamérica",
+            "decomiso cocaína Caribe",
+            "narcotráfico operaciones recientes América"
+        ])
+        
+        # Resto del espacio para exploración
+        queries.extend(drug_country_queries(drug_categories, main_countries))
+        queries.extend(operational_queries(operational_terms, main_countries))
+        
+        return list(dict.fromkeys(queries))
+        
+    def _record_query_yield(self, queries: List[str], raw_articles: List[NewsArticle],
+                            filtered_articles: List[NewsArticle],
+                            classified_articles: List[Tuple[NewsArticle, RelevanceScore]],
+                            unique_articles: List[Tuple[NewsArticle, RelevanceScore]]) -> List[Dict]:
+        """Cuenta los aciertos de cada consulta en cada etapa y los registra en el planificador"""
+        
+        # También se registran las consultas ejecutadas sin resultados
+        counts = {query: {'raw_hits': 0, 'target_hits': 0, 'relevant_hits': 0, 'new_events': 0}
+                  for query in queries}
+        
+        def count(articles, name):
+            for article in articles:
+                for query in article.queries:
+                    if query in counts:
+                        counts[query][name] += 1
+                    
+        count(raw_articles, 'raw_hits')
+        count(filtered_articles, 'target_hits')
+        count((article for article, _ in classified_articles), 'relevant_hits')
         
-        queries.extend(regional_queries)
+        # Eventos únicos que no se habían visto en ejecuciones anteriores
+        new_events = [article for article, _ in unique_articles
+                      if self.query_planner.is_new_event(self._make_cui(article))]
+        count(new_events, 'new_events')
         
-        return queries[:25]  # Límite de consultas para optimizar tokens
+        return self.query_planner.record(counts, [self._make_cui(article) for article in new_events])
         
-    def _perform_searches(self, queries: List[str], max_per_query: int) -> List[NewsArticle]:
-        \"\"\"Realiza las búsquedas web\"\"\"
+    def _perform_searches(self, queries: List[str], max_per_query: int,
+                          days_back: int) -> Tuple[List[NewsArticle], Dict]:
+        """
+        Realiza las búsquedas web
         
-        all_articles = []
+        Los filtros se aplican en el buscador: vertical de noticias, rango de fechas de
+        days_back, idioma español y país (gl) de la consulta, así llegan menos artículos viejos.
+        Cada consulta pide páginas de hasta SEARCH_PAGE_SIZE resultados y solo pasa a la
+        siguiente mientras la última aportó artículos nuevos de países objetivo, sin superar
+        max_per_query artículos.
         
-        # Procesar consultas en lotes para optimizar
-        batch_size = 3
-        for i in range(0, len(queries), batch_size):
-            batch_queries = queries[i:i+batch_size]
-            
-            print(f"  🔍 Procesando lote {(i//batch_size)+1}/{(len(queries)-1)//batch_size+1}\")
-            
-            # Realizar búsqueda con múltiples consultas
-            search_params = {\"query\": batch_queries}
-            search_results = self.search_tool.call(str(search_params).replace(\"'\", '\"'))
-            
-            # Parsear resultados y convertir a NewsArticle objects
-            articles = self._parse_search_results(search_results, batch_queries)
-            all_articles.extend(articles)
-            
-            if len(all_articles) >= max_per_query * len(queries):
+        En las estadísticas, pages son las páginas de consulta pedidas, tool_calls las
+        llamadas (de hasta 3 consultas) a la herramienta, requests las peticiones HTTP a
+        Serper y cache_hits las páginas servidas desde la caché (sin petición).
+        
+        Returns:
+            Tupla (artículos, estadísticas de paginación)
+        """
+        
+        all_articles = []
+        page_size = max(1, min(max_per_query, SEARCH_PAGE_SIZE))
+        max_pages = -(-max_per_query // page_size)
+        collected = {query: 0 for query in queries}
+        seen_urls = set()
+        stats = {'pages': 0, 'tool_calls': 0, 'requests': 0, 'cache_hits': 0,
+                 'stopped_no_new_hits': 0, 'stopped_exhausted': 0, 'reached_limit': 0}
+        requests_before = dict(self.search_tool.request_stats)
+        
+        active = list(queries)
+        for page in range(1, max_pages + 1):
+            if not active:
                 break
+            still_active = []
+            for country_code, batch_queries in self._search_batches(active):
+                print(f"  🔍 Página {page}: {len(batch_queries)} consultas"
+                      f"{' (' + country_code + ')' if country_code else ''}")
                 
-        return all_articles
+                # Realizar búsqueda con múltiples consultas
+                search_params = {
+                    "query": batch_queries,
+                    "type": SEARCH_TYPE,
+                    "days_back": days_back,
+                    "hl": SEARCH_LANGUAGE,
+                    "num": page_size,
+                    "page": page,
+                }
+                if country_code:
+                    search_params["gl"] = country_code.lower()
+                search_results = self.search_tool.call(json.dumps(search_params, ensure_ascii=False))
+                stats['tool_calls'] += 1
+                stats['pages'] += len(batch_queries)
+                
+                # Parsear resultados y repartirlos por consulta
+                page_articles = {query: [] for query in batch_queries}
+                for article in self._parse_search_results(search_results, batch_queries):
+                    if article.queries and article.queries[0] in page_articles:
+                        page_articles[article.queries[0]].append(article)
+                        
+                for query, articles in page_articles.items():
+                    articles = articles[:max_per_query - collected[query]]
+                    collected[query] += len(articles)
+                    all_articles.extend(articles)
+                    
+                    # Aciertos nuevos de países objetivo en esta página
+                    new_hits = 0
+                    for article in articles:
+                        url = canonicalize_url(article.url)
+                        if url in seen_urls:
+                            continue
+                        seen_urls.add(url)
+                        if self.country_index.find(f"{article.title} {article.description}"):
+                            new_hits += 1
+                            
+                    if collected[query] >= max_per_query:
+                        stats['reached_limit'] += 1
+                    elif len(articles) < page_size:
+                        stats['stopped_exhausted'] += 1
+                    elif not new_hits:
+                        stats['stopped_no_new_hits'] += 1
+                    else:
+                        still_active.append(query)
+            active = still_active
+            
+        request_stats = self.search_tool.request_stats
+        stats['requests'] = request_stats['api_requests'] - requests_before['api_requests']
+        stats['cache_hits'] = request_stats['cache_hits'] - requests_before['cache_hits']
+        print(f"  📄 {stats['pages']} páginas: {stats['requests']} peticiones a Serper, {stats['cache_hits']} en caché "
+              f"({stats['stopped_no_new_hits']} consultas detenidas sin aciertos nuevos)")
+        return all_articles, stats
+        
+    def _search_options(self, query: str) -> Dict[str, Optional[str]]:
+        """Opciones del buscador con las que se ejecuta una consulta (clave de sus estadísticas)"""
+        
+        country_code = self.country_index.find(query)
+        return {'type': SEARCH_TYPE, 'hl': SEARCH_LANGUAGE, 'gl': country_code.lower() if country_code else None}
+        
+    def _search_batches(self, queries: List[str]) -> List[Tuple[Optional[str], List[str]]]:
+        """Lotes de hasta 3 consultas del mismo país (el país va como opción de toda la llamada)"""
+        
+        by_country: Dict[Optional[str], List[str]] = {}
+        for query in queries:
+            by_country.setdefault(self.country_index.find(query), []).append(query)
+        batch_size = 3
+        return [(country_code, country_queries[i:i + batch_size])
+                for country_code, country_queries in by_country.items()
+                for i in range(0, len(country_queries), batch_size)]
         
     def _parse_search_results(self, search_results: str, queries: List[str]) -> List[NewsArticle]:
-        \"\"\"Convierte resultados de búsqueda en objetos NewsArticle\"\"\"
+        """Convierte resultados de búsqueda en objetos NewsArticle"""
         
         articles = []
         
         # Dividir resultados por separador
-        if \"=======\" in search_results:
-            result_sections = search_results.split(\"=======\")
+        if "=======" in search_results:
+            result_sections = search_results.split("=======")
         else:
             result_sections = [search_results]
             
-        for section in result_sections:
+        # Cada sección corresponde a una consulta, en el mismo orden
+        section_queries = queries if len(result_sections) == len(queries) else [None] * len(result_sections)
+            
+        for section, query in zip(result_sections, section_queries):
             if not section.strip():
                 continue
                 
             # Extraer artículos individuales del texto
-            lines = section.strip().split('\\n')
+            lines = section.strip().split('\n')
             current_article = None
             
             for line in lines:
@@ -227,39 +456,38 @@ class IntelligentDrugNewsAgent:
                 if not line:
                     continue
                     
-                # Detectar inicio de nuevo artículo (formato: \"1. [Título](URL)\")
-                if line.startswith((\"1.\", \"2.\", \"3.\", \"4.\", \"5.\", \"6.\", \"7.\", \"8.\", \"9.\", \"10.\")):
+                # Detectar inicio de nuevo artículo (formato: "1. [Título](URL)")
+                match = ARTICLE_LINE.match(line)
+                if match:
                     if current_article:
                         articles.append(current_article)
                         
-                    # Extraer título y URL usando regex
-                    import re
-                    match = re.match(r'\\d+\\. \\[(.+?)\\]\\((.+?)\\)', line)
-                    if match:
-                        title = match.group(1)
-                        url = match.group(2)
-                        
-                        current_article = NewsArticle(
-                            title=title,
-                            description=\"\",
-                            content=\"\",
-                            url=url,
-                            date=datetime.now().strftime(\"%d/%m/%Y\"),
-                            source=self._extract_domain(url)
-                        )
-                        
+                    # Extraer título y URL
+                    title = match.group(1)
+                    url = match.group(2)
+                    
+                    current_article = NewsArticle(
+                        title=title,
+                        description="",
+                        content="",
+                        url=url,
+                        date=datetime.now().strftime("%d/%m/%Y"),
+                        source=self._extract_domain(url),
+                        queries=[query] if query else []
+                    )
+                    
                 elif current_article and line:
                     # Agregar línea como descripción/contenido
-                    if \"Date published:\" in line:
+                    if "Date published:" in line:
                         # Extraer fecha si está disponible
-                        current_article.date = line.split(\":\", 1)[1].strip()
-                    elif \"Source:\" in line:
+                        current_article.date = line.split(":", 1)[1].strip()
+                    elif "Source:" in line:
                         # Extraer fuente
-                        current_article.source = line.split(\":\", 1)[1].strip()
+                        current_article.source = line.split(":", 1)[1].strip()
                     else:
                         # Agregar como descripción
                         if current_article.description:
-                            current_article.description += \" \" + line
+                            current_article.description += " " + line
                         else:
                             current_article.description = line
                             
@@ -270,37 +498,58 @@ class IntelligentDrugNewsAgent:
         return articles
         
     def _extract_domain(self, url: str) -> str:
-        \"\"\"Extrae el dominio de una URL\"\"\"
+        """Extrae el dominio de una URL"""
         try:
             from urllib.parse import urlparse
             return urlparse(url).netloc
         except:
-            return \"unknown\"
+            return "unknown"
             
     def _filter_by_target_countries(self, articles: List[NewsArticle]) -> List[NewsArticle]:
-        \"\"\"Filtra artículos por países objetivo\"\"\"
+        """Filtra artículos por países objetivo"""
         
         filtered = []
         
-        for article in articles:
-            full_text = f"{article.title} {article.description}\".lower()
-            
-            # Verificar si menciona algún país objetivo
-            for country_code, country in self.data_loader.countries.items():
-                if country.name.lower() in full_text:
-                    article.country = country.name
-                    filtered.append(article)
-                    break
+        # Una sola pasada por artículo con el índice compilado (nombres, gentilicios, ISO)
+        country_codes = self.country_index.filter_batch(
+            f"{article.title} {article.description}" for article in articles
+        )
+        for article, country_code in zip(articles, country_codes):
+            if country_code:
+                article.country = self.data_loader.countries[country_code].name
+                filtered.append(article)
                     
         return filtered
         
-    def _classify_relevance(self, articles: List[NewsArticle], min_relevance: str) -> List[Tuple[NewsArticle, RelevanceScore]]:
-        \"\"\"Clasifica relevancia de los artículos\"\"\"
+    def _enrich_articles(self, articles: List[NewsArticle]) -> Tuple[List[NewsArticle], Dict]:
+        """Rellena el contenido completo de los enrich_top artículos con mejor snippet"""
+        
+        if not self.enrich_top or not articles:
+            return articles, {}
+        
+        metrics = self.enricher.enrich(
+            articles, self.enrich_top,
+            score=lambda article: self.relevance_classifier.classify_relevance(article).score
+        )
+        print(f"📄 Texto completo de {metrics['fetched'] + metrics['cache_hits']}/{metrics['candidates']} "
+              f"artículos ({metrics['cache_hits']} en caché, {metrics['failed']} fallidos, "
+              f"{metrics['elapsed_seconds']}s)")
+        return articles, metrics
+        
+    def _classify_relevance(self, articles: List[NewsArticle], min_relevance: str,
+                            llm_extractions: Optional[Dict[str, LLMExtraction]] = None) -> List[Tuple[NewsArticle, RelevanceScore]]:
+        """Clasifica relevancia de los artículos (el nivel del LLM tiene prioridad sobre las heurísticas)"""
         
         classified = self.relevance_classifier.batch_classify(articles)
+        for article, relevance in classified:
+            extraction = (llm_extractions or {}).get(self._make_cui(article))
+            if extraction is not None and extraction.relevance:
+                if extraction.relevance != relevance.level:
+                    relevance.reasons.append(f"Relevancia LLM: {extraction.relevance} (heurística: {relevance.level})")
+                relevance.level = extraction.relevance
         
         # Filtrar por relevancia mínima
-        relevance_order = {\"Baja\": 1, \"Media\": 2, \"Alta\": 3}
+        relevance_order = {"Baja": 1, "Media": 2, "Alta": 3}
         min_level = relevance_order.get(min_relevance, 2)
         
         filtered = []
@@ -312,7 +561,7 @@ class IntelligentDrugNewsAgent:
         return filtered
         
     def _deduplicate_news(self, classified_articles: List[Tuple[NewsArticle, RelevanceScore]]) -> Tuple[List[Tuple[NewsArticle, RelevanceScore]], List[DuplicateGroup]]:
-        \"\"\"Deduplica noticias similares\"\"\"
+        """Deduplica noticias similares"""
         
         articles = [item[0] for item in classified_articles]
         unique_articles, duplicate_groups, metrics = self.deduplicator.deduplicate(articles)
@@ -329,7 +578,7 @@ class IntelligentDrugNewsAgent:
         return unique_with_scores, duplicate_groups
         
     def _extract_locations(self, articles_with_scores: List[Tuple[NewsArticle, RelevanceScore]]) -> List[Tuple[NewsArticle, RelevanceScore, LocationInfo]]:
-        \"\"\"Extrae información de ubicación\"\"\"
+        """Extrae información de ubicación"""
         
         results = []
         articles = [item[0] for item in articles_with_scores]
@@ -343,8 +592,9 @@ class IntelligentDrugNewsAgent:
             
         return results
         
-    def _geocode_locations(self, articles_with_locations: List[Tuple[NewsArticle, RelevanceScore, LocationInfo]]) -> List[ProcessedNews]:
-        \"\"\"Geocodifica las ubicaciones extraídas\"\"\"
+    def _geocode_locations(self, articles_with_locations: List[Tuple[NewsArticle, RelevanceScore, LocationInfo]],
+                           llm_extractions: Optional[Dict[str, LLMExtraction]] = None) -> List[ProcessedNews]:
+        """Geocodifica las ubicaciones extraídas y crea las noticias procesadas"""
         
         processed_news = []
         
@@ -353,25 +603,58 @@ class IntelligentDrugNewsAgent:
             geocoding_result = self.geocoder.geocode_location(location)
             
             # Crear objeto ProcessedNews
+            cui = self._make_cui(article)
             processed = ProcessedNews(
                 article_id=f'A{str(uuid.uuid4())[:7]}',
-                cui=f'CUI{str(uuid.uuid4())[:6]}',
+                cui=cui,
                 article=article,
                 relevance=relevance,
                 location_info=location,
-                geocoding_result=geocoding_result
+                geocoding_result=geocoding_result,
+                llm_extraction=(llm_extractions or {}).get(cui)
             )
             
             processed_news.append(processed)
             
         return processed_news
+        
+    def _llm_classify(self, articles: List[NewsArticle]) -> Dict[str, LLMExtraction]:
+        """Extracción LLM de cada artículo, por CUI (los que el modelo no devolvió no aparecen)"""
+        
+        extractions = self.llm_classifier.classify(articles)
+        
+        stats = self.llm_classifier.stats
+        print(f"🤖 Clasificados con LLM {sum(e is not None for e in extractions)}/{len(articles)} artículos "
+              f"({stats['requests']} peticiones, {stats['cache_hits']} en caché)")
+        return {self._make_cui(article): extraction
+                for article, extraction in zip(articles, extractions) if extraction is not None}
+        
+    @staticmethod
+    def _make_cui(article: NewsArticle) -> str:
+        """CUI estable derivado de la URL canónica, para que el mismo artículo tenga el mismo CUI en cada ejecución"""
+        
+        key = article.canonical_url or article.url or f"{article.source}|{article.title}"
+        return f'CUI{hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]}'
 
 
-if __name__ == \"__main__\":
+if __name__ == "__main__":
     # Test del agente completo
     agent = IntelligentDrugNewsAgent()
     
-    print(\"\\n🧪 Realizando búsqueda de prueba...\")
-    results = agent.search_drug_news(days_back=7, max_articles_per_query=5, min_relevance=\"Media\")
+    print("\n🧪 Realizando búsqueda de prueba...")
+    results = agent.search_drug_news(days_back=7, max_articles_per_query=5, min_relevance="Media")
+    
+    print(f"\n📊 Resultados:")
+    print(f"- Artículos procesados: {len(results.processed_news)}")
+    print(f"- Grupos duplicados: {len(results.duplicate_groups)}")
+    print(f"- Tiempo de procesamiento: {results.processing_time:.1f} segundos")
     
-    print(f"\\n📊 Resultados:\")\n    print(f"- Artículos procesados: {len(results.processed_news)}\")\n    print(f"- Grupos duplicados: {len(results.duplicate_groups)}\")\n    print(f"- Tiempo de procesamiento: {results.processing_time:.1f} segundos\")\n    \n    if results.processed_news:\n        print(f"\\n📰 Primer artículo:\")\n        first = results.processed_news[0]\n        print(f"- Título: {first.article.title}\")\n        print(f"- Relevancia: {first.relevance.level} ({first.relevance.score:.1f})\")\n        print(f"- Ubicación: {first.location_info.full_address}\")\n        if first.geocoding_result.success:\n            coords = first.geocoding_result.coordinates\n            print(f"- Coordenadas: {coords.latitude}, {coords.longitude}\")"
\ No newline at end of file
+    if results.processed_news:
+        print(f"\n📰 Primer artículo:")
+        first = results.processed_news[0]
+        print(f"- Título: {first.article.title}")
+        print(f"- Relevancia: {first.relevance.level} ({first.relevance.score:.1f})")
+        print(f"- Ubicación: {first.location_info.full_address}")
+        if first.geocoding_result.success:
+            coords = first.geocoding_result.coordinates
+            print(f"- Coordenadas: {coords.latitude}, {coords.longitude}")
@@ -0,0 +1,202 @@
+"""
+Clasificación asistida por LLM en lotes.
+Envía varios artículos por petición (modo JSON) a un endpoint compatible con
+OpenAI para obtener relevancia y entidades (droga, cantidad, unidad, fuerza
+interviniente, ubicación), con lotes en paralelo y caché por hash de contenido.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from .relevance_classifier import NewsArticle
+
+
+DEFAULT_LLM_API_BASE = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+DEFAULT_LLM_MODEL = "qwen2.5-72b-instruct"
+
+# Cambiar al modificar el prompt invalida las entradas de caché anteriores
+PROMPT_VERSION = "1"
+
+BATCH_PROMPT = """Eres un analista de noticias sobre narcotráfico en América Latina y el Caribe.
+Para cada artículo de la lista, evalúa su relevancia para el registro de incautaciones de drogas
+y extrae las entidades del evento principal.
+
+Responde SOLO con un objeto JSON con esta forma:
+{{"articulos": [{{"id": 0, "relevancia": "Alta|Media|Baja", "droga": "string", "cantidad": number|null,
+"unidad": "string", "fuerza": "string", "ubicacion": "string"}}]}}
+
+- "relevancia": Alta si describe una incautación, detención u operativo concreto; Media si trata
+  el narcotráfico en general; Baja si no trata sobre drogas.
+- "cantidad" y "unidad": la cantidad incautada tal como aparece (p. ej. 500 y "kg"); null y "" si no hay.
+- "fuerza": institución que intervino (p. ej. "Policía Nacional"); "" si no se menciona.
+- "ubicacion": lugar del evento lo más específico posible; "" si no se menciona.
+- Incluye un objeto por cada id recibido.
+
+ARTÍCULOS:
+{articles}"""
+
+
+@dataclass
+class LLMExtraction:
+    """Relevancia y entidades extraídas por el modelo para un artículo"""
+    relevance: str = ""
+    drug: str = ""
+    quantity: Optional[float] = None
+    unit: str = ""
+    enforcement_force: str = ""
+    location: str = ""
+
+
+class BatchLLMClassifier:
+    """Clasificador LLM que agrupa varios artículos por petición"""
+
+    def __init__(self,
+                 api_base: Optional[str] = None,
+                 api_key: Optional[str] = None,
+                 model: str = DEFAULT_LLM_MODEL,
+                 batch_size: int = 10,
+                 max_parallel: int = 4,
+                 max_chars_per_article: int = 800,
+                 cache_path: Optional[str] = None,
+                 timeout: float = 120.0):
+        """
+        Args:
+            api_base: URL base del endpoint compatible con OpenAI (default: DashScope)
+            api_key: API key (default: DASHSCOPE_API_KEY)
+            model: Modelo a usar
+            batch_size: Artículos por petición
+            max_parallel: Peticiones simultáneas
+            max_chars_per_article: Caracteres de texto enviados por artículo
+            cache_path: Archivo JSONL de caché por hash de contenido (None: solo en memoria)
+        """
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=api_key or os.getenv('DASHSCOPE_API_KEY') or 'EMPTY',
+                             base_url=api_base or DEFAULT_LLM_API_BASE, timeout=timeout)
+        self.model = model
+        self.batch_size = batch_size
+        self.max_parallel = max_parallel
+        self.max_chars_per_article = max_chars_per_article
+        self.cache_path = cache_path
+        self.cache: Dict[str, LLMExtraction] = {}
+        self._cache_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'articles': 0, 'cache_hits': 0, 'requests': 0, 'failed_articles': 0}
+        self._load_cache()
+
+    def classify(self, articles: List[NewsArticle]) -> List[Optional[LLMExtraction]]:
+        """Clasifica los artículos en lotes; None para los que el modelo no devolvió"""
+
+        keys = [self._content_key(article) for article in articles]
+        results: List[Optional[LLMExtraction]] = [self.cache.get(key) for key in keys]
+        self._count('articles', len(articles))
+        self._count('cache_hits', sum(result is not None for result in results))
+
+        # Artículos sin caché (un mismo contenido repetido se envía una sola vez)
+        pending: Dict[str, NewsArticle] = {}
+        for key, article, result in zip(keys, articles, results):
+            if result is None:
+                pending.setdefault(key, article)
+
+        items = list(pending.items())
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        if batches:
+            with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+                futures = [executor.submit(self._classify_batch, batch) for batch in batches]
+                for future in as_completed(futures):
+                    self._store(future.result())
+
+        results = [self.cache.get(key) for key in keys]
+        self._count('failed_articles', sum(result is None for result in results))
+        return results
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        """Suma a una estadística (los lotes se procesan en varios hilos)"""
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _content_key(self, article: NewsArticle) -> str:
+        text = self._article_text(article)
+        return hashlib.sha1(f"{PROMPT_VERSION}|{self.model}|{article.title}|{text}".encode('utf-8')).hexdigest()
+
+    def _article_text(self, article: NewsArticle) -> str:
+        return f"{article.description} {article.content}".strip()[:self.max_chars_per_article]
+
+    def _classify_batch(self, batch: List) -> Dict[str, LLMExtraction]:
+        """Una petición para un lote de (clave, artículo); devuelve las extracciones por clave"""
+
+        payload = [{'id': i, 'titulo': article.title, 'texto': self._article_text(article)}
+                   for i, (_, article) in enumerate(batch)]
+        messages = [{'role': 'user', 'content': BATCH_PROMPT.format(
+            articles=json.dumps(payload, ensure_ascii=False, indent=1))}]
+
+        for attempt in range(2):
+            try:
+                self._count('requests')
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    temperature=0,
+                )
+                raw = response.choices[0].message.content or ""
+                raw = raw.replace("```json", "").replace("```", "").strip()
+                items = json.loads(raw).get('articulos', [])
+                break
+            except Exception as e:
+                print(f"⚠️ Error en lote LLM ({len(batch)} artículos, intento {attempt + 1}): {e}")
+                items = []
+
+        extracted = {}
+        for item in items:
+            try:
+                key = batch[int(item['id'])][0]
+            except (KeyError, IndexError, TypeError, ValueError):
+                continue
+            extracted[key] = self._parse_item(item)
+        return extracted
+
+    @staticmethod
+    def _parse_item(item: Dict) -> LLMExtraction:
+        relevance = str(item.get('relevancia') or '').strip().capitalize()
+        quantity = item.get('cantidad')
+        try:
+            quantity = float(str(quantity).replace(',', '.')) if quantity not in (None, '') else None
+        except ValueError:
+            quantity = None
+        return LLMExtraction(
+            relevance=relevance if relevance in ('Alta', 'Media', 'Baja') else '',
+            drug=str(item.get('droga') or '').strip(),
+            quantity=quantity,
+            unit=str(item.get('unidad') or '').strip(),
+            enforcement_force=str(item.get('fuerza') or '').strip(),
+            location=str(item.get('ubicacion') or '').strip(),
+        )
+
+    def _load_cache(self) -> None:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        with open(self.cache_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.cache[entry['key']] = LLMExtraction(**entry['value'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def _store(self, extracted: Dict[str, LLMExtraction]) -> None:
+        """Guarda las extracciones de un lote (append al JSONL de caché)"""
+
+        if not extracted:
+            return
+        with self._cache_lock:
+            self.cache.update(extracted)
+            if self.cache_path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+                with open(self.cache_path, 'a', encoding='utf-8') as f:
+                    for key, value in extracted.items():
+                        f.write(json.dumps({'key': key, 'value': asdict(value)}, ensure_ascii=False) + '\n')
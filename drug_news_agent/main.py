@@ -15,6 +15,10 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from intelligent_search_agent import IntelligentDrugNewsAgent
 from csv_exporter import CentroRegionalCSVExporter
+from aggregation import NewsAggregator
+from daemon import run_daemon
+from checkpoint import CheckpointStore
+from llm_classifier import BatchLLMClassifier
 
 
 def main():
@@ -59,6 +63,25 @@ def main():
         help='Directorio de salida (default: ./output)'
     )
     
+    parser.add_argument(
+        '--xlsx',
+        action='store_true',
+        help='Exportar también a XLSX (escritura en memoria constante)'
+    )
+    
+    parser.add_argument(
+        '--parquet',
+        action='store_true',
+        help='Exportar también a Parquet con tipos reales (requiere pyarrow)'
+    )
+    
+    parser.add_argument(
+        '--dataset-dir',
+        type=str,
+        default=None,
+        help='Agregar también los resultados a un dataset particionado por Año/Mes/Pais en este directorio'
+    )
+    
     parser.add_argument(
         '--google-maps-key',
         type=str,
@@ -71,6 +94,89 @@ def main():
         help='Ejecutar búsqueda rápida de prueba'
     )
     
+    parser.add_argument(
+        '--query-budget',
+        type=int,
+        default=25,
+        help='Número de consultas por búsqueda (default: 25)'
+    )
+    
+    parser.add_argument(
+        '--query-stats',
+        type=str,
+        default=None,
+        help='Estadísticas de rendimiento por consulta (default: <output-dir>/query_stats.json)'
+    )
+    
+    parser.add_argument(
+        '--enrich-top',
+        type=int,
+        default=0,
+        help='Descargar el texto completo de los N artículos con mejor snippet (default: 0, solo snippets)'
+    )
+    
+    parser.add_argument(
+        '--llm-classify',
+        action='store_true',
+        help='Relevancia y entidades con LLM, varios artículos por petición'
+    )
+    
+    parser.add_argument(
+        '--llm-api-base',
+        type=str,
+        default=None,
+        help='Endpoint compatible con OpenAI para --llm-classify (default: DashScope)'
+    )
+    
+    parser.add_argument(
+        '--llm-model',
+        type=str,
+        default='qwen2.5-72b-instruct',
+        help='Modelo para --llm-classify (default: qwen2.5-72b-instruct)'
+    )
+    
+    parser.add_argument(
+        '--llm-batch-size',
+        type=int,
+        default=10,
+        help='Artículos por petición LLM (default: 10)'
+    )
+    
+    parser.add_argument(
+        '--checkpoint-dir',
+        type=str,
+        default=None,
+        help='Directorio de checkpoints por etapa (default: <output-dir>/checkpoints)'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        type=str,
+        metavar='RUN_ID',
+        default=None,
+        help='Reanudar la ejecución RUN_ID desde la última etapa completada'
+    )
+    
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Ejecutar en modo daemon: búsquedas periódicas solo desde el último watermark'
+    )
+    
+    parser.add_argument(
+        '--interval-minutes',
+        type=int,
+        default=60,
+        help='Minutos entre ciclos en modo daemon (default: 60)'
+    )
+    
+    parser.add_argument(
+        '--state-file',
+        type=str,
+        default=None,
+        help='Archivo de estado del daemon (default: <output-dir>/daemon_state.json)'
+    )
+    
     parser.add_argument(
         '--verbose',
         action='store_true',
@@ -97,19 +203,49 @@ def main():
     print(f"• Directorio de salida: {output_dir.absolute()}")
     print(f"• Google Maps API: {'✅ Configurada' if args.google_maps_key else '❌ No configurada (usando coordenadas aproximadas)'}")
     
+    checkpoint = None
+    
     try:
         # Inicializar el agente
         print(f"\\n🔧 Inicializando sistema...")
-        agent = IntelligentDrugNewsAgent(google_maps_api_key=args.google_maps_key)
+        agent = IntelligentDrugNewsAgent(
+            google_maps_api_key=args.google_maps_key,
+            query_stats_path=args.query_stats or str(output_dir / "query_stats.json"),
+            query_budget=args.query_budget,
+            enrich_top=args.enrich_top,
+            content_cache_dir=str(output_dir / "content_cache"),
+            llm_classifier=BatchLLMClassifier(
+                api_base=args.llm_api_base,
+                model=args.llm_model,
+                batch_size=args.llm_batch_size,
+                cache_path=str(output_dir / "llm_cache.jsonl")
+            ) if args.llm_classify else None
+        )
+        
+        if args.daemon:
+            # El agente (datos de referencia, caché de geocodificación) se reutiliza en cada ciclo
+            run_daemon(agent, CentroRegionalCSVExporter(), args, str(output_dir))
+            return
+        
+        # Checkpoints por etapa (nuevos o de la ejecución a reanudar)
+        checkpoint_dir = args.checkpoint_dir or str(output_dir / "checkpoints")
+        if args.resume:
+            checkpoint = CheckpointStore.resume(checkpoint_dir, args.resume)
+        else:
+            checkpoint = CheckpointStore(checkpoint_dir)
         
         # Realizar búsqueda
         print(f"\\n🔍 Ejecutando búsqueda inteligente...")
         results = agent.search_drug_news(
             days_back=args.days,
             max_articles_per_query=args.max_articles,
-            min_relevance=args.min_relevance
+            min_relevance=args.min_relevance,
+            checkpoint=checkpoint
         )
         
+        # Agregar estadísticas una sola vez para el reporte y la consola
+        aggregator = NewsAggregator.from_results(results)
+        
         # Mostrar resumen de resultados
         print_results_summary(results, args.verbose)
         
@@ -118,18 +254,31 @@ def main():
         exporter = CentroRegionalCSVExporter()
         
         csv_file = exporter.export_to_csv(results, str(output_dir))
-        report_file = exporter.export_summary_report(results, str(output_dir))
+        report_file = exporter.export_summary_report(results, str(output_dir), aggregator)
+        
+        xlsx_file = exporter.export_to_xlsx(results.processed_news, str(output_dir)) if args.xlsx else None
+        parquet_file = exporter.export_to_parquet(results.processed_news, str(output_dir)) if args.parquet else None
+        
+        if args.dataset_dir:
+            exporter.export_to_dataset(results.processed_news, args.dataset_dir)
         
         print(f"\\n✅ PROCESO COMPLETADO EXITOSAMENTE")
         print(f"📁 Archivos generados:")
         print(f"   • CSV: {csv_file}")
         print(f"   • Reporte: {report_file}")
+        if xlsx_file:
+            print(f"   • XLSX: {xlsx_file}")
+        if parquet_file:
+            print(f"   • Parquet: {parquet_file}")
+        if args.dataset_dir:
+            print(f"   • Dataset: {args.dataset_dir}")
         
         # Mostrar estadísticas finales
-        print_final_statistics(results)
+        print_final_statistics(results, aggregator)
         
     except KeyboardInterrupt:
         print(f"\\n⚠️ Proceso interrumpido por el usuario")
+        print_resume_hint(checkpoint)
         sys.exit(1)
         
     except Exception as e:
@@ -137,9 +286,18 @@ def main():
         if args.verbose:
             import traceback
             traceback.print_exc()
+        print_resume_hint(checkpoint)
         sys.exit(1)
 
 
+def print_resume_hint(checkpoint):
+    """Indica cómo reanudar si ya hay etapas guardadas"""
+    
+    if checkpoint is not None and checkpoint.last_completed_stage:
+        print(f"💾 Etapas completadas guardadas (última: {checkpoint.last_completed_stage})")
+        print(f"   Reanudar con: python main.py --resume {checkpoint.run_id}")
+
+
 def print_results_summary(results, verbose=False):
     """Imprime resumen de resultados"""
     
@@ -148,7 +306,15 @@ def print_results_summary(results, verbose=False):
     
     metrics = results.search_metrics
     print(f"• Consultas realizadas: {metrics['total_queries']}")
-    print(f"• Artículos encontrados: {metrics['raw_articles_found']}")
+    print(f"• Artículos encontrados: {metrics['raw_articles_found']}"
+          + (f" ({metrics['unique_url_articles']} URLs únicas)" if 'unique_url_articles' in metrics else ""))
+    if metrics.get('search_paging'):
+        print(f"• Páginas de búsqueda solicitadas: {metrics['search_paging']['pages']} "
+              f"({metrics['search_paging']['requests']} peticiones a Serper, "
+              f"{metrics['search_paging'].get('cache_hits', 0)} en caché)")
+    if metrics.get('url_dedup'):
+        print(f"• Resultados repetidos plegados por URL: {metrics['url_dedup']['folded_duplicates']} "
+              f"({metrics['url_dedup']['fold_ratio']:.0%} de {metrics['url_dedup']['raw_hits']})")
     print(f"• Artículos de países objetivo: {metrics['target_country_articles']}")
     print(f"• Artículos relevantes: {metrics['relevant_articles']}")
     print(f"• Eventos únicos identificados: {metrics['unique_events']}")
@@ -156,6 +322,11 @@ def print_results_summary(results, verbose=False):
     print(f"• Artículos geocodificados: {metrics['geocoded_articles']}")
     print(f"• Tiempo de procesamiento: {metrics['processing_time_seconds']:.1f}s")
     
+    if verbose and metrics.get('query_yield'):
+        print(f"\n🧭 Consultas con mayor rendimiento:")
+        for item in metrics['query_yield'][:5]:
+            print(f"   • {item['query']}: {item['relevant_hits']} relevantes, {item['new_events']} eventos nuevos")
+    
     if verbose and results.processed_news:
         print(f"\\n📰 MUESTRA DE ARTÍCULOS PROCESADOS:")
         print(f"-" * 40)
@@ -172,47 +343,32 @@ def print_results_summary(results, verbose=False):
                 print(f"   • Coordenadas: {coords.latitude:.4f}, {coords.longitude:.4f}")
 
 
-def print_final_statistics(results):
+def print_final_statistics(results, aggregator=None):
     """Imprime estadísticas finales"""
     
-    print(f"\\n🎯 ESTADÍSTICAS FINALES:")
-    print(f"-" * 30)
+    aggregator = aggregator or NewsAggregator.from_results(results)
     
-    # Contar por relevancia
-    relevance_counts = {'Alta': 0, 'Media': 0, 'Baja': 0}
-    country_counts = {}
-    drug_counts = {}
-    
-    for news in results.processed_news:
-        relevance_counts[news.relevance.level] += 1
-        
-        country = news.location_info.country or "Sin especificar"
-        country_counts[country] = country_counts.get(country, 0) + 1
-        
-        for drug in news.relevance.drug_mentions:
-            drug_counts[drug] = drug_counts.get(drug, 0) + 1
+    print(f"\n🎯 ESTADÍSTICAS FINALES:")
+    print(f"-" * 30)
     
-    print(f"\\n📈 Por relevancia:")
-    for level, count in relevance_counts.items():
-        percentage = (count / len(results.processed_news)) * 100 if results.processed_news else 0
-        print(f"   • {level}: {count} ({percentage:.1f}%)")
+    print(f"\n📈 Por relevancia:")
+    for level, count in aggregator.relevance.items():
+        print(f"   • {level}: {count} ({aggregator.percentage(count):.1f}%)")
     
-    print(f"\\n🌎 Top países:")
-    sorted_countries = sorted(country_counts.items(), key=lambda x: x[1], reverse=True)
-    for country, count in sorted_countries[:5]:
+    print(f"\n🌎 Top países:")
+    for country, count in aggregator.top('countries', 5):
         print(f"   • {country}: {count} artículos")
     
-    if drug_counts:
-        print(f"\\n💊 Drogas más mencionadas:")
-        sorted_drugs = sorted(drug_counts.items(), key=lambda x: x[1], reverse=True)
-        for drug, count in sorted_drugs[:5]:
+    if aggregator.drugs:
+        print(f"\n💊 Drogas más mencionadas:")
+        for drug, count in aggregator.top('drugs', 5):
             print(f"   • {drug}: {count} menciones")
     
     # Efectividad del sistema
     if results.search_metrics['raw_articles_found'] > 0:
-        efficiency = (len(results.processed_news) / results.search_metrics['raw_articles_found']) * 100
-        print(f"\\n⚡ Eficiencia del filtrado: {efficiency:.1f}%")
-        print(f"   ({len(results.processed_news)} artículos útiles de {results.search_metrics['raw_articles_found']} encontrados)")
+        efficiency = (aggregator.total / results.search_metrics['raw_articles_found']) * 100
+        print(f"\n⚡ Eficiencia del filtrado: {efficiency:.1f}%")
+        print(f"   ({aggregator.total} artículos útiles de {results.search_metrics['raw_articles_found']} encontrados)")
 
 
 def check_environment():
@@ -0,0 +1,108 @@
+"""
+Servidor LLM simulado compatible con OpenAI (/v1/chat/completions).
+Responde a los lotes de BatchLLMClassifier con extracciones deterministas
+basadas en palabras clave, para probar la etapa LLM sin coste ni red:
+
+    python -m drug_news_agent.mock_llm_server --port 8765
+    python main.py --quick-test --llm-classify --llm-api-base http://127.0.0.1:8765/v1
+"""
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DRUGS = ('cocaína', 'marihuana', 'heroína', 'fentanilo', 'metanfetamina', 'éxtasis', 'clorhidrato de cocaína')
+FORCES = ('Policía Nacional', 'Armada', 'Ejército', 'Fiscalía', 'Guardia Nacional', 'DEA', 'Policía')
+QUANTITY_PATTERN = re.compile(r'(\d+(?:[.,]\d+)?)\s*(toneladas?|kilos?|kilogramos?|kg|gramos?|g)\b', re.IGNORECASE)
+EVENT_PATTERN = re.compile(r'incaut|decomis|detenid|captur|operativo', re.IGNORECASE)
+PLACE_PATTERN = re.compile(r'\ben ([A-ZÁÉÍÓÚ][\wáéíóúñ]+(?: [A-ZÁÉÍÓÚ][\wáéíóúñ]+)*)')
+
+
+def mock_extraction(article: dict) -> dict:
+    text = f"{article.get('titulo', '')}. {article.get('texto', '')}"
+    lower = text.lower()
+    drug = next((drug for drug in DRUGS if drug in lower), "")
+    quantity = QUANTITY_PATTERN.search(text)
+    force = next((force for force in FORCES if force.lower() in lower), "")
+    place = PLACE_PATTERN.search(text)
+    if drug and EVENT_PATTERN.search(text):
+        relevance = "Alta"
+    elif drug or 'narco' in lower:
+        relevance = "Media"
+    else:
+        relevance = "Baja"
+    return {
+        'id': article.get('id'),
+        'relevancia': relevance,
+        'droga': drug,
+        'cantidad': float(quantity.group(1).replace(',', '.')) if quantity else None,
+        'unidad': quantity.group(2).lower() if quantity else "",
+        'fuerza': force,
+        'ubicacion': place.group(1) if place else "",
+    }
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    requests_served = 0
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        prompt = body.get('messages', [{}])[-1].get('content', '')
+        try:
+            articles = json.loads(prompt.split("ARTÍCULOS:", 1)[1])
+        except (IndexError, ValueError):
+            articles = []
+
+        time.sleep(self.latency)
+        type(self).requests_served += 1
+        content = json.dumps({'articulos': [mock_extraction(article) for article in articles]}, ensure_ascii=False)
+        response = {
+            'id': f'mock-{self.requests_served}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'mock'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4,
+                      'total_tokens': (len(prompt) + len(content)) // 4},
+        }
+        data = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, latency: float = 0.0) -> ThreadingHTTPServer:
+    """Crea el servidor (llamar a serve_forever(), p. ej. en un hilo)"""
+    MockLLMHandler.latency = latency
+    return ThreadingHTTPServer((host, port), MockLLMHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor LLM simulado compatible con OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Segundos de espera por petición")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency)
+    print(f"🤖 Servidor LLM simulado en http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n⚠️ Servidor detenido ({MockLLMHandler.requests_served} peticiones)")
+
+
+if __name__ == "__main__":
+    main()
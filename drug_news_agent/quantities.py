@@ -0,0 +1,146 @@
+"""
+Extractor de cantidades incautadas.
+Recorre el texto de un artículo una sola vez con una expresión regular compilada
+y devuelve cada mención (número, unidad, sustancia), con las masas normalizadas
+a kilogramos. El resultado se guarda en el propio artículo para que la
+deduplicación, el clasificador y el exportador no vuelvan a analizar el texto.
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .country_index import strip_accents
+
+
+# Unidad canónica de cada forma escrita ('u' = unidades contables)
+UNIT_ALIASES = {
+    'toneladas': 't', 'tonelada': 't', 'ton': 't', 'tn': 't',
+    'kilogramos': 'kg', 'kilogramo': 'kg', 'kilos': 'kg', 'kilo': 'kg', 'kgs': 'kg', 'kg': 'kg',
+    'gramos': 'g', 'gramo': 'g', 'grs': 'g', 'gr': 'g', 'g': 'g',
+    'miligramos': 'mg', 'miligramo': 'mg', 'mg': 'mg',
+    'libras': 'lb', 'libra': 'lb', 'lbs': 'lb', 'lb': 'lb',
+    'onzas': 'oz', 'onza': 'oz',
+    'dosis': 'u', 'pastillas': 'u', 'pastilla': 'u', 'comprimidos': 'u', 'pildoras': 'u',
+    'plantas': 'u', 'paquetes': 'u', 'panelas': 'u', 'ladrillos': 'u', 'bloques': 'u',
+}
+
+KG_FACTORS = {'t': 1000.0, 'kg': 1.0, 'g': 0.001, 'mg': 0.000001, 'lb': 0.45359237, 'oz': 0.028349523125}
+
+# Sustancias (sin tildes) que pueden seguir a la unidad: "500 kilos de cocaina"
+SUBSTANCES = (
+    'cocaina', 'marihuana', 'marijuana', 'cannabis', 'heroina', 'fentanilo', 'metanfetamina',
+    'anfetamina', 'extasis', 'mdma', 'lsd', 'tusi', 'ketamina', 'crack', 'cristal', 'hachis',
+    'hoja de coca', 'pasta base', 'opio', 'precursores quimicos',
+)
+
+MONEY_UNIT = 'USD'
+
+_MULTIPLIERS = {'mil': 1e3, 'millon': 1e6, 'millones': 1e6}
+
+
+def _alternation(words) -> str:
+    return '|'.join(re.escape(word).replace(r'\ ', r'\s+') for word in sorted(words, key=len, reverse=True))
+
+
+# Miles agrupados con punto (1.200,5) o con coma (1,200.5); el primer grupo no empieza por 0
+_DOT_GROUPED = r'[1-9]\d{0,2}(?:\.\d{3})+(?:,\d+)?'
+_COMMA_GROUPED = r'[1-9]\d{0,2}(?:,\d{3})+(?:\.\d+)?'
+
+# Un solo patrón: número (formato 1.200,5 / 1,200.5 / 1200.5 / 1,5), multiplicador opcional y
+# después una unidad (con sustancia opcional) o dólares; el texto llega en minúsculas y sin tildes
+QUANTITY_PATTERN = re.compile(
+    r'(?P<currency>(?:us)?\$\s*)?'
+    r'\b(?P<number>' + _DOT_GROUPED + '|' + _COMMA_GROUPED + r'|\d+(?:[.,]\d+)?)'
+    r'(?:\s*(?P<mult>mil|millones|millon)\b)?\s*'
+    r'(?:(?P<unit>' + _alternation(UNIT_ALIASES) + r')\b'
+    r'(?:\s+de\s+(?:(?:clorhidrato|base|sulfato)\s+de\s+)?(?P<substance>' + _alternation(SUBSTANCES) + r')\b)?'
+    r'|(?P<dollars>(?:de\s+)?dolares)\b)?'
+)
+
+
+@dataclass(frozen=True)
+class QuantityMention:
+    """Una cantidad mencionada en el texto"""
+    value: float               # Valor tal como aparece (con multiplicador aplicado)
+    unit: str                  # Unidad canónica: t, kg, g, mg, lb, oz, u o USD
+    substance: str = ""        # Sustancia que sigue a la cantidad (sin tildes), si la hay
+    kg: Optional[float] = None  # Masa en kilogramos (solo unidades de masa)
+    written: str = ""          # Moneda, multiplicador y unidad como aparecen: "kilogramos", "$ millones"
+
+    @property
+    def is_mass(self) -> bool:
+        return self.kg is not None
+
+
+def parse_number(number: str) -> float:
+    """
+    Convierte números escritos en español o inglés según la agrupación de cifras
+
+    Grupos de tres cifras tras el separador son miles (1.200 y 1,200 -> 1200; 1.200,5 y
+    1,200.5 -> 1200.5); en otro caso el separador es decimal (1,5 -> 1.5, 2.5 -> 2.5, 0,500 -> 0.5).
+    """
+
+    if re.fullmatch(_DOT_GROUPED, number):
+        return float(number.replace('.', '').replace(',', '.'))
+    if re.fullmatch(_COMMA_GROUPED, number):
+        return float(number.replace(',', ''))
+    return float(number.replace(',', '.'))
+
+
+def to_kg(value: float, unit: str) -> Optional[float]:
+    """Masa en kilogramos de un valor con una unidad escrita o canónica (None si no es de masa)"""
+
+    unit = UNIT_ALIASES.get(strip_accents(unit).lower().strip(), unit)
+    factor = KG_FACTORS.get(unit)
+    return value * factor if factor is not None else None
+
+
+def extract_quantities(text: str) -> List[QuantityMention]:
+    """Todas las cantidades del texto, en orden de aparición, en una sola pasada"""
+
+    mentions = []
+    for match in QUANTITY_PATTERN.finditer(strip_accents(text).lower()):
+        unit_text, currency, dollars = match.group('unit'), match.group('currency'), match.group('dollars')
+        if not (unit_text or currency or dollars):
+            continue
+        value = parse_number(match.group('number')) * _MULTIPLIERS.get(match.group('mult'), 1.0)
+        written = ' '.join(part for part in ('$' if currency else '', match.group('mult') or '',
+                                             unit_text or '', 'dolares' if dollars else '') if part)
+        if currency or dollars:
+            mentions.append(QuantityMention(value=value, unit=MONEY_UNIT, written=written))
+            continue
+        unit = UNIT_ALIASES[unit_text]
+        substance = ' '.join((match.group('substance') or '').split())
+        kg = value * KG_FACTORS[unit] if unit in KG_FACTORS else None
+        mentions.append(QuantityMention(value=value, unit=unit, substance=substance, kg=kg, written=written))
+    return mentions
+
+
+def article_quantities(article) -> List[QuantityMention]:
+    """Cantidades de un artículo (título, descripción y contenido), guardadas en el artículo"""
+
+    # El texto mismo es la clave: si no cambió, la comparación es por identidad
+    key = (article.title, article.description, article.content)
+    cached = getattr(article, '_quantities', None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    mentions = extract_quantities(f"{article.title}. {article.description}. {article.content}")
+    article._quantities = (key, mentions)
+    return mentions
+
+
+def seized_amount(mentions: List[QuantityMention], substance: str = "",
+                  fallback: bool = True) -> Optional[QuantityMention]:
+    """
+    Cantidad incautada a reportar para una sustancia
+
+    Prefiere las masas asociadas a la sustancia y después sus unidades contables; si
+    no hay (y fallback es True), lo mismo con las cantidades sin sustancia. Dentro
+    de cada grupo se toma la mayor.
+    """
+    substance = strip_accents(substance).lower()
+    named = [m for m in mentions if substance and m.substance and m.substance in substance]
+    unnamed = [m for m in mentions if not m.substance] if fallback else []
+    candidates = ([m for m in named if m.is_mass] or [m for m in named if m.unit == 'u']
+                  or [m for m in unnamed if m.is_mass] or [m for m in unnamed if m.unit == 'u'])
+    return max(candidates, key=lambda m: m.kg if m.kg is not None else m.value) if candidates else None
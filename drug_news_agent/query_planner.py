@@ -0,0 +1,168 @@
+"""
+Planificador de consultas de búsqueda.
+Mantiene estadísticas de rendimiento por consulta entre ejecuciones y reparte
+el presupuesto de consultas entre las de mayor rendimiento y consultas de
+exploración que aún no se han probado (o se probaron hace más tiempo).
+"""
+import json
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+# Peso de cada tipo de acierto en el rendimiento de una consulta
+YIELD_WEIGHTS = {'new_events': 1.0, 'relevant_hits': 0.5, 'target_hits': 0.1}
+
+# Máximo de eventos recordados para decidir si un evento es nuevo
+MAX_SEEN_EVENTS = 50000
+
+
+@dataclass
+class QueryStats:
+    """Estadísticas acumuladas de una consulta"""
+    query: str
+    runs: int = 0
+    raw_hits: int = 0
+    target_hits: int = 0
+    relevant_hits: int = 0
+    new_events: int = 0
+    last_run: str = ""
+
+    @property
+    def yield_score(self) -> float:
+        """Rendimiento medio por ejecución (aciertos ponderados)"""
+        if not self.runs:
+            return 0.0
+        weighted = sum(getattr(self, name) * weight for name, weight in YIELD_WEIGHTS.items())
+        return weighted / self.runs
+
+
+class QueryPlanner:
+    """Elige qué consultas ejecutar según su rendimiento en ejecuciones anteriores"""
+
+    def __init__(self, stats_path: Optional[str] = None, budget: int = 25, exploration_ratio: float = 0.2,
+                 search_options: Optional[Callable[[str], Dict]] = None):
+        """
+        Args:
+            stats_path: Archivo JSON de estadísticas (None = solo en memoria)
+            budget: Máximo de consultas por ejecución
+            exploration_ratio: Fracción del presupuesto para consultas poco probadas
+            search_options: Opciones del buscador con las que se ejecuta cada consulta
+                (tipo, idioma, país...); forman parte de la clave de sus estadísticas
+        """
+        self.stats_path = stats_path
+        self.budget = budget
+        self.exploration_ratio = exploration_ratio
+        self.search_options = search_options
+        self.stats: Dict[str, QueryStats] = {}
+        self.seen_events: List[str] = []
+        self._load()
+
+    @staticmethod
+    def key(query: str, **options) -> str:
+        """Clave estable de una consulta: texto normalizado y opciones del buscador (p. ej. type, hl, gl)"""
+        text = ' '.join(query.lower().split())
+        return text + ''.join(f"|{name}={value}" for name, value in sorted(options.items()) if value)
+
+    def query_key(self, query: str) -> str:
+        """Clave de una consulta con las opciones con las que se ejecuta"""
+        return self.key(query, **(self.search_options(query) if self.search_options else {}))
+
+    def plan(self, candidates: Iterable[str]) -> List[str]:
+        """
+        Selecciona hasta `budget` consultas de los candidatos (en orden de prioridad)
+
+        Una fracción `exploration_ratio` se reserva para las consultas menos
+        probadas (primero las nunca ejecutadas, en el orden de los candidatos;
+        después las que llevan más tiempo sin ejecutarse); el resto va a las de
+        mayor rendimiento. Si no hay suficientes consultas productivas, la
+        exploración completa el presupuesto.
+        """
+        candidates = list(dict.fromkeys(candidates))
+        # Solo se explotan consultas que ya dieron algún resultado útil
+        productive = [q for q in candidates if self._get(q).yield_score > 0]
+
+        n_explore = max(1, round(self.budget * self.exploration_ratio)) if candidates else 0
+        n_exploit = max(0, min(len(productive), self.budget - n_explore))
+        exploit = sorted(productive, key=lambda q: self._get(q).yield_score, reverse=True)[:n_exploit]
+
+        # Exploración: nunca ejecutadas primero; después las ejecutadas hace más tiempo
+        exploit_set = set(exploit)
+        remaining = [q for q in candidates if q not in exploit_set]
+        remaining.sort(key=lambda q: (self._get(q).runs > 0, self._get(q).last_run))
+        explore = remaining[:self.budget - len(exploit)]
+
+        return exploit + explore
+
+    def was_tried(self, query: str) -> bool:
+        stats = self.stats.get(self.query_key(query))
+        return bool(stats and stats.runs)
+
+    def is_new_event(self, event_key: str) -> bool:
+        return event_key not in self._seen_set
+
+    def record(self, run_counts: Dict[str, Dict[str, int]], new_event_keys: Iterable[str] = ()) -> List[Dict]:
+        """
+        Acumula las estadísticas de una ejecución y las guarda
+
+        Args:
+            run_counts: Por consulta, los conteos raw_hits/target_hits/relevant_hits/new_events
+            new_event_keys: Claves de los eventos nuevos de esta ejecución
+
+        Returns:
+            Rendimiento de cada consulta en esta ejecución, de mayor a menor
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        report = []
+        for query, counts in run_counts.items():
+            stats = self._get(query)
+            stats.query = query
+            stats.runs += 1
+            stats.last_run = now
+            for name in ('raw_hits', 'target_hits', 'relevant_hits', 'new_events'):
+                setattr(stats, name, getattr(stats, name) + counts.get(name, 0))
+            run_yield = sum(counts.get(name, 0) * weight for name, weight in YIELD_WEIGHTS.items())
+            report.append(dict(query=query, **counts, run_yield=round(run_yield, 2),
+                               avg_yield=round(stats.yield_score, 2), runs=stats.runs))
+
+        self.seen_events = (self.seen_events + list(new_event_keys))[-MAX_SEEN_EVENTS:]
+        self._seen_set = set(self.seen_events)
+        self._save()
+
+        return sorted(report, key=lambda item: item['run_yield'], reverse=True)
+
+    def _get(self, query: str) -> QueryStats:
+        key = self.query_key(query)
+        if key not in self.stats:
+            self.stats[key] = QueryStats(query=query)
+        return self.stats[key]
+
+    def _load(self) -> None:
+        if self.stats_path and os.path.exists(self.stats_path):
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.stats = {}
+            for key, value in data.get('queries', {}).items():
+                stats = QueryStats(**value)
+                if '|' not in key:
+                    # Claves antiguas (solo el texto): se ejecutaban con las opciones actuales
+                    key = self.query_key(stats.query)
+                self.stats[key] = stats
+            self.seen_events = data.get('seen_events', [])
+        self._seen_set = set(self.seen_events)
+
+    def _save(self) -> None:
+        if not self.stats_path:
+            return
+        data = {
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'queries': {key: asdict(stats) for key, stats in self.stats.items() if stats.runs},
+            'seen_events': self.seen_events,
+        }
+        directory = os.path.dirname(os.path.abspath(self.stats_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.stats_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.stats_path)
@@ -2,10 +2,10 @@
 Clasificador de relevancia de noticias basado en criterios específicos.
 Clasifica noticias en Alta, Media o Baja relevancia según aparición de palabras clave.
 """
-import re
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
 from .data_loader import DataLoader
+from .quantities import article_quantities
 
 
 @dataclass
@@ -18,6 +18,9 @@ class NewsArticle:
     date: str
     source: str
     country: str = ""
+    queries: List[str] = field(default_factory=list)  # Consultas que encontraron el artículo
+    canonical_url: str = ""  # URL canónica (url_canonicalizer); url conserva la original
+    _quantities: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)  # Caché de quantities
     
 
 @dataclass
@@ -100,7 +103,7 @@ class RelevanceClassifier:
             reasons.append("Operación de alta prioridad")
             
         # 6. Análisis de cantidad/impacto
-        impact_score = self._analyze_impact_indicators(full_text)
+        impact_score = self._analyze_impact_indicators(article)
         score += impact_score
         
         if impact_score > 0:
@@ -188,21 +191,22 @@ class RelevanceClassifier:
                 
         return min(score, 30)  # Máximo 30 puntos
         
-    def _analyze_impact_indicators(self, text: str) -> float:
+    def _analyze_impact_indicators(self, article: NewsArticle) -> float:
         """Analiza indicadores de impacto (cantidades, valores)"""
         score = 0
         
-        # Patrones de cantidades grandes
-        quantity_patterns = [
-            r'\d+\s*toneladas?',
-            r'\d+\s*kilos?',
-            r'\d+\s*kilogramos?',
-            r'\$\s*\d+\s*millones?',
-            r'\d+\s*millones?\s*de\s*dólares',
-        ]
-        
-        for pattern in quantity_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        # 10 puntos por indicador: toneladas, kilos, kilogramos (que también cuentan
+        # como kilos), "$ N millones" y "N millones de dólares"
+        written = [mention.written.split() for mention in article_quantities(article)]
+        indicators = (
+            lambda words: words[-1].startswith('tonelada'),
+            lambda words: words[-1].startswith('kilo'),
+            lambda words: words[-1].startswith('kilogramo'),
+            lambda words: words[0] == '$' and words[1:2] in (['millon'], ['millones']),
+            lambda words: words[-1] == 'dolares' and any(word in ('millon', 'millones') for word in words),
+        )
+        for indicator in indicators:
+            if any(words and indicator(words) for words in written):
                 score += 10
                 
         return min(score, 20)  # Máximo 20 puntos
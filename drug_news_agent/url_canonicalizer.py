@@ -0,0 +1,107 @@
+"""
+Canonicalización de URLs de resultados de búsqueda.
+Las consultas generadas se solapan mucho, así que la misma noticia llega varias
+veces (con parámetros de seguimiento, versión AMP o móvil, http/https...). Esta
+etapa normaliza cada URL y pliega los duplicados exactos con un conjunto hash
+antes de cualquier procesamiento de texto, uniendo las consultas que los encontraron.
+"""
+import re
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+from .relevance_classifier import NewsArticle
+
+
+# Parámetros de seguimiento que no cambian el contenido de la página
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+    'ocid', 'cmpid', 'ref', 'ref_src', 'referrer', 'smid', 'ito', 'outputtype', 'amp',
+})
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_', 'hsa_', 'at_')
+
+# Subdominios de versión móvil o AMP que sirven el mismo artículo
+MIRROR_SUBDOMAINS = ('www.', 'm.', 'mobile.', 'amp.', 'movil.')
+
+_AMP_PATH = re.compile(r'(?:/amp|\.amp|/amp\.html)/?$|^/amp(?=/)', re.IGNORECASE)
+# https://www-diario-com.cdn.ampproject.org/c/s/www.diario.com/nota  ->  https://www.diario.com/nota
+_AMP_CACHE = re.compile(r'^/(?:[cv]/)?(?:s/)?(?P<target>[^/]+\.[^/]+/.*)$')
+
+
+def canonicalize_url(url: str) -> str:
+    """URL canónica: https, host en minúsculas sin www/m/amp, sin AMP, sin seguimiento ni fragmento"""
+
+    url = (url or "").strip()
+    if not url:
+        return url
+    try:
+        parts = urlsplit(url if '://' in url or url.startswith('//') else f"https://{url}")
+    except ValueError:
+        return url
+
+    host = (parts.hostname or "").lower()
+    path = parts.path
+
+    # Cachés AMP de Google: el artículo original va dentro de la ruta
+    if host.endswith('.cdn.ampproject.org') or (host.startswith(('google.', 'www.google.')) and path.startswith('/amp/')):
+        target = _AMP_CACHE.match(path[4:] if path.startswith('/amp/') else path)
+        if target:
+            query = f"?{parts.query}" if parts.query else ""
+            return canonicalize_url(f"https://{unquote(target.group('target'))}{query}")
+
+    for prefix in MIRROR_SUBDOMAINS:
+        if host.startswith(prefix) and host.count('.') > 1:
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r'/{2,}', '/', path)
+    path = _AMP_PATH.sub('', path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES))
+
+    return urlunsplit(('https', host, path or '/', urlencode(query), ''))
+
+
+def fold_duplicate_urls(articles: List[NewsArticle]) -> Tuple[List[NewsArticle], Dict]:
+    """
+    Pliega los artículos con la misma URL canónica (se conserva el primero, en orden)
+
+    Cada artículo guarda su URL canónica en canonical_url (url no se modifica: es la
+    que se descarga y se exporta). El conservado recibe la unión de las consultas que
+    lo encontraron y la descripción más larga de sus copias.
+
+    Returns:
+        Tupla (artículos únicos, métricas del plegado)
+    """
+    folded = []
+    seen: Dict[str, NewsArticle] = {}
+
+    for article in articles:
+        key = canonicalize_url(article.url)
+        article.canonical_url = key
+        kept = seen.get(key) if key else None
+        if kept is None:
+            if key:
+                seen[key] = article
+            folded.append(article)
+            continue
+        for query in article.queries:
+            if query not in kept.queries:
+                kept.queries.append(query)
+        if len(article.description) > len(kept.description):
+            kept.description = article.description
+        if not kept.content and article.content:
+            kept.content = article.content
+
+    total = len(articles)
+    metrics = {
+        'raw_hits': total,
+        'unique_urls': len(folded),
+        'folded_duplicates': total - len(folded),
+        'fold_ratio': round((total - len(folded)) / total, 3) if total else 0.0,
+    }
+    return folded, metrics
@@ -0,0 +1,23 @@
+from drug_news_agent.geocoder import Coordinates, GeocodingResult
+from drug_news_agent.intelligent_search_agent import ProcessedNews
+from drug_news_agent.location_extractor import LocationInfo
+from drug_news_agent.relevance_classifier import NewsArticle, RelevanceScore
+
+
+def make_news(i: int = 0, title: str = "Incautan 500 kilos de cocaína en Cartagena", description: str = "",
+              date: str = "04/08/2025", country: str = "Colombia", country_code: str = "CO",
+              drugs=("cocaína",), level: str = "Alta") -> ProcessedNews:
+    """Noticia procesada mínima para las pruebas de exportación"""
+    return ProcessedNews(
+        article_id=f"A{i:07d}",
+        cui=f"CUI{i:06x}",
+        article=NewsArticle(title=title, description=description or f"Operativo de la Policía en {country}",
+                            content="", url=f"https://noticias.example/{i}", date=date, source="medio.example"),
+        relevance=RelevanceScore(level=level, score=80.0, reasons=[], drug_mentions=list(drugs),
+                                 location_matches=[country]),
+        location_info=LocationInfo(country=country, city="Cartagena", full_address=f"Cartagena, {country}",
+                                   country_code=country_code, confidence_score=0.9),
+        geocoding_result=GeocodingResult(
+            coordinates=Coordinates(latitude=10.39, longitude=-75.51, formatted_address=f"Cartagena, {country}"),
+            success=True),
+    )
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pytest
+
+from drug_news_agent.aggregation import NO_DATE, NewsAggregator
+from drug_news_agent.dates import parse_publication_date
+from tests.factories import make_news
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("04/08/2025", datetime(2025, 8, 4)),
+    ("Aug 4, 2025", datetime(2025, 8, 4)),
+    ("4 de agosto de 2025", datetime(2025, 8, 4)),
+    ("2025-08-04T10:00:00Z", datetime(2025, 8, 4)),
+    ("2 days ago", datetime(2025, 8, 4)),
+    ("hace 1 semana", datetime(2025, 7, 30)),
+    ("5 hours ago", datetime(2025, 8, 6)),
+    ("yesterday", datetime(2025, 8, 5)),
+])
+def test_parse_publication_date(value, expected):
+    assert parse_publication_date(value, reference=datetime(2025, 8, 6)) == expected
+
+
+@pytest.mark.parametrize("value", ["", "Sin fecha", "31/02/2025", "Foo 4, 2025"])
+def test_unparseable_dates(value):
+    assert parse_publication_date(value) is None
+
+
+def test_weeks_group_relative_and_english_dates():
+    aggregator = NewsAggregator()
+    aggregator._reference = datetime(2025, 8, 6)
+    aggregator.add_all(make_news(i, date=date)
+                       for i, date in enumerate(["04/08/2025", "Aug 5, 2025", "2 days ago", "sin fecha"]))
+
+    assert aggregator.weeks == {"2025-W32": 3, NO_DATE: 1}
@@ -0,0 +1,63 @@
+from demos.tools.private import cache_utils
+from demos.tools.private.cache_utils import PersistentResponseCache, ToolResultCache
+
+
+def test_tool_result_cache_key_ignores_whitespace_and_arg_order():
+    assert (ToolResultCache.make_key('search', '{"query": ["cocaína  Colombia"], "num": 10}')
+            == ToolResultCache.make_key('search', {'num': 10, 'query': ['cocaína Colombia']}))
+
+
+def test_tool_result_cache_ttl_and_lru(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_utils.time, 'monotonic', lambda: now[0])
+    cache = ToolResultCache(max_entries=2)
+    cache.set('a', 1, ttl=10)
+    cache.set('b', 2, ttl=10)
+    cache.set('skip', 3, ttl=0)
+    assert cache.get('a') == 1  # 'a' pasa a ser la más reciente
+    cache.set('c', 3, ttl=10)
+    assert (cache.get('b'), cache.get('c'), cache.get('skip')) == (None, 3, None)
+
+    now[0] += 11
+    assert cache.get('a') is None
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_persistent_cache_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'search_cache.jsonl')
+    writer, reader = PersistentResponseCache(path), PersistentResponseCache(path)
+    key = PersistentResponseCache.make_key('Cocaína  Colombia', type='news', gl='co', page=None)
+
+    writer.set(key, 'resultados')
+
+    assert key == PersistentResponseCache.make_key('cocaína colombia', gl='co', type='news')
+    assert reader.get(key) == 'resultados'
+
+
+def test_persistent_cache_freshness_bucket(tmp_path, monkeypatch):
+    now = [7200.0]
+    monkeypatch.setattr(cache_utils.time, 'time', lambda: now[0])
+    cache = PersistentResponseCache(str(tmp_path / 'cache.jsonl'), bucket_seconds=3600)
+    cache.set('k', 'v')
+
+    now[0] += 3600
+    assert cache.get('k') is None
+    assert cache.get('k', allow_stale=True) == 'v'
+    assert cache.stats == {'hits': 0, 'stale_hits': 1, 'misses': 1, 'entries': 1}
+
+
+def test_rewrite_by_another_process_is_reloaded_from_start(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    reader = PersistentResponseCache(path, max_entries=3)
+    writer = PersistentResponseCache(path, max_entries=3)
+    writer.set('k0', 'v0')
+    assert reader.get('k0') == 'v0'
+
+    # Al superar 2 * max_entries líneas el escritor compacta: el archivo nuevo es
+    # más largo que la parte que el lector ya había leído
+    for i in range(1, 7):
+        writer.set(f'k{i}', f'v{i}')
+
+    assert [reader.get(f'k{i}') for i in range(4, 7)] == ['v4', 'v5', 'v6']
+    assert reader.get('k0') is None
+    assert len(reader) == 3
@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip('gradio')
+
+from qwen_agent.gui.utils import convert_fncall_to_text  # noqa: E402
+
+from demos.gui import chat_render  # noqa: E402
+from demos.gui.chat_render import IncrementalChatRenderer  # noqa: E402
+
+
+def _stream():
+    """Successive response lists of a tool-calling session, as the agent streams them."""
+    call = {'role': 'assistant', 'content': '', 'name': 'WebDancer',
+            'function_call': {'name': 'search', 'arguments': '{"query": ["cocaína Colombia"]}'}}
+    result = {'role': 'function', 'name': 'search', 'content': 'Resultados de búsqueda'}
+    answer = 'Se incautaron 300 kg de cocaína en Buenaventura.'
+    yield [{'role': 'assistant', 'content': 'Buscando', 'name': 'WebDancer'}]
+    yield [{'role': 'assistant', 'content': 'Buscando...', 'name': 'WebDancer'}, call]
+    yield [{'role': 'assistant', 'content': 'Buscando...', 'name': 'WebDancer'}, call, result]
+    for end in range(10, len(answer) + 1, 10):
+        yield [{'role': 'assistant', 'content': 'Buscando...', 'name': 'WebDancer'}, call, result,
+               {'role': 'assistant', 'content': answer[:end], 'name': 'WebDancer'}]
+
+
+def test_incremental_render_matches_full_conversion():
+    renderer = IncrementalChatRenderer()
+    for messages in _stream():
+        assert renderer.convert(messages) == convert_fncall_to_text(messages)
+
+
+def test_unchanged_messages_are_converted_once(monkeypatch):
+    converted = []
+    original = chat_render.convert_fncall_to_text
+    monkeypatch.setattr(chat_render, 'convert_fncall_to_text',
+                        lambda messages: converted.append(messages[-1]) or original(messages))
+    renderer = IncrementalChatRenderer()
+    per_chunk = []
+    for messages in _stream():
+        before = len(converted)
+        renderer.convert(messages)
+        per_chunk.append(len(converted) - before)
+
+    # The second chunk rewrites the opening message and adds the call; afterwards only the last message changes
+    assert per_chunk[:3] == [1, 2, 1]
+    assert set(per_chunk[3:]) == {1}
+
+
+def test_rewritten_earlier_message_rebuilds_bubble():
+    renderer = IncrementalChatRenderer()
+    first = [{'role': 'assistant', 'content': 'Paso 1', 'name': 'WebDancer'},
+             {'role': 'assistant', 'content': 'Paso 2', 'name': 'WebDancer'},
+             {'role': 'assistant', 'content': 'Paso 3', 'name': 'WebDancer'}]
+    rewritten = [{'role': 'assistant', 'content': 'Paso 1 corregido', 'name': 'WebDancer'}] + first[1:]
+    for messages in (first, rewritten, rewritten + [{'role': 'user', 'content': 'Gracias'}]):
+        assert renderer.convert(messages) == convert_fncall_to_text(messages)
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+from drug_news_agent.checkpoint import CheckpointStore
+from drug_news_agent.intelligent_search_agent import IntelligentDrugNewsAgent
+from drug_news_agent.query_planner import QueryPlanner
+from drug_news_agent.relevance_classifier import NewsArticle, RelevanceScore
+
+QUERY = "cocaína Colombia"
+
+
+def _agent(stats_path, fail_geocoding=False):
+    """Agente con etapas simuladas: solo interesa el orden de las etapas y los checkpoints"""
+    agent = IntelligentDrugNewsAgent.__new__(IntelligentDrugNewsAgent)
+    agent.query_planner = QueryPlanner(str(stats_path))
+    agent.llm_classifier = None
+    agent.search_tool = SimpleNamespace(cache=None)
+    agent.searches = 0
+
+    def perform_searches(queries, max_per_query, days_back):
+        agent.searches += 1
+        articles = [NewsArticle(title=f"Incautan cocaína {i}", description="", content="",
+                                url=f"https://noticias.example/{i}", date="04/08/2025", source="noticias.example",
+                                queries=[QUERY]) for i in range(3)]
+        return articles, {}
+
+    def geocode(articles_with_locations, llm_extractions=None):
+        if fail_geocoding:
+            raise KeyboardInterrupt
+        return []
+
+    agent._generate_search_queries = lambda: [QUERY]
+    agent._perform_searches = perform_searches
+    agent._filter_by_target_countries = lambda articles: articles
+    agent._enrich_articles = lambda articles: (articles, {})
+    agent._classify_relevance = lambda articles, min_relevance, llm_extractions=None: [
+        (article, RelevanceScore(level="Alta", score=80.0, reasons=[], drug_mentions=["cocaína"],
+                                 location_matches=[])) for article in articles]
+    agent._deduplicate_news = lambda classified: (classified, [])
+    agent._extract_locations = lambda unique: []
+    agent._geocode_locations = geocode
+    return agent
+
+
+def test_store_tracks_completed_stages(tmp_path):
+    store = CheckpointStore(str(tmp_path), run_id="r1")
+    store.set_params(days_back=3)
+    store.save('search', ["a", "b"])
+
+    resumed = CheckpointStore.resume(str(tmp_path), "r1")
+    assert resumed.params == {'days_back': 3}
+    assert resumed.has('search') and not resumed.has('filter')
+    assert resumed.last_completed_stage == 'search'
+    assert resumed.load('search') == ["a", "b"]
+    with pytest.raises(FileNotFoundError):
+        CheckpointStore.resume(str(tmp_path), "desconocida")
+
+
+def test_resuming_a_finished_run_does_not_record_yield_again(tmp_path):
+    stats_path = tmp_path / "query_stats.json"
+    _agent(stats_path).search_drug_news(checkpoint=CheckpointStore(str(tmp_path / "ckpt"), run_id="r1"))
+
+    agent = _agent(stats_path)
+    agent.search_drug_news(checkpoint=CheckpointStore.resume(str(tmp_path / "ckpt"), "r1"))
+
+    stats = QueryPlanner(str(stats_path)).stats[QueryPlanner.key(QUERY)]
+    assert (stats.runs, stats.raw_hits, stats.new_events) == (1, 3, 3)
+    assert agent.searches == 0
+
+
+def test_yield_is_recorded_once_after_an_interrupted_run(tmp_path):
+    stats_path = tmp_path / "query_stats.json"
+    with pytest.raises(KeyboardInterrupt):
+        _agent(stats_path, fail_geocoding=True).search_drug_news(
+            checkpoint=CheckpointStore(str(tmp_path / "ckpt"), run_id="r1"))
+    assert not stats_path.exists()
+
+    _agent(stats_path).search_drug_news(checkpoint=CheckpointStore.resume(str(tmp_path / "ckpt"), "r1"))
+
+    stats = QueryPlanner(str(stats_path)).stats[QueryPlanner.key(QUERY)]
+    assert (stats.runs, stats.raw_hits) == (1, 3)
@@ -0,0 +1,43 @@
+from demos.tools.private.content_reducer import clean_blocks, split_chunks
+from demos.utils.tokens import count_tokens
+
+
+def _clean(*blocks):
+    return clean_blocks('\n\n'.join(blocks))[0]
+
+
+def test_banner_blocks_are_dropped():
+    assert _clean('We use cookies to improve your experience. By continuing you accept our privacy policy.',
+                  'Publicidad',
+                  '© 2025 Diario. Todos los derechos reservados.',
+                  '[Inicio](/) [Deportes](/d) [Política](/p)',
+                  'La policía decomisó 300 kg de marihuana.') == ['La policía decomisó 300 kg de marihuana.']
+
+
+def test_boilerplate_word_inside_real_content_is_kept():
+    block = 'La policía decomisó 300 kg de marihuana. Publicidad engañosa fue denunciada por los vecinos.'
+    assert _clean(block) == [block]
+
+
+def test_repeated_table_rows_are_kept():
+    table = '| Año | Kg |\n| --- | --- |\n| 1 | 10 |\n| 1 | 10 |'
+    assert _clean(table) == ['| Año | Kg |\n| 1 | 10 |\n| 1 | 10 |']
+
+
+def test_repeated_links_and_distant_lines_are_deduplicated():
+    caption = 'Foto: archivo de la Policía Nacional'
+    blocks = _clean(caption, '[Leer más](/a)', 'Primer párrafo.', 'Segundo párrafo.', '[Leer más](/b)', caption)
+    assert blocks == [caption, 'Leer más', 'Primer párrafo.', 'Segundo párrafo.']
+
+
+def test_split_chunks_is_lossless_and_within_budget():
+    text = '\n\n'.join(['Incautación de cocaína en Buenaventura. ' * 20] * 5 + ['decomisó ñandú 漢字 ' * 2000])
+    chunks = split_chunks(text, 300)
+
+    assert ''.join(chunks) == text
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 300 for chunk in chunks)
+
+
+def test_split_chunks_keeps_short_text_whole():
+    assert split_chunks('Primer párrafo.\n\nSegundo párrafo.', 300) == ['Primer párrafo.\n\nSegundo párrafo.']
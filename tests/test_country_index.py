@@ -0,0 +1,41 @@
+import pytest
+
+from drug_news_agent.country_index import CountryIndex, _demo_countries
+
+
+@pytest.fixture(scope="module")
+def index():
+    return CountryIndex(_demo_countries())
+
+
+@pytest.mark.parametrize("text, code", [
+    ("Incautan cocaína en Colombia", "CO"),
+    ("Detienen a dos ciudadanos mexicanos en el aeropuerto", "MX"),
+    ("Operativo en PERÚ deja tres capturados", "PE"),
+    ("Decomiso en la frontera con Peru", "PE"),
+    ("Cooperación con la policía de COL", "CO"),
+    ("Cargamento llegó desde San Vicente y las Granadinas", "VC"),
+    ("Capturan a costarricense con droga", "CR"),
+    ("Allanamiento en Granada, Nicaragua", "NI"),
+])
+def test_finds_country_mentions(index, text, code):
+    assert index.find(text) == code
+
+
+@pytest.mark.parametrize("text", [
+    "Incautan hachís en el puerto de Granada, España",
+    "Un tico fue detenido con una nica en la técnica policial",
+    "Receta de chile relleno con carne",
+    "Subió el pan y la política sigue igual",
+])
+def test_ambiguous_or_short_aliases_do_not_match(index, text):
+    assert index.find(text) is None
+
+
+def test_find_all_keeps_order_without_repeats(index):
+    assert index.find_all("Droga de Bolivia a Brasil; Bolivia investiga") == ["BO", "BR"]
+
+
+def test_filter_batch_matches_find(index):
+    texts = ["Decomiso en Ecuador", "Sin país", "Red venezolana desarticulada"]
+    assert index.filter_batch(texts) == [index.find(text) for text in texts] == ["EC", None, "VE"]
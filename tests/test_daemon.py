@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from drug_news_agent.daemon import DaemonState, run_cycle
+from drug_news_agent.intelligent_search_agent import SearchResults
+from tests.factories import make_news
+
+ARGS = SimpleNamespace(days=7, max_articles=10, min_relevance="Media", xlsx=False, parquet=False, dataset_dir=None)
+
+
+class _Agent:
+    """Agente simulado: devuelve siempre las mismas noticias y recuerda la ventana pedida"""
+
+    def __init__(self, news):
+        self.news = news
+        self.windows = []
+
+    def search_drug_news(self, days_back, max_articles_per_query, min_relevance):
+        self.windows.append(days_back)
+        return SearchResults(processed_news=list(self.news), duplicate_groups=[], search_metrics={},
+                             processing_time=0.0)
+
+
+class _Exporter:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.exported = []
+
+    def export_to_csv(self, results, output_dir):
+        if self.fail:
+            raise OSError("disco lleno")
+        self.exported.append([news.cui for news in results.processed_news])
+
+    def export_summary_report(self, results, output_dir, aggregator):
+        pass
+
+
+def test_window_starts_at_watermark():
+    now = datetime(2025, 8, 10, 12)
+    assert DaemonState().window_days(now, 7) == 7
+    assert DaemonState(watermark=(now - timedelta(days=2, hours=6)).isoformat()).window_days(now, 7) == 3
+    assert DaemonState(watermark=(now - timedelta(minutes=30)).isoformat()).window_days(now, 7) == 1
+    assert DaemonState(watermark=(now - timedelta(days=30)).isoformat()).window_days(now, 7) == 7
+
+
+def test_cycle_exports_only_unseen_events(tmp_path):
+    agent, exporter = _Agent([make_news(0), make_news(1)]), _Exporter()
+    state = run_cycle(agent, exporter, DaemonState(), ARGS, str(tmp_path))
+
+    agent.news.append(make_news(2))
+    state = run_cycle(agent, exporter, state, ARGS, str(tmp_path))
+
+    assert agent.windows == [7, 1]
+    assert exporter.exported == [[make_news(0).cui, make_news(1).cui], [make_news(2).cui]]
+    assert (state.cycles, state.total_new_events, len(state.seen_cuis)) == (2, 3, 3)
+
+
+def test_failed_cycle_keeps_previous_state(tmp_path):
+    state = DaemonState(watermark="2025-08-01T00:00:00", seen_cuis=["CUI000000"], cycles=4)
+    with pytest.raises(OSError):
+        run_cycle(_Agent([make_news(1)]), _Exporter(fail=True), state, ARGS, str(tmp_path))
+
+    assert state == DaemonState(watermark="2025-08-01T00:00:00", seen_cuis=["CUI000000"], cycles=4)
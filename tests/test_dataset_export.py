@@ -0,0 +1,93 @@
+import json
+import os
+
+import pytest
+
+from drug_news_agent import csv_exporter
+from drug_news_agent.csv_exporter import DATASET_CUI_INDEX, DATASET_MANIFEST, CentroRegionalCSVExporter
+from drug_news_agent.dates import format_publication_date
+from tests.factories import make_news
+
+
+def _parts(dataset_dir):
+    return sorted(os.path.relpath(os.path.join(root, name), dataset_dir)
+                  for root, _, files in os.walk(dataset_dir) for name in files if name.startswith("part-"))
+
+
+def test_partitions_follow_publication_date(tmp_path):
+    news = [make_news(0, date="04/08/2025"), make_news(1, date="Jul 30, 2024")]
+    summary = CentroRegionalCSVExporter().export_to_dataset(news, str(tmp_path), run_id="r1")
+
+    assert summary['partitions'] == [os.path.join("Año=2024", "Mes=07", "Pais=Colombia"),
+                                     os.path.join("Año=2025", "Mes=08", "Pais=Colombia")]
+
+
+def test_second_run_skips_exported_articles(tmp_path):
+    exporter = CentroRegionalCSVExporter()
+    exporter.export_to_dataset([make_news(0), make_news(1)], str(tmp_path), run_id="r1")
+    summary = exporter.export_to_dataset([make_news(1), make_news(2)], str(tmp_path), run_id="r2")
+
+    assert (summary['articles'], summary['skipped_duplicates']) == (1, 1)
+    with open(tmp_path / DATASET_MANIFEST, encoding='utf-8') as f:
+        assert json.load(f)['total_articles'] == 3
+
+
+def test_run_interrupted_before_index_is_recovered(tmp_path, monkeypatch):
+    exporter = CentroRegionalCSVExporter()
+
+    def crash(*args, **kwargs):
+        raise KeyboardInterrupt
+    # Las partes ya están publicadas cuando falla el registro de la ejecución
+    monkeypatch.setattr(CentroRegionalCSVExporter, "_commit_run", classmethod(crash))
+    with pytest.raises(KeyboardInterrupt):
+        exporter.export_to_dataset([make_news(0), make_news(1)], str(tmp_path), run_id="r1")
+    monkeypatch.undo()
+    assert not (tmp_path / DATASET_CUI_INDEX).exists()
+
+    summary = exporter.export_to_dataset([make_news(1), make_news(2)], str(tmp_path), run_id="r2")
+
+    assert (summary['articles'], summary['skipped_duplicates']) == (1, 1)
+    with open(tmp_path / DATASET_MANIFEST, encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert manifest['total_articles'] == 3
+    assert [run['run_id'] for run in manifest['runs']] == ["r1", "r2"]
+
+
+def test_failed_run_publishes_no_parts(tmp_path):
+    def news():
+        yield make_news(0)
+        raise RuntimeError("fallo en mitad de la exportación")
+
+    with pytest.raises(RuntimeError):
+        CentroRegionalCSVExporter().export_to_dataset(news(), str(tmp_path), run_id="r1")
+    assert _parts(str(tmp_path)) == []
+    assert not any(name.endswith(".tmp") for _, _, files in os.walk(tmp_path) for name in files)
+
+
+def test_unknown_publication_date_falls_back_to_export_date():
+    assert format_publication_date("fecha desconocida") == ""
+    row = CentroRegionalCSVExporter()._create_base_row(make_news(0, date="sin fecha"))
+    assert row[csv_exporter._COL['Fecha_Publicacion_Articulo']] == row[csv_exporter._COL['Fecha']]
+
+
+def test_reused_run_id_is_refused(tmp_path):
+    exporter = CentroRegionalCSVExporter()
+    exporter.export_to_dataset([make_news(0)], str(tmp_path), run_id="r1")
+
+    with pytest.raises(ValueError):
+        exporter.export_to_dataset([make_news(1)], str(tmp_path), run_id="r1")
+    assert _parts(str(tmp_path)) == [os.path.join("Año=2025", "Mes=08", "Pais=Colombia", "part-r1.csv")]
+
+
+def test_default_run_ids_do_not_collide(tmp_path, monkeypatch):
+    class FrozenDatetime(csv_exporter.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2025, 8, 4, 12, 0, 0)
+
+    monkeypatch.setattr(csv_exporter, "datetime", FrozenDatetime)
+    exporter = CentroRegionalCSVExporter()
+    run_ids = [exporter.export_to_dataset([make_news(i)], str(tmp_path))['run_id'] for i in range(3)]
+
+    assert run_ids == ["20250804_120000", "20250804_120000_2", "20250804_120000_3"]
+    assert len(_parts(str(tmp_path))) == 3
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from drug_news_agent.enrichment import ArticleEnricher, ContentCache
+from drug_news_agent.relevance_classifier import NewsArticle
+
+
+def _article(i, domain="diario.example", content=""):
+    return NewsArticle(title=f"Noticia {i}", description="", content=content, url=f"https://{domain}/{i}",
+                       date="04/08/2025", source=domain)
+
+
+def _score(article):
+    return int(article.url.rsplit('/', 1)[1])
+
+
+def test_only_top_n_articles_without_content_are_fetched():
+    fetched = []
+    enricher = ArticleEnricher(lambda url: fetched.append(url) or f"Markdown Content:\ntexto de {url}",
+                               min_interval=0)
+    articles = [_article(i) for i in range(5)] + [_article(9, content="ya descargado")]
+    metrics = enricher.enrich(articles, top_n=2, score=_score)
+
+    assert sorted(fetched) == ["https://diario.example/3", "https://diario.example/4"]
+    assert articles[4].content == "texto de https://diario.example/4"
+    assert (metrics['candidates'], metrics['fetched'], metrics['failed']) == (2, 2, 0)
+
+
+def test_concurrent_fetches_are_limited_per_domain():
+    lock, active, peak = threading.Lock(), {}, {}
+
+    def fetch(url):
+        domain = url.split('/')[2]
+        with lock:
+            active[domain] = active.get(domain, 0) + 1
+            peak[domain] = max(peak.get(domain, 0), active[domain])
+        time.sleep(0.05)
+        with lock:
+            active[domain] -= 1
+        return "contenido"
+
+    enricher = ArticleEnricher(fetch, max_workers=8, max_per_domain=2, min_interval=0)
+    articles = [_article(i, "a.example") for i in range(6)] + [_article(i, "b.example") for i in range(6, 8)]
+    enricher.enrich(articles, top_n=8, score=_score)
+
+    assert peak == {"a.example": 2, "b.example": 2}
+
+
+def test_cached_content_is_not_fetched_again(tmp_path):
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        return "contenido"
+
+    ArticleEnricher(fetch, cache_dir=str(tmp_path), min_interval=0).enrich([_article(1)], top_n=1, score=_score)
+
+    # Otra instancia con la misma caché en disco
+    metrics = ArticleEnricher(fetch, cache_dir=str(tmp_path), min_interval=0).enrich(
+        [_article(1), _article(2), _article(3, content="")], top_n=3, score=_score)
+
+    assert fetched[0] == "https://diario.example/1"
+    assert sorted(fetched[1:]) == ["https://diario.example/2", "https://diario.example/3"]
+    assert (metrics['cache_hits'], metrics['fetched']) == (1, 2)
+
+
+def test_memory_cache_is_bounded_lru():
+    cache = ContentCache(max_memory_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"  # 'a' pasa a ser la más reciente
+    cache.set("c", "C")
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("A", None, "C")
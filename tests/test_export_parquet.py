@@ -0,0 +1,16 @@
+import pyarrow.parquet as pq
+
+from drug_news_agent.csv_exporter import CentroRegionalCSVExporter
+from tests.factories import make_news
+
+
+def test_parquet_export_has_typed_columns(tmp_path):
+    news = [make_news(i, drugs=("cocaína", "marihuana")) for i in range(5)]
+    path = CentroRegionalCSVExporter().export_to_parquet(news, str(tmp_path))
+
+    table = pq.read_table(path)
+    assert table.num_rows == 10  # una fila por sustancia
+    assert str(table.schema.field('Geo_Distrito_Lat').type) == 'double'
+    assert str(table.schema.field('Año').type).startswith('int')
+    assert table.column('Geo_Distrito_Lat').to_pylist()[0] == 10.39
+
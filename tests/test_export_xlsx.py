@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pytest
+
+from drug_news_agent import csv_exporter
+from drug_news_agent.csv_exporter import CSV_COLUMNS, CentroRegionalCSVExporter
+from tests.factories import make_news
+
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("xlsxwriter")
+
+
+def _rows(sheet):
+    header, *rows = sheet.iter_rows()
+    return [dict(zip(CSV_COLUMNS, row)) for row in rows]
+
+
+def test_xlsx_export_writes_typed_cells(tmp_path):
+    path = CentroRegionalCSVExporter().export_to_xlsx([make_news(0), make_news(1)], str(tmp_path))
+
+    sheet = openpyxl.load_workbook(path).active
+    assert [cell.value for cell in next(sheet.iter_rows())] == list(CSV_COLUMNS)
+    row = _rows(sheet)[0]
+    date = row['Fecha_Publicacion_Articulo']
+    assert (date.value, date.number_format) == (datetime(2025, 8, 4), 'dd/mm/yyyy')
+    assert isinstance(row['Fecha'].value, datetime)
+    assert isinstance(row['Año'].value, int)
+    assert row['Cant_Sust_Estup_Sintetica_incautada'].value == 500
+
+
+def test_xlsx_export_rolls_over_to_new_sheet(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_exporter, "XLSX_MAX_ROWS", 3)  # encabezado + 2 filas por hoja
+    path = CentroRegionalCSVExporter().export_to_xlsx([make_news(i) for i in range(5)], str(tmp_path))
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ['Noticias_Drogas', 'Noticias_Drogas_2', 'Noticias_Drogas_3']
+    assert [len(_rows(workbook[name])) for name in workbook.sheetnames] == [2, 2, 1]
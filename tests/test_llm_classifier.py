@@ -0,0 +1,61 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from drug_news_agent import mock_llm_server
+from drug_news_agent.intelligent_search_agent import IntelligentDrugNewsAgent
+from drug_news_agent.llm_classifier import BatchLLMClassifier, LLMExtraction
+from drug_news_agent.relevance_classifier import NewsArticle, RelevanceScore
+
+pytest.importorskip('openai')
+
+
+@pytest.fixture
+def api_base():
+    server = mock_llm_server.serve(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def _article(i, title, description=""):
+    return NewsArticle(title=title, description=description, content="", url=f"https://noticias.example/{i}",
+                       date="04/08/2025", source="noticias.example")
+
+
+def test_batches_run_in_parallel_and_are_cached(api_base, tmp_path):
+    articles = [_article(0, "Incautan 500 kg de cocaína en Cartagena", "La Policía Nacional decomisó la droga"),
+                _article(1, "Debate sobre narcotráfico en el Congreso"),
+                _article(2, "Resultados de la liga de fútbol"),
+                _article(3, "Detenidos con 20 kilos de marihuana en Quito"),
+                _article(4, "Incautan 500 kg de cocaína en Cartagena", "La Policía Nacional decomisó la droga")]
+    classifier = BatchLLMClassifier(api_base=api_base, api_key="test", batch_size=1, max_parallel=4,
+                                    cache_path=str(tmp_path / "llm_cache.jsonl"))
+
+    results = classifier.classify(articles)
+
+    assert [result.relevance for result in results] == ["Alta", "Media", "Baja", "Alta", "Alta"]
+    assert (results[0].quantity, results[0].unit, results[0].enforcement_force) == (500.0, "kg", "Policía Nacional")
+    # El contenido repetido se envía una sola vez; las estadísticas cuadran aunque los lotes usen varios hilos
+    assert classifier.stats == {'articles': 5, 'cache_hits': 0, 'requests': 4, 'failed_articles': 0}
+
+    reloaded = BatchLLMClassifier(api_base=api_base, api_key="test", cache_path=str(tmp_path / "llm_cache.jsonl"))
+    assert reloaded.classify(articles) == results
+    assert reloaded.stats['requests'] == 0 and reloaded.stats['cache_hits'] == 5
+
+
+def test_llm_relevance_decides_which_articles_are_kept():
+    agent = IntelligentDrugNewsAgent.__new__(IntelligentDrugNewsAgent)
+    articles = [_article(0, "Incautan droga"), _article(1, "Resultados de la liga")]
+    agent.relevance_classifier = SimpleNamespace(batch_classify=lambda items: [
+        (article, RelevanceScore(level="Media", score=50.0, reasons=[], drug_mentions=[], location_matches=[]))
+        for article in items])
+    extractions = {agent._make_cui(articles[0]): LLMExtraction(relevance="Alta"),
+                   agent._make_cui(articles[1]): LLMExtraction(relevance="Baja")}
+
+    kept = agent._classify_relevance(articles, "Media", extractions)
+
+    assert [(article.title, relevance.level) for article, relevance in kept] == [("Incautan droga", "Alta")]
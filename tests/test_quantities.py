@@ -0,0 +1,48 @@
+import pytest
+
+from drug_news_agent.quantities import article_quantities, extract_quantities, parse_number, seized_amount
+from drug_news_agent.relevance_classifier import NewsArticle, RelevanceClassifier
+
+
+def _article(title, description="", content=""):
+    return NewsArticle(title=title, description=description, content=content, url="https://noticias.example/1",
+                       date="04/08/2025", source="noticias.example")
+
+
+@pytest.mark.parametrize("text, value", [
+    ("1.500", 1500.0), ("1,500", 1500.0), ("1.500,5", 1500.5), ("1,500.5", 1500.5),
+    ("1,500,000", 1500000.0), ("1,5", 1.5), ("2.5", 2.5), ("0,500", 0.5), ("12,25", 12.25), ("1500", 1500.0),
+])
+def test_parse_number_uses_digit_grouping(text, value):
+    assert parse_number(text) == value
+
+
+def test_extract_quantities_normalises_to_kg():
+    mentions = extract_quantities("Incautan 1,500 kilos de cocaína y 2 toneladas de marihuana; 300 dosis")
+
+    assert [(m.unit, m.kg, m.substance) for m in mentions] == [
+        ('kg', 1500.0, 'cocaina'), ('t', 2000.0, 'marihuana'), ('u', None, '')]
+    assert seized_amount(mentions, "Cocaína").kg == 1500.0
+
+
+def test_article_cache_follows_text_not_lengths():
+    article = _article("Incautan 500 kilos")
+    assert article_quantities(article)[0].kg == 500.0
+    # Mismo largo, otro texto: no debe devolverse la caché anterior
+    article.title = "Incautan 900 kilos"
+    assert article_quantities(article)[0].kg == 900.0
+
+
+@pytest.mark.parametrize("title, score", [
+    ("Incautan 3 toneladas", 10),
+    ("Incautan 500 kilos", 10),
+    ("Incautan 500 kilogramos", 20),  # kilogramos cuenta como kilos y como kilogramos
+    ("Incautan 500 kg", 0),
+    ("Bienes por $ 5 millones", 10),
+    ("Bienes por 5 millones de dólares", 10),
+    ("Bienes por 5.000 dólares", 0),
+    ("Incautan 2 toneladas valoradas en 40 millones de dólares", 20),
+])
+def test_impact_indicators_keep_original_weights(title, score):
+    classifier = RelevanceClassifier.__new__(RelevanceClassifier)
+    assert classifier._analyze_impact_indicators(_article(title)) == score
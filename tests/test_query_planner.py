@@ -0,0 +1,48 @@
+import json
+
+from drug_news_agent.query_planner import QueryPlanner
+
+
+def _options(query):
+    return {'type': 'news', 'hl': 'es', 'gl': 'co' if 'Colombia' in query else None}
+
+
+def test_key_includes_structured_options():
+    assert QueryPlanner.key("Cocaína  Colombia", type="news", hl="es", gl="co") == "cocaína colombia|gl=co|hl=es|type=news"
+    assert QueryPlanner.key("cocaína colombia", type="news") != QueryPlanner.key("cocaína colombia", type="search")
+    # El texto con días se trata como cualquier otro texto
+    assert QueryPlanner.key("decomiso 7 días") != QueryPlanner.key("decomiso 30 días")
+
+
+def test_record_keeps_locales_apart(tmp_path):
+    stats_path = str(tmp_path / "stats.json")
+    news_es = QueryPlanner(stats_path, search_options=lambda query: {'type': 'news', 'hl': 'es'})
+    news_es.record({"cocaína Colombia": {'raw_hits': 4, 'new_events': 2}})
+
+    news_en = QueryPlanner(stats_path, search_options=lambda query: {'type': 'news', 'hl': 'en'})
+    assert not news_en.was_tried("cocaína Colombia")
+    news_en.record({"cocaína Colombia": {'raw_hits': 1}})
+
+    reloaded = QueryPlanner(stats_path, search_options=lambda query: {'type': 'news', 'hl': 'es'})
+    assert reloaded.stats["cocaína colombia|hl=es|type=news"].raw_hits == 4
+    assert reloaded.stats["cocaína colombia|hl=en|type=news"].raw_hits == 1
+
+
+def test_plan_exploits_productive_queries_and_explores_new_ones(tmp_path):
+    planner = QueryPlanner(str(tmp_path / "stats.json"), budget=3, exploration_ratio=0.34, search_options=_options)
+    planner.record({"a Colombia": {'new_events': 1}, "b Colombia": {'new_events': 3}, "c Colombia": {}})
+
+    plan = planner.plan(["a Colombia", "b Colombia", "c Colombia", "d Perú"])
+
+    assert plan == ["b Colombia", "a Colombia", "d Perú"]
+
+
+def test_legacy_text_keys_are_migrated(tmp_path):
+    stats_path = tmp_path / "stats.json"
+    stats_path.write_text(json.dumps({'queries': {
+        "cocaína colombia": {'query': "cocaína Colombia", 'runs': 2, 'new_events': 4}}}), encoding='utf-8')
+
+    planner = QueryPlanner(str(stats_path), search_options=_options)
+
+    assert planner.was_tried("cocaína Colombia")
+    assert planner.stats[planner.query_key("cocaína Colombia")].yield_score == 2.0
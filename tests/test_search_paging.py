@@ -0,0 +1,51 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from demos.tools.private import search
+from demos.tools.private.search import Search
+from drug_news_agent.intelligent_search_agent import IntelligentDrugNewsAgent
+
+
+@pytest.fixture
+def serper(monkeypatch):
+    """Serper simulado: 10 resultados nuevos por página; recuerda las peticiones recibidas"""
+    posted = []
+
+    def post(url, headers, data):
+        body = json.loads(data)
+        posted.append(body)
+        page = body.get("page", 1)
+        news = [{"title": f"Incautan cocaína en Colombia {body['q']} {page}-{i}", "snippet": "Colombia",
+                 "link": f"https://noticias.example/{body['q']}/{page}/{i}", "date": "1 day ago",
+                 "source": "noticias.example"} for i in range(body.get("num", 10))]
+        return SimpleNamespace(status_code=200, text="", json=lambda: {"news": news})
+
+    monkeypatch.setattr(search, "GOOGLE_SEARCH_KEY", "test")
+    monkeypatch.setattr(search.requests, "post", post)
+    return posted
+
+
+def _agent(tmp_path):
+    agent = IntelligentDrugNewsAgent.__new__(IntelligentDrugNewsAgent)
+    agent.search_tool = Search({"cache_file": str(tmp_path / "search_cache.jsonl")})
+    agent.country_index = SimpleNamespace(find=lambda text: "CO" if "Colombia" in text else None)
+    return agent
+
+
+def test_requests_count_api_pages_not_tool_calls(tmp_path, serper):
+    queries = ["cocaína Colombia", "marihuana Colombia"]
+    _, stats = _agent(tmp_path)._perform_searches(queries, max_per_query=20, days_back=7)
+
+    assert (stats['tool_calls'], stats['pages'], stats['requests'], stats['cache_hits']) == (2, 4, 4, 0)
+    assert len(serper) == 4
+
+
+def test_cached_pages_are_not_counted_as_requests(tmp_path, serper):
+    queries = ["cocaína Colombia"]
+    _agent(tmp_path)._perform_searches(queries, max_per_query=20, days_back=7)
+    _, stats = _agent(tmp_path)._perform_searches(queries, max_per_query=20, days_back=7)
+
+    assert (stats['pages'], stats['requests'], stats['cache_hits']) == (2, 0, 2)
+    assert len(serper) == 2
@@ -0,0 +1,90 @@
+import pytest
+
+from demos.llm import stream_buffer
+from demos.llm.stream_buffer import StreamBuffer
+
+
+def _full_text_stream(chunks):
+    """Snapshots a full-text stream would yield for these chunks (same loop as the chat models)."""
+    buffer = StreamBuffer()
+    for chunk in chunks:
+        buffer.append(chunk)
+        if buffer.snapshot_due():
+            yield buffer.snapshot()
+    if buffer.pending or not buffer.num_snapshots:
+        yield buffer.snapshot()
+
+
+def test_getvalue_joins_all_chunks():
+    buffer = StreamBuffer()
+    for chunk in ['ab', '', None, 'cd', 'e']:
+        buffer.append(chunk)
+    assert buffer.getvalue() == 'abcde'
+    assert len(buffer) == 5
+    assert buffer.num_chunks == 3
+    assert buffer.last_delta == 'e'
+
+
+def test_full_text_stream_ends_with_complete_text():
+    chunks = [f'tok{i} ' for i in range(5000)]
+    snapshots = list(_full_text_stream(chunks))
+    assert snapshots[-1] == ''.join(chunks)
+    assert all(b.startswith(a) for a, b in zip(snapshots, snapshots[1:]))
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(stream_buffer.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_full_text_stream_copies_far_less_than_one_snapshot_per_chunk(frozen_clock):
+    chunks = ['x' * 4] * 50000
+    n = 4 * len(chunks)
+    total = sum(len(snapshot) for snapshot in _full_text_stream(chunks))
+    # One snapshot per chunk would copy ~n^2/8 characters here (n^2/2 divided by the chunk size)
+    assert total <= 10 * n + n * n // (2 * StreamBuffer.SNAPSHOT_MAX_GAP_CHARS)
+
+
+def test_snapshot_gap_is_capped_late_in_long_answers(frozen_clock):
+    buffer = StreamBuffer()
+    buffer.append('x' * 100000)
+    buffer.snapshot()
+    buffer.append('y' * (StreamBuffer.SNAPSHOT_MAX_GAP_CHARS - 1))
+    assert not buffer.snapshot_due()
+    buffer.append('y')
+    assert buffer.snapshot_due()
+
+
+def test_snapshot_is_due_after_max_interval(frozen_clock):
+    buffer = StreamBuffer()
+    buffer.append('Hola')
+    assert not buffer.snapshot_due()
+    frozen_clock[0] += StreamBuffer.SNAPSHOT_MAX_INTERVAL
+    assert buffer.snapshot_due()
+    buffer.snapshot()
+    assert not buffer.snapshot_due()
+
+
+def test_empty_stream_still_yields_once():
+    assert list(_full_text_stream([])) == ['']
+    assert list(_full_text_stream(['', ''])) == ['']
+
+
+class _AttrDict(dict):
+    __getattr__ = dict.get
+
+
+def _dashscope_chunk(content):
+    message = _AttrDict(content=content, reasoning_content='')
+    return _AttrDict(status_code=200, output=_AttrDict(choices=[_AttrDict(message=message)]))
+
+
+def test_dashscope_full_stream_yields_few_snapshots_and_final_text():
+    from demos.llm.qwen_dashscope import QwenChatAtDS
+
+    chunks = [f'w{i} ' for i in range(3000)]
+    outputs = list(QwenChatAtDS._full_stream_output(_dashscope_chunk(c) for c in chunks))
+    assert outputs[-1][0].content == ''.join(chunks)
+    assert len(outputs) < 100
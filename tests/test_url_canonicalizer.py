@@ -0,0 +1,50 @@
+import pytest
+
+from drug_news_agent.intelligent_search_agent import IntelligentDrugNewsAgent
+from drug_news_agent.relevance_classifier import NewsArticle
+from drug_news_agent.url_canonicalizer import canonicalize_url, fold_duplicate_urls
+
+CANONICAL = "https://eltiempo.com/justicia/incautacion-123"
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.eltiempo.com/justicia/incautacion-123",
+    "http://eltiempo.com/justicia/incautacion-123/?utm_source=twitter&fbclid=abc",
+    "https://m.eltiempo.com/justicia/incautacion-123#comentarios",
+    "https://amp.eltiempo.com/justicia/incautacion-123/amp",
+    "https://www-eltiempo-com.cdn.ampproject.org/c/s/www.eltiempo.com/justicia/incautacion-123",
+    "eltiempo.com//justicia/incautacion-123",
+])
+def test_variants_share_the_canonical_url(url):
+    assert canonicalize_url(url) == CANONICAL
+
+
+def test_content_parameters_are_kept_and_sorted():
+    assert canonicalize_url("https://diario.com/nota?page=2&id=7&utm_medium=x") == "https://diario.com/nota?id=7&page=2"
+    assert canonicalize_url("https://diario.com:8080/nota") == "https://diario.com:8080/nota"
+
+
+def _article(url, query, description=""):
+    return NewsArticle(title="Incautan cocaína", description=description, content="", url=url,
+                       date="04/08/2025", source="eltiempo.com", queries=[query])
+
+
+def test_fold_keeps_original_urls_and_merges_queries():
+    articles = [_article("https://www.eltiempo.com/justicia/incautacion-123?utm_source=x", "q1"),
+                _article("https://m.eltiempo.com/justicia/incautacion-123", "q2", description="Descripción más larga"),
+                _article("https://otro.com/nota", "q1")]
+
+    folded, metrics = fold_duplicate_urls(articles)
+
+    assert [article.url for article in folded] == ["https://www.eltiempo.com/justicia/incautacion-123?utm_source=x",
+                                                   "https://otro.com/nota"]
+    assert folded[0].canonical_url == CANONICAL
+    assert folded[0].queries == ["q1", "q2"]
+    assert folded[0].description == "Descripción más larga"
+    assert metrics == {'raw_hits': 3, 'unique_urls': 2, 'folded_duplicates': 1, 'fold_ratio': 0.333}
+
+
+def test_cui_is_stable_across_url_variants():
+    first, _ = fold_duplicate_urls([_article("https://www.eltiempo.com/justicia/incautacion-123?fbclid=1", "q")])
+    second, _ = fold_duplicate_urls([_article("https://amp.eltiempo.com/justicia/incautacion-123/amp", "q")])
+    assert IntelligentDrugNewsAgent._make_cui(first[0]) == IntelligentDrugNewsAgent._make_cui(second[0])
@@ -0,0 +1,47 @@
+import json
+
+from demos.tools.private import visit as visit_module
+from demos.tools.private.visit import Visit
+from demos.utils.tokens import count_tokens
+
+
+def test_merge_input_stays_within_token_budget():
+    visit = Visit({'max_content_tokens': 500})
+    parts = [{'part': i, 'evidence': 'Se incautaron 300 kg de cocaína en el puerto. ' * 200, 'summary': 'Resumen. ' * 100}
+             for i in range(1, 4)]
+    text = visit._format_parts(parts)
+
+    assert count_tokens(text) <= 500
+    assert [part['part'] for part in json.loads(text)] == [1, 2, 3]
+
+
+def _page(blocks):
+    return '\n\n'.join(f'Decomiso número {i} de cocaína en el puerto de Buenaventura. ' * 8 for i in range(blocks))
+
+
+def _stub_extraction(visit):
+    chunks = []
+    visit._extract_chunk = lambda chunk, goal: chunks.append(chunk) or {'evidence': 'e', 'summary': 's'}
+    visit._extract_json = lambda prompt: {'evidence': 'merged', 'summary': 'merged'}
+    return chunks
+
+
+def test_long_page_is_read_whole_in_chunks():
+    visit = Visit({'max_content_tokens': 200})
+    page = _page(40)
+    chunks = _stub_extraction(visit)
+    reduced, stats = visit.reduce_page('https://example.com', page, 'decomiso de cocaína')
+
+    assert stats.tokens_dropped == 0
+    assert visit.extract(reduced, 'decomiso de cocaína')['evidence'] == 'merged'
+    assert ''.join(chunks) == reduced and all(count_tokens(chunk) <= 200 for chunk in chunks)
+
+
+def test_tokens_over_the_cap_are_reported(monkeypatch):
+    monkeypatch.setattr(visit_module, 'jina_readpage', lambda url: _page(40))
+    visit = Visit({'max_content_tokens': 200, 'map_reduce_tokens': 600})
+    _stub_extraction(visit)
+    output = visit.readpage('https://example.com', 'decomiso de cocaína')
+
+    assert 'Evidence in page: \nmerged' in output
+    assert 'tokens least related to the goal were not read' in output
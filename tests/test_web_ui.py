@@ -0,0 +1,15 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('gradio')
+from demos.gui.web_ui import WebUI  # noqa: E402
+
+
+def test_user_id_prefers_username_then_session():
+    client = SimpleNamespace(host='10.0.0.1')
+    assert WebUI._get_user_id(SimpleNamespace(username='ana', session_hash='s1', client=client)) == 'ana'
+    assert WebUI._get_user_id(SimpleNamespace(username=None, session_hash='s1', client=client)) == 's1'
+    # Users behind the same NAT or proxy are not merged into one
+    assert WebUI._get_user_id(SimpleNamespace(username=None, session_hash=None, client=client)) == 'anonymous'
+    assert WebUI._get_user_id(None) == 'anonymous'